@@ -4,3 +4,7 @@ from django.apps import AppConfig
 class CompetitionsConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "competitions"
+    def ready(self):
+        import competitions.signals  # 确保 signals 被自动加载
+        from utils.utils_like_buffer import check_like_buffer_config
+        check_like_buffer_config()  # 配置错误时在启动阶段报错
@@ -0,0 +1,189 @@
+import asyncio
+import json
+import random
+import statistics
+import time
+from collections import defaultdict
+from http.cookies import SimpleCookie
+from urllib.parse import urlencode, urlsplit
+
+from django.core.management.base import BaseCommand, CommandError
+from django.urls import reverse
+
+from competitions.management.commands.benchmark_db_connections import percentile
+from competitions.models import Competition
+from forum.models import Post
+from users.models import User
+
+# 每种接口最多从库中取多少个 id 作为请求参数，使请求分散到不同的缓存项
+SAMPLE_SIZE = 100
+# 除 code 为 0 外也算作成功的业务状态码：随机筛选条件下赛事列表为空属于正常结果
+EXPECTED_CODES = {"get_competition_list": {1100}}
+
+class Target:
+    """
+    被测的一个服务进程（uWSGI 或 uvicorn），以 name=url 的形式在命令行给出
+    """
+    def __init__(self, spec):
+        name, sep, url = spec.partition("=")
+        if not sep:
+            raise CommandError(f"目标格式应为 name=url：{spec}")
+        parts = urlsplit(url)
+        if parts.scheme != "http" or not parts.hostname:
+            raise CommandError(f"只支持 http 目标：{url}")
+        self.name = name
+        self.host = parts.hostname
+        self.port = parts.port or 80
+        self.csrf_token = None
+
+async def send(target, method, path, body=None, headers=None, timeout=30):
+    """
+    发送一个 HTTP/1.1 请求（Connection: close），返回 (状态码, 响应头, 响应体)
+    """
+    body = body or b""
+    lines = [
+        f"{method} {path} HTTP/1.1",
+        f"Host: {target.host}",
+        "Connection: close",
+        f"Content-Length: {len(body)}",
+    ]
+    lines += [f"{name}: {value}" for name, value in (headers or {}).items()]
+    reader, writer = await asyncio.wait_for(asyncio.open_connection(target.host, target.port), timeout)
+    try:
+        writer.write(("\r\n".join(lines) + "\r\n\r\n").encode("latin-1") + body)
+        await writer.drain()
+        raw = await asyncio.wait_for(reader.read(), timeout)
+    finally:
+        writer.close()
+    head, _, content = raw.partition(b"\r\n\r\n")
+    status_line, *header_lines = head.decode("latin-1").split("\r\n")
+    response_headers = defaultdict(list)
+    for line in header_lines:
+        name, _, value = line.partition(":")
+        response_headers[name.strip().lower()].append(value.strip())
+    return int(status_line.split()[1]), response_headers, content
+
+def is_success(kind, status, content):
+    """
+    HTTP 200 且响应体中的 code 为 0（或该接口预期的状态码）才算成功
+    """
+    if status != 200:
+        return False
+    try:
+        code = json.loads(content)["code"]
+    except (ValueError, TypeError, KeyError):
+        return False
+    return code == 0 or code in EXPECTED_CODES.get(kind, ())
+
+class Command(BaseCommand):
+    help = (
+        '以固定数量的并发客户端同时压测多个服务进程（如 uWSGI 与 uvicorn），请求在赛事列表、赛事详情、'
+        '帖子列表、帖子详情与标签列表之间随机分配，输出吞吐量、p50 / p99 延迟与失败数（HTTP 状态码非 200 或响应的 code 非 0 均记为失败）'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--target", action="append", dest="targets",
+            help="被测服务，格式为 name=url，可重复，默认 wsgi=http://127.0.0.1:80 与 asgi=http://127.0.0.1:8000",
+        )
+        parser.add_argument("--clients", type=int, default=500, help="同时发请求的客户端数")
+        parser.add_argument("--duration", type=float, default=30, help="每个目标的压测时长（秒）")
+        parser.add_argument("--timeout", type=float, default=30, help="单个请求的超时（秒）")
+        parser.add_argument("--seed", type=int, default=None, help="随机数种子，便于不同目标间对照")
+
+    def handle(self, *args, **options):
+        targets = [Target(spec) for spec in options["targets"] or ["wsgi=http://127.0.0.1:80", "asgi=http://127.0.0.1:8000"]]
+        competition_ids = list(Competition.objects.values_list("id", flat=True)[:SAMPLE_SIZE])
+        post_ids = list(Post.objects.values_list("post_id", flat=True)[:SAMPLE_SIZE])
+        user_ids = list(User.objects.values_list("id", flat=True)[:SAMPLE_SIZE])
+        if not competition_ids or not post_ids or not user_ids:
+            raise CommandError("没有赛事、帖子或用户数据，请先运行 generate_fake_data")
+        self.samples = {"competition": competition_ids, "post": post_ids, "user": user_ids}
+        self.options = options
+
+        for target in targets:
+            results = asyncio.run(self.run_target(target))
+            self.report(target, results)
+        self.stdout.write(f'每个目标 {options["clients"]} 个并发客户端，持续 {options["duration"]:g} 秒')
+
+    def build_request(self, rng):
+        """
+        随机生成一个读请求，返回 (接口名, 方法, 路径, 请求体)
+        """
+        kind = rng.choice(("get_competition_list", "get_competition_info", "get_post_list", "get_post_detail_by_id", "get_tag_list"))
+        if kind == "get_competition_list":
+            body = {
+                "user_id": rng.choice(self.samples["user"]),
+                "tag_list": [],
+                "search_text": "",
+                "before_time": "",
+                "before_id": -1,
+                "is_finished": rng.random() < 0.5,
+                "filter_focus": rng.random() < 0.5,
+            }
+            return kind, "POST", reverse(kind), json.dumps(body).encode("utf-8")
+        if kind == "get_competition_info":
+            params = {"id": rng.choice(self.samples["competition"])}
+        elif kind == "get_post_list":
+            params = {"page": rng.randint(1, 5), "page_size": 20}
+        elif kind == "get_post_detail_by_id":
+            params = {"post_id": rng.choice(self.samples["post"])}
+        else:
+            params = {}
+        path = reverse(kind) + ("?" + urlencode(params) if params else "")
+        return kind, "GET", path, None
+
+    async def run_client(self, target, rng, deadline, results):
+        while time.perf_counter() < deadline:
+            kind, method, path, body = self.build_request(rng)
+            headers = {}
+            if method == "POST":
+                headers = {
+                    "Content-Type": "application/json",
+                    "Cookie": f"csrftoken={target.csrf_token}",
+                    "X-CSRFToken": target.csrf_token,
+                }
+            start = time.perf_counter()
+            try:
+                status, _, content = await send(target, method, path, body, headers, self.options["timeout"])
+                succeeded = is_success(kind, status, content)
+            except (OSError, asyncio.TimeoutError, IndexError, ValueError):
+                succeeded = False
+            results[kind].append((succeeded, (time.perf_counter() - start) * 1000))
+
+    async def run_target(self, target):
+        # 赛事列表为 POST 接口，先取得 CSRF 令牌
+        _, headers, _ = await send(target, "GET", reverse("get_csrf_token"), timeout=self.options["timeout"])
+        cookie = SimpleCookie()
+        for value in headers["set-cookie"]:
+            cookie.load(value)
+        if "csrftoken" not in cookie:
+            raise CommandError(f"{target.name} 没有返回 CSRF 令牌")
+        target.csrf_token = cookie["csrftoken"].value
+
+        seed = self.options["seed"]
+        results = defaultdict(list)
+        deadline = time.perf_counter() + self.options["duration"]
+        await asyncio.gather(*(
+            self.run_client(target, random.Random(None if seed is None else seed + index), deadline, results)
+            for index in range(self.options["clients"])
+        ))
+        return results
+
+    def report(self, target, results):
+        def summary(samples):
+            latencies = sorted(latency for succeeded, latency in samples if succeeded)
+            failed = sum(1 for succeeded, _ in samples if not succeeded)
+            if not latencies:
+                return f'成功 0 次  失败 {failed} 次'
+            return (
+                f'成功 {len(latencies):6d} 次  p50 {percentile(latencies, 50):8.2f} ms  p99 {percentile(latencies, 99):8.2f} ms  '
+                f'平均 {statistics.mean(latencies):8.2f} ms  失败 {failed} 次'
+            )
+
+        everything = [sample for samples in results.values() for sample in samples]
+        succeeded = sum(1 for ok, _ in everything if ok)
+        self.stdout.write(f'{target.name} ({target.host}:{target.port})  吞吐 {succeeded / self.options["duration"]:.1f} 请求/秒')
+        self.stdout.write(f'  {"全部":<22} {summary(everything)}')
+        for kind, samples in sorted(results.items()):
+            self.stdout.write(f'  {kind:<22} {summary(samples)}')
@@ -0,0 +1,83 @@
+import json
+import statistics
+import time
+
+from django.conf import settings
+from django.core.handlers.wsgi import WSGIHandler
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+from django.db.backends.signals import connection_created
+from django.test import RequestFactory
+from django.test.utils import override_settings
+from django.urls import reverse
+
+from competitions.models import Competition
+from tsingleap_backend.db import DB_CONN_MODES, connection_settings
+
+def percentile(samples, q):
+    """
+    最近秩法求百分位数，samples 须已升序排列
+    """
+    index = max(0, min(len(samples) - 1, round(q / 100 * len(samples)) - 1))
+    return samples[index]
+
+class Command(BaseCommand):
+    help = '在不同的数据库连接复用方式下反复请求 get_competition_info，输出 p50 / p99 延迟与新建连接数'
+
+    def add_arguments(self, parser):
+        parser.add_argument("--requests", type=int, default=500, help="每种方式的请求数")
+        parser.add_argument("--warmup", type=int, default=20, help="每种方式正式计时前的预热请求数")
+        parser.add_argument("--modes", nargs="+", choices=DB_CONN_MODES, default=list(DB_CONN_MODES), help="要测量的连接方式")
+
+    def handle(self, *args, **options):
+        competition_id = Competition.objects.values_list("id", flat=True).first()
+        if competition_id is None:
+            raise CommandError("没有赛事数据，请先运行 generate_fake_data")
+        database = connections["default"]
+        original = {key: database.settings_dict[key] for key in ("CONN_MAX_AGE", "CONN_HEALTH_CHECKS", "OPTIONS")}
+
+        opened = []
+        def count_connection(sender, connection, **kwargs):
+            opened.append(connection.alias)
+        connection_created.connect(count_connection)
+
+        # 直接调用 WSGIHandler：与 uWSGI 一样在每个请求前后触发 close_old_connections，
+        # 测试客户端会跳过这一步，测不出不同连接方式的差别
+        handler = WSGIHandler()
+        factory = RequestFactory()
+        url = reverse("get_competition_info")
+        def request():
+            response = handler(factory.get(url, {"id": competition_id}, SERVER_NAME="localhost").environ, lambda *args: None)
+            try:
+                return b"".join(response)
+            finally:
+                response.close()
+
+        # 关闭响应缓存，使每个请求都查询数据库
+        try:
+            with override_settings(CACHES={"default": {"BACKEND": "django.core.cache.backends.dummy.DummyCache"}}):
+                for mode in options["modes"]:
+                    connections.close_all()
+                    database.close_pool()
+                    database.settings_dict.update(connection_settings(mode))
+                    for _ in range(options["warmup"]):
+                        request()
+                    opened.clear()
+                    samples = []
+                    for _ in range(options["requests"]):
+                        start = time.perf_counter()
+                        content = request()
+                        samples.append((time.perf_counter() - start) * 1000)
+                        if json.loads(content)["code"] != 0:
+                            raise CommandError(f"请求失败：{content.decode('utf-8')}")
+                    samples.sort()
+                    self.stdout.write(
+                        f'{mode:<10} p50 {percentile(samples, 50):7.2f} ms  p99 {percentile(samples, 99):7.2f} ms  '
+                        f'平均 {statistics.mean(samples):7.2f} ms  新建连接 {len(opened)} 次'
+                    )
+        finally:
+            connection_created.disconnect(count_connection)
+            connections.close_all()
+            database.close_pool()
+            database.settings_dict.update(original)
+        self.stdout.write(f'数据库 {settings.DATABASES["default"]["HOST"]}，每种方式 {options["requests"]} 个请求')
@@ -0,0 +1,60 @@
+import json
+import time
+
+from django.core.management.base import BaseCommand
+from django.test import RequestFactory
+
+from competitions.views import COMPETITION_LIST_SCHEMA
+from utils.utils_require import require, require_failed
+from utils.utils_schema import parse_request
+
+def parse_with_require(req):
+    """
+    迁移前 get_competition_list 的解析方式：逐键调用 require，出错时由 check_require 的 except 转换
+    """
+    try:
+        body = json.loads(req.body.decode("utf-8")) if req.body else {}
+        return {
+            "user_id": require(body, "user_id", "int"),
+            "tag_list": require(body, "tag_list", "list"),
+            "search_text": require(body, "search_text", "string"),
+            "before_time": require(body, "before_time", "string"),
+            "before_id": require(body, "before_id", "int"),
+            "is_finished": require(body, "is_finished", "bool"),
+            "filter_focus": require(body, "filter_focus", "bool"),
+        }
+    except Exception as e:
+        return require_failed(e)
+
+def parse_with_schema(req):
+    params, error = parse_request(req, "POST", COMPETITION_LIST_SCHEMA)
+    return params if error is None else error
+
+class Command(BaseCommand):
+    help = '比较逐键 require 与编译后的请求参数声明解析、校验 get_competition_list 请求体的吞吐量'
+
+    def add_arguments(self, parser):
+        parser.add_argument("--iterations", type=int, default=100000, help="每种方式解析的请求数")
+
+    def handle(self, *args, **options):
+        factory = RequestFactory()
+        valid = {
+            "user_id": "42", "tag_list": [1, 2], "search_text": "篮球", "before_time": "",
+            "before_id": -1, "is_finished": "false", "filter_focus": True,
+        }
+        cases = {
+            "合法请求": valid,
+            "缺少字段": {key: value for key, value in valid.items() if key not in ("tag_list", "before_id")},
+        }
+        for case, body in cases.items():
+            req = factory.post("/", data=json.dumps(body), content_type="application/json")
+            self.stdout.write(case)
+            for name, parse in (("require", parse_with_require), ("schema", parse_with_schema)):
+                start = time.perf_counter()
+                for _ in range(options["iterations"]):
+                    parse(req)
+                elapsed = time.perf_counter() - start
+                self.stdout.write(
+                    f'  {name:<8} {options["iterations"] / elapsed:12.0f} 次/秒  '
+                    f'每次 {elapsed / options["iterations"] * 1e6:6.2f} µs'
+                )
@@ -0,0 +1,33 @@
+import logging
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+from utils.utils_like_buffer import flush_like_buffer
+
+logger = logging.getLogger(__name__)
+
+class Command(BaseCommand):
+    help = '把点赞写缓冲中的点赞批量写入数据库，指定 --interval 时持续运行'
+
+    def add_arguments(self, parser):
+        parser.add_argument("--interval", type=float, default=0, help="两次落库之间的间隔秒数，0 表示只执行一次")
+
+    def handle(self, *args, **options):
+        interval = options["interval"]
+        while True:
+            # 常驻进程没有请求边界，每次落库之前自行关闭超时或已断开的数据库连接
+            close_old_connections()
+            try:
+                flushed = flush_like_buffer()
+            except Exception:
+                # 落库失败时快照保留在缓冲中，下一轮会重新处理，进程不退出
+                if interval <= 0:
+                    raise
+                logger.exception("点赞写缓冲落库失败")
+                flushed = 0
+            if flushed:
+                self.stdout.write(f'已落库 {flushed} 条点赞记录')
+            if interval <= 0:
+                break
+            time.sleep(interval)
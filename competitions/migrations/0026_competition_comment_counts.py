@@ -0,0 +1,23 @@
+# Generated by Django 5.1.7 on 2026-10-18 00:20
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("competitions", "0025_participant_remove_competition_participants_like_and_more"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="competition",
+            name="comment_count",
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name="competition",
+            name="total_comment_count",
+            field=models.IntegerField(default=0),
+        ),
+    ]
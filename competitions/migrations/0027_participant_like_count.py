@@ -0,0 +1,30 @@
+# Generated by Django 5.1.7 on 2026-10-18 00:25
+
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+def fill_like_count(apps, schema_editor):
+    Participant = apps.get_model("competitions", "Participant")
+    Like = apps.get_model("competitions", "Like")
+    like_count = (
+        Like.objects.filter(participant_id=OuterRef("pk"))
+        .order_by().values("participant_id").annotate(count=Count("pk")).values("count")
+    )
+    Participant.objects.update(like_count=Coalesce(Subquery(like_count), 0))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("competitions", "0026_competition_comment_counts"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="participant",
+            name="like_count",
+            field=models.IntegerField(default=0),
+        ),
+        migrations.RunPython(fill_like_count, migrations.RunPython.noop),
+    ]
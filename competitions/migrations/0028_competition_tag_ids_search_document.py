@@ -0,0 +1,64 @@
+import django.contrib.postgres.fields
+import django.contrib.postgres.indexes
+from django.db import migrations, models
+
+SEARCH_DOCUMENT_TRGM_INDEX = "competitions_search_trgm_idx"
+
+def fill_tag_ids_and_search_document(apps, schema_editor):
+    schema_editor.execute(
+        'UPDATE "competitions_competition" SET '
+        '"tag_ids" = ARRAY('
+        'SELECT "tag_id" FROM "competitions_competition_tags" '
+        'WHERE "competitions_competition_tags"."competition_id" = "competitions_competition"."id" ORDER BY "tag_id"), '
+        '"search_document" = "name" || E\'\\n\' || "sport" || E\'\\n\' || COALESCE(('
+        'SELECT string_agg("competitions_participant"."name", E\'\\n\' ORDER BY "competitions_participant"."id") '
+        'FROM "competitions_competition_participants" '
+        'JOIN "competitions_participant" ON "competitions_participant"."id" = "competitions_competition_participants"."participant_id" '
+        'WHERE "competitions_competition_participants"."competition_id" = "competitions_competition"."id"), \'\')'
+    )
+
+def create_trigram_index(apps, schema_editor):
+    # 搜索为不区分大小写的子串匹配，若数据库提供 pg_trgm 则为其建立三元组索引
+    with schema_editor.connection.cursor() as cursor:
+        cursor.execute("SELECT 1 FROM pg_available_extensions WHERE name = 'pg_trgm'")
+        if cursor.fetchone() is None:
+            return
+    schema_editor.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+    schema_editor.execute(
+        f'CREATE INDEX IF NOT EXISTS "{SEARCH_DOCUMENT_TRGM_INDEX}" ON "competitions_competition" '
+        'USING gin (UPPER("search_document"::text) gin_trgm_ops)'
+    )
+
+def drop_trigram_index(apps, schema_editor):
+    schema_editor.execute(f'DROP INDEX IF EXISTS "{SEARCH_DOCUMENT_TRGM_INDEX}"')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("competitions", "0027_participant_like_count"),
+        ("tag", "0006_alter_tag_tag_type"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="competition",
+            name="tag_ids",
+            field=django.contrib.postgres.fields.ArrayField(base_field=models.IntegerField(), blank=True, default=list, size=None),
+        ),
+        migrations.AddField(
+            model_name="competition",
+            name="search_document",
+            field=models.TextField(blank=True, default=""),
+        ),
+        migrations.AddIndex(
+            model_name="competition",
+            index=django.contrib.postgres.indexes.GinIndex(fields=["tag_ids"], name="competitions_tag_ids_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="competition",
+            index=models.Index(fields=["is_finished", "time_begin", "id"], name="competitions_list_idx"),
+        ),
+        migrations.RunPython(fill_tag_ids_and_search_document, migrations.RunPython.noop),
+        migrations.RunPython(create_trigram_index, drop_trigram_index),
+    ]
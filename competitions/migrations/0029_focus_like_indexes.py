@@ -0,0 +1,20 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("competitions", "0028_competition_tag_ids_search_document"),
+        ("users", "0005_outgoingemail"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="focus",
+            index=models.Index(fields=["user", "competition"], name="competitions_focus_user_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="like",
+            index=models.Index(fields=["user", "participant"], name="competitions_like_user_idx"),
+        ),
+    ]
@@ -1,4 +1,6 @@
 from django.db import models
+from django.contrib.postgres.fields import ArrayField
+from django.contrib.postgres.indexes import GinIndex
 from django.utils import timezone
 from utils.utils_require import MAX_CHAR_LENGTH
 from users.models import User
@@ -10,6 +12,8 @@ class Participant(models.Model):
     id = models.BigAutoField(primary_key=True)
     name = models.CharField(max_length=MAX_CHAR_LENGTH)
     score = models.IntegerField(default=0)
+    # 点赞数，由 competitions.signals 随 Like 的增删用 F() 原子更新
+    like_count = models.IntegerField(default=0)
 
     def __str__(self):
         return f"{self.name} - {self.score}"
@@ -24,6 +28,21 @@ class Competition(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     tags = models.ManyToManyField(Tag, related_name="competition", blank=True)
+    # 评论计数器，由 forum.signals 在评论增删时维护，含义同 Post
+    comment_count = models.IntegerField(default=0)
+    total_comment_count = models.IntegerField(default=0)
+    # tags 的冗余副本（按 id 升序），由 competitions.signals 在 m2m 变化时维护，用法同 Post.tag_ids
+    tag_ids = ArrayField(models.IntegerField(), default=list, blank=True)
+    # 检索文本：名称、项目与全部选手名，以换行分隔，由 competitions.signals 与批量写入选手的视图维护，
+    # 搜索时对这一列做子串匹配，不再 JOIN 选手表
+    search_document = models.TextField(default="", blank=True)
+
+    class Meta:
+        indexes = [
+            GinIndex(fields=["tag_ids"], name="competitions_tag_ids_idx"),
+            # 列表按 is_finished 筛选后按 (time_begin, id) 分页
+            models.Index(fields=["is_finished", "time_begin", "id"], name="competitions_list_idx"),
+        ]
 
     def __str__(self):
         return f"{self.name} - {self.sport} ({self.time_begin})"
@@ -32,6 +51,12 @@ class Focus(models.Model):
     user = models.ForeignKey(User, on_delete=models.CASCADE)
     competition = models.ForeignKey(Competition, on_delete=models.CASCADE)
 
+    class Meta:
+        indexes = [
+            # 按 (用户, 赛事) 检查是否关注，也用于列表的 EXISTS 子查询
+            models.Index(fields=["user", "competition"], name="competitions_focus_user_idx"),
+        ]
+
     def __str__(self):
         return f"{self.user.username} - {self.competition.name}"
 
@@ -39,5 +64,11 @@ class Like(models.Model):
     user = models.ForeignKey(User, on_delete=models.CASCADE)
     participant = models.ForeignKey(Participant, on_delete=models.CASCADE)
 
+    class Meta:
+        indexes = [
+            # 按 (用户, 选手) 检查是否点赞，选手列表按用户批量取点赞状态
+            models.Index(fields=["user", "participant"], name="competitions_like_user_idx"),
+        ]
+
     def __str__(self):
         return f"{self.user.username} - {self.participant.name}"
\ No newline at end of file
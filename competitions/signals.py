@@ -0,0 +1,131 @@
+from django.db.models import F, Func, QuerySet, Value
+from django.db.models.signals import m2m_changed, post_delete, post_save, pre_delete
+from django.dispatch import receiver
+from competitions.models import Competition, Like, Participant
+from tag.models import Tag
+from utils.utils_competition import refresh_search_documents, refresh_tag_ids
+from utils.utils_response_cache import instance_tag, invalidate_response_cache
+
+def update_like_count(participant_id, delta):
+    """
+    用 F() 表达式原子地调整选手的点赞数
+    """
+    Participant.objects.filter(pk=participant_id).update(like_count=F("like_count") + delta)
+    invalidate_response_cache(instance_tag(Participant, participant_id))
+
+@receiver(post_save, sender=Like)
+def count_created_like(sender, instance, created, raw, **kwargs):
+    """
+    新建点赞时增加选手的点赞数
+    """
+    if created and not raw:
+        update_like_count(instance.participant_id, 1)
+
+@receiver(post_delete, sender=Like)
+def count_deleted_like(sender, instance, origin=None, **kwargs):
+    """
+    删除点赞时扣减选手的点赞数；选手本身被删除引起的级联删除无需更新
+    """
+    if isinstance(origin, Participant) or (isinstance(origin, QuerySet) and origin.model is Participant):
+        return
+    update_like_count(instance.participant_id, -1)
+
+# 影响 search_document 的赛事字段
+SEARCH_DOCUMENT_FIELDS = {"name", "sport"}
+
+@receiver(post_save, sender=Competition)
+def sync_competition_search_document(sender, instance, raw, update_fields=None, **kwargs):
+    """
+    赛事名称或项目可能变化时重算检索文本
+    """
+    if raw or (update_fields is not None and not SEARCH_DOCUMENT_FIELDS & set(update_fields)):
+        return
+    refresh_search_documents([instance.pk])
+
+@receiver(post_save, sender=Participant)
+def sync_participant_search_documents(sender, instance, created, raw, update_fields=None, **kwargs):
+    """
+    选手改名后重算其所属赛事的检索文本；新建的选手尚未加入任何赛事
+    """
+    if created or raw or (update_fields is not None and "name" not in update_fields):
+        return
+    refresh_search_documents(instance.competition.values("pk"))
+
+@receiver(m2m_changed, sender=Competition.participants.through)
+def sync_participants_search_documents(sender, instance, action, reverse, pk_set, **kwargs):
+    """
+    competition.participants 或 participant.competition 变化后重算检索文本
+    """
+    if not reverse:
+        if action in ("post_add", "post_remove", "post_clear"):
+            refresh_search_documents([instance.pk])
+        return
+    # 反向修改时 pk_set 为受影响的赛事；clear 时需要提前记录
+    if action == "pre_clear":
+        instance._cleared_competition_ids = list(instance.competition.values_list("pk", flat=True))
+    elif action in ("post_add", "post_remove"):
+        refresh_search_documents(pk_set)
+    elif action == "post_clear":
+        refresh_search_documents(getattr(instance, "_cleared_competition_ids", []))
+
+@receiver(m2m_changed, sender=Competition.tags.through)
+def sync_competition_tag_ids(sender, instance, action, reverse, pk_set, **kwargs):
+    """
+    competition.tags 或 tag.competition 变化后同步赛事的 tag_ids
+    """
+    if not reverse:
+        if action in ("post_add", "post_remove", "post_clear"):
+            # 同时更新内存中的实例，避免随后的 save() 把旧值写回
+            instance.tag_ids = list(
+                sender.objects.filter(competition_id=instance.pk).order_by("tag_id").values_list("tag_id", flat=True)
+            )
+            Competition.objects.filter(pk=instance.pk).update(tag_ids=instance.tag_ids)
+        return
+    if action == "pre_clear":
+        instance._cleared_competition_ids = list(instance.competition.values_list("pk", flat=True))
+    elif action in ("post_add", "post_remove"):
+        refresh_tag_ids(pk_set)
+    elif action == "post_clear":
+        refresh_tag_ids(getattr(instance, "_cleared_competition_ids", []))
+
+@receiver(pre_delete, sender=Tag)
+def remove_deleted_tag_from_competitions(sender, instance, **kwargs):
+    """
+    删除标签时级联删除中间表不会触发 m2m_changed，这里直接从 tag_ids 中移除
+    """
+    Competition.objects.filter(tag_ids__contains=[instance.pk]).update(
+        tag_ids=Func(F("tag_ids"), Value(instance.pk), function="array_remove",
+                     output_field=Competition._meta.get_field("tag_ids"))
+    )
+
+@receiver(post_save, sender=Competition)
+@receiver(post_delete, sender=Competition)
+def invalidate_competition_responses(sender, instance, **kwargs):
+    """
+    赛事增删改后使其详情与选手列表的响应缓存失效
+    """
+    invalidate_response_cache(instance_tag(Competition, instance.pk))
+
+@receiver(post_save, sender=Participant)
+def invalidate_participant_responses(sender, instance, raw, **kwargs):
+    """
+    选手信息变化后使包含该选手的选手列表缓存失效
+    """
+    if not raw:
+        invalidate_response_cache(instance_tag(Participant, instance.pk))
+
+@receiver(m2m_changed, sender=Competition.participants.through)
+def invalidate_participant_list_responses(sender, instance, action, reverse, pk_set, **kwargs):
+    """
+    赛事的选手增减后使选手列表缓存失效
+    """
+    if action not in ("post_add", "post_remove", "post_clear"):
+        return
+    if not reverse:
+        invalidate_response_cache(instance_tag(Competition, instance.pk))
+    elif action == "post_clear":
+        invalidate_response_cache(*[
+            instance_tag(Competition, pk) for pk in getattr(instance, "_cleared_competition_ids", [])
+        ])
+    else:
+        invalidate_response_cache(*[instance_tag(Competition, pk) for pk in pk_set])
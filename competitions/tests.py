@@ -1,20 +1,26 @@
 import json
 import secrets
-from django.test import TestCase, RequestFactory
+from django.core.exceptions import ImproperlyConfigured
+from django.db import connection
+from django.test import TestCase, RequestFactory, override_settings
+from django.urls import NoReverseMatch, reverse
 from django.utils import timezone
 from tag.models import Tag, TagType
 from users.models import User
 from settings.models import UserPermission
 from competitions.models import Competition, Participant, Focus, Like
+from forum.models import Comment
 from competitions.views import (
     create_competition, get_competition_list, get_competition_info,
     update_competition, delete_competition, add_participant,
     delete_participant, update_participant, get_participant_list,
     get_competition_admin_list, add_competition_focus,
     del_competition_focus, get_tag_list_by_competition,
-    like_participant, unlike_participant, get_like_count
+    like_participant, unlike_participant, get_like_count, filter_competition
 )
 from utils.utils_request import BAD_METHOD
+from utils.utils_like_buffer import check_like_buffer_config, flush_like_buffer, get_like_store
+from utils.utils_score_feed import get_score_feed
 from utils.utils_competition import TAG_NUM_LIMIT, MAX_COMPETITION_LIST_LENGTH
 
 class ViewsTestCase(TestCase):
@@ -130,6 +136,25 @@ class ViewsTestCase(TestCase):
         data = json.loads(get_competition_list(self.factory.post('/list/', data=json.dumps(body), content_type='application/json')).content)
         self.assertTrue(data['data']['competition_list'][0]['is_focus'])
 
+    def test_get_competition_list_search_document(self):
+        """多标签同时命中、按选手名搜索，选手改名后检索文本随之更新"""
+        c = Competition.objects.create(name='Final',sport='Run',is_finished=False,time_begin=timezone.now())
+        c.tags.set(self.comp_tags[:2])
+        self.assertEqual(Competition.objects.get(id=c.id).tag_ids, sorted(t.id for t in self.comp_tags[:2]))
+        p = Participant.objects.create(name='Alice',score=0)
+        c.participants.add(p)
+        body = {'user_id':self.user1.id,'tag_list':[t.id for t in self.comp_tags[:2]],'search_text':'alice',
+                'before_time':'','before_id':-1,'is_finished':False,'filter_focus':False}
+        data = json.loads(get_competition_list(self.factory.post('/list/', data=json.dumps(body), content_type='application/json')).content)
+        self.assertEqual([item['id'] for item in data['data']['competition_list']], [c.id])
+
+        update_participant(self.factory.post('/part/upd/', data=json.dumps({'participants':[{'id':p.id,'name':'Bob','score':0}]}), content_type='application/json'))
+        data = json.loads(get_competition_list(self.factory.post('/list/', data=json.dumps(body), content_type='application/json')).content)
+        self.assertEqual(data['code'], 1100)
+        body['search_text'] = 'BOB'
+        data = json.loads(get_competition_list(self.factory.post('/list/', data=json.dumps(body), content_type='application/json')).content)
+        self.assertEqual([item['id'] for item in data['data']['competition_list']], [c.id])
+
     # --------- get_competition_info ---------
     def test_get_competition_info_wrong_method(self):
         """非 GET 请求返回 BAD_METHOD"""
@@ -146,6 +171,15 @@ class ViewsTestCase(TestCase):
         data = json.loads(get_competition_info(self.factory.get('/info/', {'id':c.id})).content)
         self.assertEqual(data['data']['competition']['id'], c.id)
 
+    def test_get_competition_info_comment_counts(self):
+        """赛事详情返回评论计数器"""
+        c = Competition.objects.create(name='E', sport='X', is_finished=False, time_begin=timezone.now())
+        root = Comment.objects.create(content='root', author=self.user1, content_object=c)
+        Comment.objects.create(content='reply', author=self.user2, content_object=root)
+        data = json.loads(get_competition_info(self.factory.get('/info/', {'id': c.id})).content)
+        self.assertEqual(data['data']['competition']['comment_count'], 1)
+        self.assertEqual(data['data']['competition']['total_comment_count'], 2)
+
     # --------- update_competition ---------
     def test_update_competition_wrong_method(self):
         """非 POST 请求返回 BAD_METHOD"""
@@ -255,6 +289,102 @@ class ViewsTestCase(TestCase):
         self.assertEqual(data['code'], 0)
         p.refresh_from_db(); self.assertEqual(p.name,'New')
 
+    def test_update_participant_not_found(self):
+        """存在不存在的参赛者时返回 1126 且不做修改"""
+        p = Participant.objects.create(name='Old',score=0)
+        body={'participants':[{'id':p.id,'name':'New','score':5},{'id':p.id+1000,'name':'X','score':1}]}
+        data=json.loads(update_participant(self.factory.post('/part/upd/', data=json.dumps(body), content_type='application/json')).content)
+        self.assertEqual(data['code'], 1126)
+        p.refresh_from_db(); self.assertEqual(p.name,'Old')
+
+    def test_participant_bulk_constant_queries(self):
+        """批量添加 / 更新 500 名参赛者的查询次数为常数（逐条处理需要 1000 次以上）"""
+        c=Competition.objects.create(name='BULK',sport='S',is_finished=False,time_begin=timezone.now())
+        body={'competition_id':c.id,'participants':[{'name':f'P{i}','score':i} for i in range(500)]}
+        # 赛事查询、选手插入、关联插入、重算检索文本，外加事务的 SAVEPOINT / RELEASE
+        with self.assertNumQueries(6):
+            data = json.loads(add_participant(self.factory.post('/part/', data=json.dumps(body), content_type='application/json')).content)
+        self.assertEqual(data['code'], 0)
+        ids = data['data']['participant_ids']
+        self.assertEqual(list(c.participants.order_by('id').values_list('id', flat=True)), sorted(ids))
+        self.assertEqual(Participant.objects.get(id=ids[7]).name, 'P7')
+
+        Like.objects.create(user=self.user1, participant_id=ids[0])
+        body={'participants':[{'id':pid,'name':f'Q{i}','score':i*2} for i, pid in enumerate(ids)]}
+        # 加锁读取、批量更新、查询选手所属赛事（用于推送）、重算检索文本，外加事务的 SAVEPOINT / RELEASE
+        with self.assertNumQueries(6):
+            data=json.loads(update_participant(self.factory.post('/part/upd/', data=json.dumps(body), content_type='application/json')).content)
+        self.assertEqual(data['code'], 0)
+        p = Participant.objects.get(id=ids[0])
+        self.assertEqual((p.name, p.score, p.like_count), ('Q0', 0, 1))
+        self.assertEqual(Participant.objects.get(id=ids[499]).score, 998)
+
+    # --------- subscribe_competition ---------
+    def test_update_participant_publishes_delta(self):
+        """更新选手后向所属赛事推送有变化的选手"""
+        c=Competition.objects.create(name='LIVE',sport='S',is_finished=False,time_begin=timezone.now())
+        p1=Participant.objects.create(name='A',score=0)
+        p2=Participant.objects.create(name='B',score=0)
+        c.participants.add(p1, p2)
+        body={'participants':[{'id':p1.id,'name':'A','score':3},{'id':p2.id,'name':'B','score':0}]}
+        with self.captureOnCommitCallbacks(execute=True):
+            update_participant(self.factory.post('/part/upd/', data=json.dumps(body), content_type='application/json'))
+        latest, events = get_score_feed().read_since_sync(c.id, 0)
+        self.assertEqual(latest, 1)
+        self.assertEqual(events, [(1, {'type':'participants_updated','participants':[{'id':p1.id,'name':'A','score':3}]})])
+
+    def test_update_competition_noop_publishes_nothing(self):
+        """提交与当前相同的赛事信息时不推送 competition_updated"""
+        c=Competition.objects.create(name='SAME',sport='S',is_finished=False,time_begin=timezone.now())
+        c.refresh_from_db()
+        body={'id':c.id,'name':'SAME','sport':'S','is_finished':False,'time_begin':c.time_begin.isoformat(),'tag_ids':[]}
+        with self.captureOnCommitCallbacks(execute=True):
+            data = json.loads(update_competition(self.factory.post('/upd/', data=json.dumps(body), content_type='application/json')).content)
+        self.assertEqual(data['code'], 0)
+        self.assertEqual(get_score_feed().read_since_sync(c.id, 0), (0, []))
+
+    @override_settings(ROOT_URLCONF='tsingleap_backend.urls_asgi')
+    async def test_subscribe_competition_resume(self):
+        """带 last_seq 重连时补发其后的事件，不带时先发送 reset"""
+        c = await Competition.objects.acreate(name='SSE',sport='S',is_finished=False,time_begin=timezone.now())
+        feed = get_score_feed()
+        feed.publish(c.id, {'type':'participants_updated','participants':[{'id':1,'name':'A','score':1}]})
+        feed.publish(c.id, {'type':'competition_updated','competition':{'id':c.id,'is_finished':True}})
+
+        response = await self.async_client.get(reverse('subscribe_competition'), {'competition_id':c.id,'last_seq':1})
+        self.assertEqual(response['Content-Type'], 'text/event-stream')
+        chunks = response.streaming_content
+        self.assertEqual(await anext(chunks), b'retry: 3000\n\n')
+        chunk = (await anext(chunks)).decode()
+        self.assertTrue(chunk.startswith('id: 2\nevent: competition_updated\n'))
+        self.assertEqual(json.loads(chunk.split('data: ', 1)[1])['competition']['is_finished'], True)
+        await chunks.aclose()
+
+        response = await self.async_client.get(reverse('subscribe_competition'), {'competition_id':c.id})
+        chunks = response.streaming_content
+        await anext(chunks)
+        self.assertEqual(await anext(chunks), b'id: 2\nevent: reset\ndata: {"seq":2}\n\n')
+        await chunks.aclose()
+
+    @override_settings(ROOT_URLCONF='tsingleap_backend.urls_asgi')
+    async def test_subscribe_competition_not_found(self):
+        """订阅不存在的赛事返回 1127"""
+        response = await self.async_client.get(reverse('subscribe_competition'), {'competition_id':999})
+        self.assertEqual(json.loads(response.content)['code'], 1127)
+
+    @override_settings(ROOT_URLCONF='tsingleap_backend.urls_asgi', SINGLE_PROCESS=False)
+    async def test_subscribe_competition_requires_redis(self):
+        """多进程部署下未配置 Redis 时推送不可用，返回 503"""
+        c = await Competition.objects.acreate(name='SSE',sport='S',is_finished=False,time_begin=timezone.now())
+        response = await self.async_client.get(reverse('subscribe_competition'), {'competition_id':c.id})
+        self.assertEqual(response.status_code, 503)
+        self.assertEqual(json.loads(response.content)['code'], 1128)
+
+    def test_subscribe_competition_not_routed_under_wsgi(self):
+        """同步入口不提供推送接口，避免长连接占住 uWSGI 进程"""
+        with self.assertRaises(NoReverseMatch):
+            reverse('subscribe_competition')
+
     # --------- get_participant_list ---------
     def test_get_participant_list_wrong_method(self):
         """非 GET 请求返回 BAD_METHOD"""
@@ -276,6 +406,42 @@ class ViewsTestCase(TestCase):
         item = data['data']['participant_list'][0]
         self.assertTrue(item['like']); self.assertEqual(item['like_count'], 1)
 
+    def test_get_participant_list_constant_queries(self):
+        """参赛者列表的查询次数与参赛者数量无关"""
+        c=Competition.objects.create(name='M',sport='S',is_finished=False,time_begin=timezone.now())
+        participants=[Participant.objects.create(name=f'P{i}',score=i) for i in range(10)]
+        c.participants.add(*participants)
+        for p in participants[:4]:
+            Like.objects.create(user=self.user2,participant=p)
+        Like.objects.create(user=self.user1,participant=participants[0])
+        with self.assertNumQueries(3):
+            resp=get_participant_list(self.factory.get('/part/list/', {'user_id':self.user1.id,'competition_id':c.id}))
+        items={item['id']: item for item in json.loads(resp.content)['data']['participant_list']}
+        self.assertEqual(items[participants[0].id]['like_count'], 2)
+        self.assertTrue(items[participants[0].id]['like'])
+        self.assertEqual(items[participants[1].id]['like_count'], 1)
+        self.assertFalse(items[participants[1].id]['like'])
+        self.assertEqual(items[participants[9].id]['like_count'], 0)
+
+    def test_get_participant_list_response_cache(self):
+        """参赛者列表命中缓存时不查询数据库，点赞与修改选手后缓存失效"""
+        c=Competition.objects.create(name='N',sport='S',is_finished=False,time_begin=timezone.now())
+        p=Participant.objects.create(name='P',score=1)
+        c.participants.add(p)
+        def items():
+            resp=get_participant_list(self.factory.get('/part/list/', {'user_id':self.user1.id,'competition_id':c.id}))
+            return json.loads(resp.content)['data']['participant_list']
+        items()
+        with self.assertNumQueries(0):
+            self.assertEqual(items()[0]['like_count'], 0)
+        Like.objects.create(user=self.user1,participant=p)
+        self.assertEqual((items()[0]['like'], items()[0]['like_count']), (True, 1))
+        body={'participants':[{'id':p.id,'name':'P2','score':5}]}
+        update_participant(self.factory.post('/part/upd/', data=json.dumps(body), content_type='application/json'))
+        self.assertEqual((items()[0]['name'], items()[0]['score']), ('P2', 5))
+        c.participants.remove(p)
+        self.assertEqual(items(), [])
+
     # --------- get_competition_admin_list ---------
     def test_get_competition_admin_list_wrong_method(self):
         """非 GET 请求返回 BAD_METHOD"""
@@ -393,6 +559,8 @@ class ViewsTestCase(TestCase):
         p=Participant.objects.create(name='L3',score=3)
         data=json.loads(like_participant(self.factory.post('/like/', data=json.dumps({'user_id':self.user1.id,'participant_id':p.id}), content_type='application/json')).content)
         self.assertEqual(data['code'],0)
+        p.refresh_from_db()
+        self.assertEqual(p.like_count,1)
 
     def test_unlike_participant_wrong_method(self):
         """非 POST 请求返回 BAD_METHOD"""
@@ -422,6 +590,43 @@ class ViewsTestCase(TestCase):
         data=json.loads(unlike_participant(self.factory.post('/unlike/', data=json.dumps({'user_id':self.user1.id,'participant_id':p.id}), content_type='application/json')).content)
         self.assertEqual(data['code'],0)
         self.assertFalse(Like.objects.filter(id=like.id).exists())
+        p.refresh_from_db()
+        self.assertEqual(p.like_count,0)
+
+    @override_settings(LIKE_BUFFER_ENABLED=True)
+    def test_like_buffer_write_behind(self):
+        """开启写缓冲时点赞先进入缓冲，读取时合并，落库后写入 Like 与 like_count"""
+        p=Participant.objects.create(name='LB',score=8)
+        Like.objects.create(user=self.user2,participant=p)
+        def post(view, user):
+            body=json.dumps({'user_id':user.id,'participant_id':p.id})
+            return json.loads(view(self.factory.post('/like/', data=body, content_type='application/json')).content)['code']
+        def count(user):
+            return json.loads(get_like_count(self.factory.get('/like/count/', {'user_id':user.id,'participant_id':p.id})).content)['data']
+
+        self.assertEqual(post(like_participant, self.user1), 0)
+        self.assertEqual(post(like_participant, self.user1), 1117)
+        self.assertEqual(post(unlike_participant, self.user2), 0)
+        self.assertEqual(post(unlike_participant, self.user2), 1123)
+        self.assertEqual(post(like_participant, self.user2), 0)
+        self.assertEqual(Like.objects.filter(participant=p).count(), 1)
+        self.assertEqual(count(self.user1), {'is_like': True, 'like_count': 2})
+
+        self.assertEqual(post(unlike_participant, self.user2), 0)
+        self.assertEqual(flush_like_buffer(), 2)
+        self.assertEqual(list(Like.objects.filter(participant=p).values_list('user_id', flat=True)), [self.user1.id])
+        p.refresh_from_db()
+        self.assertEqual(p.like_count, 1)
+        self.assertEqual(count(self.user2), {'is_like': False, 'like_count': 1})
+        self.assertEqual(flush_like_buffer(), 0)
+
+    @override_settings(LIKE_BUFFER_ENABLED=True, SINGLE_PROCESS=False)
+    def test_like_buffer_requires_redis(self):
+        """多进程部署下未配置 Redis 时不能使用进程内缓冲"""
+        with self.assertRaises(ImproperlyConfigured):
+            check_like_buffer_config()
+        with self.assertRaises(ImproperlyConfigured):
+            get_like_store()
 
     # --------- get_like_count ---------
     def test_get_like_count_wrong_method(self):
@@ -441,3 +646,55 @@ class ViewsTestCase(TestCase):
         self.assertEqual(data['code'],0)
         self.assertTrue(data['data']['is_like'])
         self.assertEqual(data['data']['like_count'],1)
+
+
+class CompetitionQueryPlanTests(TestCase):
+    """
+    10 万条赛事下检查赛事列表的执行计划：不做去重，不对赛事表顺序扫描
+    """
+    COMPETITION_COUNT = 100000
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create(username='plan', nickname='plan', password='', email='plan@test.com')
+        cls.tag = Tag.objects.create(name='plan', tag_type=TagType.SPORTS, is_post_tag=False, is_competition_tag=True)
+        with connection.cursor() as cursor:
+            cursor.execute(
+                'INSERT INTO "competitions_competition" '
+                '("name", "sport", "is_finished", "time_begin", "created_at", "updated_at", '
+                '"comment_count", "total_comment_count", "tag_ids", "search_document") '
+                "SELECT 'c' || i, 'sport', i %% 2 = 0, now() + i * interval '1 minute', now(), now(), 0, 0, "
+                "CASE WHEN i %% 500 = 1 THEN ARRAY[%s] ELSE '{}'::integer[] END, 'c' || i || E'\\nsport' "
+                'FROM generate_series(1, %s) AS i',
+                [cls.tag.id, cls.COMPETITION_COUNT],
+            )
+            cursor.execute(
+                'INSERT INTO "competitions_focus" ("user_id", "competition_id") '
+                'SELECT %s, "id" FROM "competitions_competition" ORDER BY "id" LIMIT 50',
+                [cls.user.id],
+            )
+            cursor.execute('ANALYZE "competitions_competition"')
+            cursor.execute('ANALYZE "competitions_focus"')
+
+    def assert_plan(self, **filters):
+        options = {'user_id':self.user.id,'tag_list':[],'search_text':'','before_time':'','before_id':-1,
+                   'is_finished':False,'filter_focus':False}
+        options.update(filters)
+        qs = filter_competition(**options).order_by('time_begin', 'id')[:MAX_COMPETITION_LIST_LENGTH]
+        self.assertNotIn('DISTINCT', str(qs.query))
+        self.assertNotIn('JOIN', str(qs.query))
+        plan = qs.explain()
+        self.assertNotIn('Seq Scan on competitions_competition', plan)
+        return plan
+
+    def test_list_plan(self):
+        self.assertIn('competitions_list_idx', self.assert_plan())
+
+    def test_tag_filter_plan(self):
+        self.assert_plan(tag_list=[self.tag.id])
+
+    def test_focus_filter_plan(self):
+        self.assert_plan(filter_focus=True)
+
+    def test_keyset_plan(self):
+        self.assertIn('competitions_list_idx', self.assert_plan(before_time=timezone.now().isoformat(), before_id=1))
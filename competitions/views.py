@@ -1,44 +1,80 @@
 import json
 import random
 
+from django.conf import settings
 from django.shortcuts import render
-from django.db.models import Max, Q
-from django.http import HttpRequest
+from django.db import transaction
+from django.db.models import Exists, Max, OuterRef, Q
+from django.http import HttpRequest, StreamingHttpResponse
 from django.utils import timezone
 from django.utils.dateparse import parse_datetime
 from users.models import User
 from .models import Competition, Focus, Like, Participant
-from tag.models import Tag
+from tag.registry import get_tag_registry
 from settings.models import UserPermission
+from tsingleap_backend.routers import read_from_replica
 from utils.utils_require import check_require, require, ErrorCode
 from utils.utils_params import get_user, get_post, get_comment, get_report, get_tag
 from utils.utils_request import BAD_METHOD, request_success, request_failed
-from utils.utils_competition import MAX_COMPETITION_LIST_LENGTH, TAG_NUM_LIMIT
+from utils.utils_schema import Field, compile_schema, validate_request
+from utils.utils_competition import MAX_COMPETITION_LIST_LENGTH, PARTICIPANT_BATCH_SIZE, TAG_NUM_LIMIT, refresh_search_documents
+from utils.utils_like_buffer import buffer_like, get_pending_likes, is_like_buffer_enabled
+from utils.utils_response_cache import acache_response, aget_cached_response, cache_response, get_cached_response, instance_tag, invalidate_response_cache
+from utils.utils_score_feed import get_score_feed, publish_competition_event, stream_competition_events
 
 ERROR_COMPETITION_NOT_FOUND = "Competition not found."
 ERROR_PARTICIPANT_NOT_FOUND = "Participant not found."
 
+# 各接口的请求参数声明，导入时编译为校验函数
+CREATE_COMPETITION_SCHEMA = compile_schema({
+    "name": "string",
+    "sport": "string",
+    "is_finished": "bool",
+    "time_begin": "string",
+    "tag_ids": "list",
+})
+COMPETITION_LIST_SCHEMA = compile_schema({
+    "user_id": "int",
+    "tag_list": "list",
+    "search_text": "string",
+    "before_time": "string",
+    "before_id": "int",
+    "is_finished": "bool",
+    "filter_focus": "bool",
+})
+COMPETITION_ID_SCHEMA = compile_schema({"id": "int"})
+ADD_PARTICIPANT_SCHEMA = compile_schema({"competition_id": "int", "participants": "list"})
+DELETE_PARTICIPANT_SCHEMA = compile_schema({"participant_ids": "list"})
+UPDATE_PARTICIPANT_SCHEMA = compile_schema({"participants": "list"})
+PARTICIPANT_LIST_SCHEMA = compile_schema({"user_id": "int", "competition_id": "int"})
+SUBSCRIBE_COMPETITION_SCHEMA = compile_schema({"competition_id": "int", "last_seq": Field("int", default=None)})
+FOCUS_SCHEMA = compile_schema({"competition_id": "int", "user_id": "int"})
+COMPETITION_TAG_LIST_SCHEMA = compile_schema({"competition_id": "int"})
+LIKE_SCHEMA = compile_schema({"user_id": "int", "participant_id": "int"})
+
+# 赛事不存在时 get_competition_info 的响应，不进入响应缓存
+COMPETITION_INFO_NOT_FOUND = {
+    "code": 1101,
+    "msg": ERROR_COMPETITION_NOT_FOUND,
+    "data": {"competition": None},
+}
+
 # 创建赛事
 @check_require
-def create_competition(req: HttpRequest):
-    if req.method != 'POST':
-        return BAD_METHOD
-
-    body = json.loads(req.body.decode("utf-8")) if req.body else {}
-
-    name = require(body, "name", "string")
-    sport = require(body, "sport", "string")
-    is_finished = require(body, "is_finished", "bool")
-    time_begin_str = require(body, "time_begin", "string")
-    tag_ids = require(body, "tag_ids", "list")
+@validate_request("POST", CREATE_COMPETITION_SCHEMA)
+def create_competition(req: HttpRequest, params):
+    name = params["name"]
+    sport = params["sport"]
+    is_finished = params["is_finished"]
+    time_begin_str = params["time_begin"]
+    tag_ids = params["tag_ids"]
 
     dt = parse_datetime(time_begin_str)
     if dt is not None and timezone.is_naive(dt):
         dt = timezone.make_aware(dt, timezone.get_current_timezone())
 
-    tags_qs = Tag.objects.filter(id__in=tag_ids)
     tags = []
-    for tag in tags_qs:
+    for tag in get_tag_registry().get_many(tag_ids):
         if not tag.is_competition_tag:
             return request_success({
                 "code": 1111,
@@ -57,7 +93,7 @@ def create_competition(req: HttpRequest):
         is_finished=is_finished,
         time_begin=dt,
     )
-    competition.tags.set(tags)
+    competition.tags.set([tag.id for tag in tags])
 
     return request_success({
         "code": 0,
@@ -70,56 +106,79 @@ def create_competition(req: HttpRequest):
             "time_begin": competition.time_begin.isoformat() if competition.time_begin else None,
             "created_at": competition.created_at.isoformat() if competition.created_at else None,
             "updated_at": competition.updated_at.isoformat() if competition.updated_at else None,
+            "comment_count": competition.comment_count,
+            "total_comment_count": competition.total_comment_count,
         },
     })
 
 def filter_competition(user_id, tag_list, search_text, before_time, before_id, is_finished, filter_focus):
-    qs = Competition.objects.all()
+    """
+    所有条件都落在赛事表本身，不需要 JOIN 与去重：关注为 EXISTS 子查询，
+    多个标签为 tag_ids 的数组包含（GIN 索引），搜索匹配 search_document 中的名称、项目与选手名
+    """
+    qs = Competition.objects.filter(is_finished=is_finished)
     if filter_focus:
-        focus_list = Focus.objects.filter(user__id=user_id).values("competition__id").distinct()
-        competition_ids = [item["competition__id"] for item in focus_list]
-        qs = qs.filter(id__in=competition_ids, is_finished=is_finished)
-    else:
-        qs = qs.filter(is_finished=is_finished)
+        qs = qs.filter(Exists(Focus.objects.filter(user_id=user_id, competition_id=OuterRef("pk"))))
 
-    for tag_id in tag_list:
-        qs = qs.filter(tags__id=tag_id)
+    if tag_list:
+        qs = qs.filter(tag_ids__contains=sorted({int(tag_id) for tag_id in tag_list}))
 
     if search_text:
-        qs = qs.filter(Q(name__icontains=search_text) | Q(sport__icontains=search_text) | Q(participants__name__icontains=search_text))
-    qs = qs.distinct()
+        qs = qs.filter(search_document__icontains=search_text)
 
     if before_time != "" and before_id != -1:
         dt = parse_datetime(before_time)
         if dt is not None and timezone.is_naive(dt):
             dt = timezone.make_aware(dt, timezone.get_current_timezone())
+        # time_begin 上的单侧条件给出 competitions_list_idx 索引扫描的边界
         if is_finished:
-            qs = qs.filter(Q(time_begin__lt=dt) | (Q(time_begin=dt) & Q(id__lt=before_id)))
+            qs = qs.filter(Q(time_begin__lt=dt) | (Q(time_begin=dt) & Q(id__lt=before_id)), time_begin__lte=dt)
         else:
-            qs = qs.filter(Q(time_begin__gt=dt) | (Q(time_begin=dt) & Q(id__gt=before_id)))
+            qs = qs.filter(Q(time_begin__gt=dt) | (Q(time_begin=dt) & Q(id__gt=before_id)), time_begin__gte=dt)
 
     return qs
 
-#动态拉取赛事
+#动态拉取赛事（POST 传参的只读查询，读从库）
+@read_from_replica
 @check_require
-def get_competition_list(req: HttpRequest):
-    if req.method != 'POST':
-        return BAD_METHOD
-    
-    body = json.loads(req.body.decode("utf-8")) if req.body else {}
-    
-    user_id = require(body, "user_id", "int")
-    tag_list = require(body, "tag_list", "list")
-    search_text = require(body, "search_text", "string")
-    before_time = require(body, "before_time", "string")
-    before_id = require(body, "before_id", "int")
-    is_finished = require(body, "is_finished", "bool")
-    filter_focus = require(body, "filter_focus", "bool")
+@validate_request("POST", COMPETITION_LIST_SCHEMA)
+def get_competition_list(req: HttpRequest, params):
+    user_id, competitions = get_competition_list_query(params)
+    competitions = list(competitions)
+    focus_ids = set(
+        Focus.objects.filter(user_id=user_id, competition_id__in=[comp.id for comp in competitions])
+        .values_list('competition_id', flat=True)
+    )
+    return competition_list_response(competitions, focus_ids)
 
-    qs = filter_competition(user_id, tag_list, search_text, before_time, before_id, is_finished, filter_focus)
+# get_competition_list 的异步版本，ASGI 下通过异步 ORM 查询
+@read_from_replica
+@check_require
+@validate_request("POST", COMPETITION_LIST_SCHEMA)
+async def aget_competition_list(req: HttpRequest, params):
+    user_id, competitions = get_competition_list_query(params)
+    competitions = [comp async for comp in competitions]
+    focus_ids = {
+        competition_id async for competition_id in
+        Focus.objects.filter(user_id=user_id, competition_id__in=[comp.id for comp in competitions])
+        .values_list('competition_id', flat=True)
+    }
+    return competition_list_response(competitions, focus_ids)
+
+def get_competition_list_query(params):
+    """
+    由校验后的请求参数返回 (用户 id, 排序并截断后的赛事查询集)
+    """
+    user_id = params["user_id"]
+    is_finished = params["is_finished"]
+    qs = filter_competition(
+        user_id, params["tag_list"], params["search_text"], params["before_time"],
+        params["before_id"], is_finished, params["filter_focus"],
+    )
     competitions = qs.order_by('-time_begin', '-id')[:MAX_COMPETITION_LIST_LENGTH] if is_finished else qs.order_by('time_begin', 'id')[:MAX_COMPETITION_LIST_LENGTH]
+    return user_id, competitions
 
-    focus_ids = set(Focus.objects.filter(user_id=user_id).values_list('competition_id', flat=True))
+def competition_list_response(competitions, focus_ids):
     competition_list = [
         {
             "id": comp.id,
@@ -130,6 +189,8 @@ def get_competition_list(req: HttpRequest):
             "time_begin": comp.time_begin.isoformat() if comp.time_begin else None,
             "created_at": comp.created_at.isoformat() if comp.created_at else None,
             "updated_at": comp.updated_at.isoformat() if comp.updated_at else None,
+            "comment_count": comp.comment_count,
+            "total_comment_count": comp.total_comment_count,
         } for comp in competitions
     ]
 
@@ -154,21 +215,33 @@ def get_competition_list(req: HttpRequest):
 
 # 获取赛事详情
 @check_require
-def get_competition_info(req: HttpRequest):
-    if req.method != 'GET':
-        return BAD_METHOD
-
-    body = req.GET
-    competition_id = require(body, "id", "int")
+@validate_request("GET", COMPETITION_ID_SCHEMA)
+def get_competition_info(req: HttpRequest, params):
+    competition_id = params["id"]
+    cache_params = {"id": competition_id}
+    response, seq = get_cached_response("get_competition_info", cache_params)
+    if response is not None:
+        return response
     competition = Competition.objects.filter(id=competition_id).first()
+    if not competition:
+        return request_success(COMPETITION_INFO_NOT_FOUND)
+    return cache_response("get_competition_info", cache_params, competition_info_response(competition), [instance_tag(Competition, competition.id)], seq)
 
+# get_competition_info 的异步版本
+@check_require
+@validate_request("GET", COMPETITION_ID_SCHEMA)
+async def aget_competition_info(req: HttpRequest, params):
+    competition_id = params["id"]
+    cache_params = {"id": competition_id}
+    response, seq = await aget_cached_response("get_competition_info", cache_params)
+    if response is not None:
+        return response
+    competition = await Competition.objects.filter(id=competition_id).afirst()
     if not competition:
-        return request_success({
-            "code": 1101,
-            "msg": ERROR_COMPETITION_NOT_FOUND,
-            "data": {"competition": None},
-        })
+        return request_success(COMPETITION_INFO_NOT_FOUND)
+    return await acache_response("get_competition_info", cache_params, competition_info_response(competition), [instance_tag(Competition, competition.id)], seq)
 
+def competition_info_response(competition):
     return request_success({
         "code": 0,
         "msg": "Competition info retrieved successfully.",
@@ -181,6 +254,8 @@ def get_competition_info(req: HttpRequest):
                 "time_begin": competition.time_begin.isoformat() if competition.time_begin else None,
                 "created_at": competition.created_at.isoformat() if competition.created_at else None,
                 "updated_at": competition.updated_at.isoformat() if competition.updated_at else None,
+                "comment_count": competition.comment_count,
+                "total_comment_count": competition.total_comment_count,
             }
         },
     })
@@ -212,9 +287,8 @@ def update_competition(req: HttpRequest):
     if dt is not None and timezone.is_naive(dt):
         dt = timezone.make_aware(dt, timezone.get_current_timezone())
 
-    tags_qs = Tag.objects.filter(id__in=tag_ids)
     tags = []
-    for tag in tags_qs:
+    for tag in get_tag_registry().get_many(tag_ids):
         if not tag.is_competition_tag:
             return request_success({
                 "code": 1113,
@@ -227,12 +301,25 @@ def update_competition(req: HttpRequest):
             "msg": f"Competition can only have {TAG_NUM_LIMIT} tags.",
         })
 
+    # 记录变化的字段，推送给实时订阅者
+    # USE_TZ=False 时数据库读出的是本地时区的 naive 时间，需转换成同样的形式再比较
+    stored_dt = timezone.make_naive(dt) if dt is not None and not settings.USE_TZ else dt
+    changes = {
+        field: value for field, value in
+        (("name", name), ("sport", sport), ("is_finished", is_finished), ("time_begin", stored_dt))
+        if getattr(competition, field) != value
+    }
     competition.name = name
     competition.sport = sport
     competition.is_finished = is_finished
     competition.time_begin = dt
-    competition.tags.set(tags) 
-    competition.save()
+    competition.tags.set([tag.id for tag in tags]) 
+    # 不写回评论计数器，避免覆盖并发评论对计数器的更新
+    competition.save(update_fields=["name", "sport", "is_finished", "time_begin", "updated_at"])
+    if changes:
+        if "time_begin" in changes:
+            changes["time_begin"] = dt.isoformat() if dt else None
+        publish_competition_event(competition.id, "competition_updated", {"competition": {"id": competition.id, **changes}})
 
     return request_success({
         "code": 0,
@@ -246,18 +333,17 @@ def update_competition(req: HttpRequest):
                 "time_begin": competition.time_begin.isoformat() if competition.time_begin else None,
                 "created_at": competition.created_at.isoformat() if competition.created_at else None,
                 "updated_at": competition.updated_at.isoformat() if competition.updated_at else None,
+                "comment_count": competition.comment_count,
+                "total_comment_count": competition.total_comment_count,
             }
         },
     })
 
 # 删除赛事
 @check_require
-def delete_competition(req: HttpRequest):
-    if req.method != 'POST':
-        return BAD_METHOD
-
-    body = json.loads(req.body.decode("utf-8")) if req.body else {}
-    competition_id = require(body, "id", "int")
+@validate_request("POST", COMPETITION_ID_SCHEMA)
+def delete_competition(req: HttpRequest, params):
+    competition_id = params["id"]
     competition = Competition.objects.filter(id=competition_id).first()
 
     if not competition:
@@ -276,13 +362,10 @@ def delete_competition(req: HttpRequest):
     })
 
 # 增加参赛者
-def add_participant(req: HttpRequest):
-    if req.method != 'POST':
-        return BAD_METHOD
-    
-    body = json.loads(req.body.decode("utf-8")) if req.body else {}
-    competition_id = require(body, "competition_id", "int")
-    participants = require(body, "participants", "list")
+@validate_request("POST", ADD_PARTICIPANT_SCHEMA)
+def add_participant(req: HttpRequest, params):
+    competition_id = params["competition_id"]
+    participants = params["participants"]
 
     competition = Competition.objects.filter(id=competition_id).first()
     if not competition:
@@ -297,26 +380,52 @@ def add_participant(req: HttpRequest):
                 "code": 1119,
                 "msg": "Participant data is missing name or score.",
             })
-    for item in participants:
-        participant_name = item["name"]
-        participant_score = item["score"]
-        participant = Participant.objects.create(name=participant_name, score=participant_score)
-        competition.participants.add(participant)
+    # 选手与赛事关联各一次批量插入，整体在同一事务中完成
+    through = Competition.participants.through
+    with transaction.atomic():
+        created = Participant.objects.bulk_create(
+            [Participant(name=item["name"], score=item["score"]) for item in participants],
+            batch_size=PARTICIPANT_BATCH_SIZE,
+        )
+        through.objects.bulk_create(
+            [through(competition_id=competition.id, participant_id=participant.id) for participant in created],
+            batch_size=PARTICIPANT_BATCH_SIZE,
+        )
+        # 批量插入中间表不触发 m2m_changed，手动重算检索文本并使选手列表缓存失效
+        refresh_search_documents([competition.id])
+        invalidate_response_cache(instance_tag(Competition, competition.id))
+
+    publish_competition_event(competition.id, "participants_added", {
+        "participants": [
+            {"id": participant.id, "name": participant.name, "score": participant.score, "like_count": 0}
+            for participant in created
+        ],
+    })
 
     return request_success({
         "code": 0,
-        "msg": f"Participant {participant_name} added to competition {competition_id}."
+        "msg": f"{len(created)} participants added to competition {competition_id}.",
+        "data": {"participant_ids": [participant.id for participant in created]},
     })
 
 # 删除参赛者
-def delete_participant(req: HttpRequest):
-    if req.method != 'POST':
-        return BAD_METHOD
-    
-    body = json.loads(req.body.decode("utf-8")) if req.body else {}
-    participant_ids = require(body, "participant_ids", "list")
-
-    Participant.objects.filter(id__in=participant_ids).delete() 
+@validate_request("POST", DELETE_PARTICIPANT_SCHEMA)
+def delete_participant(req: HttpRequest, params):
+    participant_ids = params["participant_ids"]
+
+    through = Competition.participants.through
+    with transaction.atomic():
+        # 删除前取出选手所属的赛事，向这些赛事的订阅者推送
+        removed = {}
+        for competition_id, participant_id in (
+            through.objects.filter(participant_id__in=participant_ids).values_list("competition_id", "participant_id")
+        ):
+            removed.setdefault(competition_id, []).append(participant_id)
+        Participant.objects.filter(id__in=participant_ids).delete() 
+        refresh_search_documents(list(removed))
+        invalidate_response_cache(*[instance_tag(Competition, competition_id) for competition_id in removed])
+        for competition_id, removed_ids in removed.items():
+            publish_competition_event(competition_id, "participants_removed", {"participant_ids": removed_ids})
 
     return request_success({
         "code": 0,
@@ -324,12 +433,9 @@ def delete_participant(req: HttpRequest):
     })
 
 # 修改参赛者信息
-def update_participant(req: HttpRequest):
-    if req.method != 'POST':
-        return BAD_METHOD
-    
-    body = json.loads(req.body.decode("utf-8")) if req.body else {}
-    participants = require(body, "participants", "list")
+@validate_request("POST", UPDATE_PARTICIPANT_SCHEMA)
+def update_participant(req: HttpRequest, params):
+    participants = params["participants"]
     
     for item in participants:
         if "id" not in item or "name" not in item or "score" not in item:
@@ -339,13 +445,46 @@ def update_participant(req: HttpRequest):
             })
         
     participant_ids = [item["id"] for item in participants]
-    db_participants = Participant.objects.in_bulk(participant_ids)
-
-    for item in participants:
-        participant = db_participants[item["id"]]
-        participant.name = item["name"]
-        participant.score = item["score"]
-        participant.save()
+    with transaction.atomic():
+        db_participants = Participant.objects.select_for_update().in_bulk(participant_ids)
+        if len(db_participants) != len(set(participant_ids)):
+            return request_success({
+                "code": 1126,
+                "msg": ERROR_PARTICIPANT_NOT_FOUND,
+            })
+        changed = {}
+        renamed = set()
+        for item in participants:
+            participant = db_participants[item["id"]]
+            if (participant.name, participant.score) != (item["name"], item["score"]):
+                changed[participant.id] = participant
+            if participant.name != item["name"]:
+                renamed.add(participant.id)
+            participant.name = item["name"]
+            participant.score = item["score"]
+        # 只写 name 与 score，不覆盖由信号维护的 like_count
+        Participant.objects.bulk_update(db_participants.values(), fields=["name", "score"], batch_size=PARTICIPANT_BATCH_SIZE)
+
+        # 按赛事推送有变化的选手
+        updated = {}
+        renamed_competition_ids = set()
+        through = Competition.participants.through
+        if changed:
+            for competition_id, participant_id in (
+                through.objects.filter(participant_id__in=changed).values_list("competition_id", "participant_id")
+            ):
+                participant = changed[participant_id]
+                updated.setdefault(competition_id, []).append(
+                    {"id": participant.id, "name": participant.name, "score": participant.score}
+                )
+                if participant_id in renamed:
+                    renamed_competition_ids.add(competition_id)
+        # bulk_update 不触发 post_save，选手改名后手动重算所属赛事的检索文本
+        if renamed_competition_ids:
+            refresh_search_documents(renamed_competition_ids)
+        invalidate_response_cache(*[instance_tag(Competition, competition_id) for competition_id in updated])
+        for competition_id, updated_participants in updated.items():
+            publish_competition_event(competition_id, "participants_updated", {"participants": updated_participants})
 
     return request_success({
         "code": 0,
@@ -353,13 +492,14 @@ def update_participant(req: HttpRequest):
     })
 
 # 获得参赛者列表
-def get_participant_list(req: HttpRequest):
-    if req.method != 'GET':
-        return BAD_METHOD
-    
-    body = req.GET
-    user_id = require(body, "user_id", "int")
-    competition_id = require(body, "competition_id", "int")
+@validate_request("GET", PARTICIPANT_LIST_SCHEMA)
+def get_participant_list(req: HttpRequest, params):
+    user_id = params["user_id"]
+    competition_id = params["competition_id"]
+    cache_params = {"user_id": user_id, "competition_id": competition_id}
+    response, seq = get_cached_response("get_participant_list", cache_params)
+    if response is not None:
+        return response
     
     competition = Competition.objects.filter(id=competition_id).first()
     if not competition:
@@ -369,32 +509,67 @@ def get_participant_list(req: HttpRequest):
             "data": {"participant_list": []},
         })
 
-    like_ids = set(Like.objects.filter(user_id=user_id).values_list('participant_id', flat=True))
-    participant_list = competition.participants.all()
+    # 赛事、选手列表、当前用户的点赞各一次查询，与选手数量无关
+    participant_list = list(competition.participants.all())
+    like_ids = set(
+        Like.objects.filter(user_id=user_id, participant_id__in=[participant.id for participant in participant_list])
+        .values_list('participant_id', flat=True)
+    )
+    # 合并缓冲中尚未落库的点赞
+    pending_states, pending_deltas = get_pending_likes(user_id, [participant.id for participant in participant_list])
     participant_list = [
         {
             "id": participant.id,
             "name": participant.name,
             "score": participant.score,
-            "like": participant.id in like_ids,
-            "like_count": Like.objects.filter(participant_id=participant.id).count(),
+            "like": pending_states.get(participant.id, participant.id in like_ids),
+            "like_count": participant.like_count + pending_deltas.get(participant.id, 0),
         } for participant in participant_list
     ]
 
-    return request_success({
+    # 选手增删、改分与点赞分别使赛事与对应选手的标签失效
+    tags = [instance_tag(Competition, competition.id)] + [
+        instance_tag(Participant, participant["id"]) for participant in participant_list
+    ]
+    return cache_response("get_participant_list", cache_params, request_success({
         "code": 0,
         "msg": "Participant list retrieved successfully.",
         "data": {"participant_list": participant_list},
-    })
+    }), tags, seq)
 
-# 获取赛事管理员
+# 订阅赛事的实时推送（Server-Sent Events），只在 ASGI 入口提供（见 tsingleap_backend/urls_asgi.py）
 @check_require
-def get_competition_admin_list(req: HttpRequest):
-    if req.method != 'GET':
-        return BAD_METHOD
+@validate_request("GET", SUBSCRIBE_COMPETITION_SCHEMA)
+async def subscribe_competition(req: HttpRequest, params):
+    competition_id = params["competition_id"]
+    # 浏览器自动重连时通过 Last-Event-ID 请求头带上最后收到的序号
+    last_seq = params["last_seq"]
+    if last_seq is None and "HTTP_LAST_EVENT_ID" in req.META:
+        last_seq = require(req.META, "HTTP_LAST_EVENT_ID", "int")
+
+    feed = get_score_feed()
+    if feed is None:
+        return request_failed(ErrorCode.REDIS_REQUIRED["code"], "Live updates require Redis", 503)
+    if not await Competition.objects.filter(id=competition_id).aexists():
+        return request_success({
+            "code": 1127,
+            "msg": ERROR_COMPETITION_NOT_FOUND,
+        })
 
-    body = req.GET
-    competition_id = require(body, "id", "int")
+    response = StreamingHttpResponse(
+        stream_competition_events(feed, competition_id, last_seq),
+        content_type="text/event-stream",
+    )
+    response["Cache-Control"] = "no-cache"
+    # 关闭 nginx 等反向代理的响应缓冲
+    response["X-Accel-Buffering"] = "no"
+    return response
+
+# 获取赛事管理员
+@check_require
+@validate_request("GET", COMPETITION_ID_SCHEMA)
+def get_competition_admin_list(req: HttpRequest, params):
+    competition_id = params["id"]
     competition = Competition.objects.filter(id=competition_id).first()
 
     if not competition:
@@ -423,13 +598,10 @@ def get_competition_admin_list(req: HttpRequest):
 
 #添加关注
 @check_require
-def add_competition_focus(req: HttpRequest):
-    if req.method != 'POST':
-        return BAD_METHOD
-
-    body = json.loads(req.body.decode("utf-8")) if req.body else {}
-    competition_id = require(body, "competition_id", "int")
-    user_id = require(body, "user_id", "int")
+@validate_request("POST", FOCUS_SCHEMA)
+def add_competition_focus(req: HttpRequest, params):
+    competition_id = params["competition_id"]
+    user_id = params["user_id"]
 
     competition = Competition.objects.filter(id=competition_id).first()
     if not competition:
@@ -454,13 +626,10 @@ def add_competition_focus(req: HttpRequest):
 
 #取消关注
 @check_require
-def del_competition_focus(req: HttpRequest):
-    if req.method != 'POST':
-        return BAD_METHOD
-
-    body = json.loads(req.body.decode("utf-8")) if req.body else {}
-    competition_id = require(body, "competition_id", "int")
-    user_id = require(body, "user_id", "int")
+@validate_request("POST", FOCUS_SCHEMA)
+def del_competition_focus(req: HttpRequest, params):
+    competition_id = params["competition_id"]
+    user_id = params["user_id"]
 
     competition = Competition.objects.filter(id=competition_id).first()
     if not competition:
@@ -487,12 +656,9 @@ def del_competition_focus(req: HttpRequest):
 
 #通过赛事id获取标签列表
 @check_require
-def get_tag_list_by_competition(req: HttpRequest):
-    if req.method != 'GET':
-        return BAD_METHOD
-
-    body = req.GET
-    competition_id = require(body, "competition_id", "int")
+@validate_request("GET", COMPETITION_TAG_LIST_SCHEMA)
+def get_tag_list_by_competition(req: HttpRequest, params):
+    competition_id = params["competition_id"]
     competition = Competition.objects.filter(id=competition_id).first()
 
     if not competition:
@@ -502,7 +668,8 @@ def get_tag_list_by_competition(req: HttpRequest):
             "data": {"tag_list": []},
         })
 
-    tag_list = competition.tags.all()
+    tag_ids = competition.tags.through.objects.filter(competition_id=competition.id).values_list("tag_id", flat=True)
+    tag_list = get_tag_registry().get_many(tag_ids)
     tag_list = [
         {
             "id": tag.id,
@@ -527,13 +694,10 @@ def get_tag_list_by_competition(req: HttpRequest):
     })
 
 # 点赞选手
-def like_participant(req: HttpRequest):
-    if req.method != "POST":
-        return BAD_METHOD
-    
-    body = json.loads(req.body.decode("utf-8")) if req.body else {}
-    user_id = require(body, "user_id", "int")
-    participant_id = require(body, "participant_id", "int")
+@validate_request("POST", LIKE_SCHEMA)
+def like_participant(req: HttpRequest, params):
+    user_id = params["user_id"]
+    participant_id = params["participant_id"]
     
     participant= Participant.objects.filter(id=participant_id).first()
     if not participant:
@@ -547,28 +711,30 @@ def like_participant(req: HttpRequest):
             "code": 1116,
             "msg": "User not found.",
         })
-    like_obj = Like.objects.filter(user_id=user_id, participant_id=participant_id).first()
-    if like_obj:
+    if is_like_buffer_enabled():
+        # 只写入缓冲，由 flush_like_buffer 批量落库
+        recorded = buffer_like(user_id, participant_id, True)
+    else:
+        recorded = not Like.objects.filter(user_id=user_id, participant_id=participant_id).exists()
+        if recorded:
+            # 点赞记录与 like_count 的更新在同一事务中提交
+            with transaction.atomic():
+                Like.objects.create(user=user, participant=participant)
+    if not recorded:
         return request_success({
             "code": 1117,
             "msg": "User has already liked this competition.",
         })
-    
-    
-    Like.objects.create(user=user, participant=participant)
     return request_success({
         "code": 0,
         "msg": "Participant liked successfully.",
     })
 
 # 取消点赞选手
-def unlike_participant(req: HttpRequest):
-    if req.method != "POST":
-        return BAD_METHOD
-    
-    body = json.loads(req.body.decode("utf-8")) if req.body else {}
-    user_id = require(body, "user_id", "int")
-    participant_id = require(body, "participant_id", "int")
+@validate_request("POST", LIKE_SCHEMA)
+def unlike_participant(req: HttpRequest, params):
+    user_id = params["user_id"]
+    participant_id = params["participant_id"]
     
     participant= Participant.objects.filter(id=participant_id).first()
     if not participant:
@@ -583,27 +749,29 @@ def unlike_participant(req: HttpRequest):
             "msg": "User not found.",
         })
     
-    like_obj = Like.objects.filter(user_id=user_id, participant_id=participant_id).first()
-    if not like_obj:
+    if is_like_buffer_enabled():
+        recorded = buffer_like(user_id, participant_id, False)
+    else:
+        like_obj = Like.objects.filter(user_id=user_id, participant_id=participant_id).first()
+        recorded = like_obj is not None
+        if recorded:
+            with transaction.atomic():
+                like_obj.delete()
+    if not recorded:
         return request_success({
             "code": 1123,
             "msg": "User has not liked this competition.",
         })
-    
-    like_obj.delete()
     return request_success({
         "code": 0,
         "msg": "Participant unliked successfully.",
     })
 
 # 获得点赞个数
-def get_like_count(req: HttpRequest):
-    if req.method != "GET":
-        return BAD_METHOD
-    
-    body = req.GET
-    user_id = require(body, "user_id", "int")
-    participant_id = require(body, "participant_id", "int")
+@validate_request("GET", LIKE_SCHEMA)
+def get_like_count(req: HttpRequest, params):
+    user_id = params["user_id"]
+    participant_id = params["participant_id"]
     
     participant= Participant.objects.filter(id=participant_id).first()
     if not participant:
@@ -612,13 +780,17 @@ def get_like_count(req: HttpRequest):
             "msg": ERROR_PARTICIPANT_NOT_FOUND
         })
     
-    like_count = Like.objects.filter(participant_id=participant_id).count()
-    
+    # 合并缓冲中尚未落库的点赞
+    pending_states, pending_deltas = get_pending_likes(user_id, [participant_id])
+    is_like = pending_states.get(participant_id)
+    if is_like is None:
+        is_like = Like.objects.filter(user_id=user_id, participant_id=participant_id).exists()
+
     return request_success({
         "code": 0,
         "msg": "Like count retrieved successfully.",
         "data": {
-            "is_like": Like.objects.filter(user_id=user_id, participant_id=participant_id).exists(),
-            "like_count": like_count
+            "is_like": is_like,
+            "like_count": participant.like_count + pending_deltas.get(participant_id, 0)
         }
     })
\ No newline at end of file
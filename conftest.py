@@ -0,0 +1,17 @@
+import pytest
+from django.core.cache import cache
+
+@pytest.fixture(autouse=True)
+def clear_cache():
+    """
+    每个测试前清空缓存：测试结束时数据库回滚不会触发失效信号，残留的响应缓存会影响后续测试
+    """
+    cache.clear()
+    yield
+
+@pytest.fixture(autouse=True)
+def single_process(settings):
+    """
+    测试在单个进程中运行，进程内缓存与各类进程内存储即可视为共享
+    """
+    settings.SINGLE_PROCESS = True
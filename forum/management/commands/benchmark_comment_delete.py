@@ -0,0 +1,58 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
+from forum.models import Comment, Post
+from users.models import User
+
+def build_comment_tree(target, author, size, fanout):
+    """
+    在 target 下按层批量插入 size 条评论，每条评论至多 fanout 条回复，返回顶层评论
+    """
+    root = Comment(content="root", author=author, content_object=target)
+    root.set_tree_position(None)
+    root.save()
+    created = 1
+    level = [root]
+    while created < size:
+        next_level = []
+        for parent in level:
+            for _ in range(fanout):
+                if created + len(next_level) >= size:
+                    break
+                reply = Comment(content=f"reply {created + len(next_level)}", author=author, content_object=parent)
+                reply.set_tree_position(parent)
+                next_level.append(reply)
+        level = Comment.objects.bulk_create(next_level, batch_size=1000)
+        created += len(level)
+    return root
+
+class Command(BaseCommand):
+    help = '构造一棵评论树并测量级联删除的耗时与查询次数（结束后回滚）'
+
+    def add_arguments(self, parser):
+        parser.add_argument("--size", type=int, default=10000, help="评论树中的评论总数")
+        parser.add_argument("--fanout", type=int, default=4, help="每条评论的回复数")
+
+    def handle(self, *args, **options):
+        size = options["size"]
+        with transaction.atomic():
+            author = User.objects.create(
+                username="benchmark_comment_delete",
+                nickname="benchmark",
+                password="dummy_password_hash",
+                email="benchmark_comment_delete@mails.tsinghua.edu.cn"
+            )
+            post = Post.objects.create(title="benchmark", content="benchmark", author=author)
+            build_comment_tree(post, author, size, options["fanout"])
+            self.stdout.write(f'已生成 {size} 条评论')
+
+            with CaptureQueriesContext(connection) as queries:
+                start = time.perf_counter()
+                post.delete()
+                elapsed = time.perf_counter() - start
+            remaining = Comment.objects.filter(author=author).count()
+            transaction.set_rollback(True)
+
+        self.stdout.write(f'删除耗时 {elapsed * 1000:.1f} ms，共 {len(queries)} 次查询，剩余评论 {remaining} 条')
@@ -0,0 +1,92 @@
+import datetime
+import json
+import statistics
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.http import JsonResponse
+from django.test.utils import override_settings
+from django.utils import timezone
+
+from utils.utils_json import orjson
+from utils.utils_request import request_success
+
+def build_pages(size):
+    """
+    构造与 get_post_list（页码模式）、get_report_list、get_competition_list 形状相同的响应数据，各 size 条
+    """
+    now = timezone.now()
+    content = "正文内容 Lorem ipsum dolor sit amet. " * 20
+    posts = [{
+        "post_id": index,
+        "title": f"帖子标题 {index}",
+        "content": content,
+        "created_at": now - datetime.timedelta(seconds=index, microseconds=index),
+        "author": f"user_{index % 97}",
+        "comment_count": index % 13,
+        "total_comment_count": index % 29,
+    } for index in range(size)]
+    reports = [{
+        "report_id": index,
+        "reporter": f"user_{index % 97}",
+        "content_type": "Comment",
+        "object_id": index,
+        "reason": "举报理由",
+        "created_at": now - datetime.timedelta(minutes=index),
+        "solved": index % 2 == 0,
+        "preview": {"author": f"user_{index % 89}", "content": content[:200]},
+        "object_deleted": False,
+        "user_banned": index % 5 == 0,
+    } for index in range(size)]
+    competitions = [{
+        "id": index,
+        "name": f"赛事 {index}",
+        "sport": "足球",
+        "is_finished": False,
+        "is_focus": index % 3 == 0,
+        "time_begin": (now + datetime.timedelta(hours=index)).isoformat(),
+        "created_at": now.isoformat(),
+        "updated_at": now.isoformat(),
+        "comment_count": index % 7,
+        "total_comment_count": index % 11,
+    } for index in range(size)]
+    return {
+        "get_post_list": {"code": 0, "data": {"posts": posts, "total_pages": 1, "total_posts": size}},
+        "get_report_list": {"code": 0, "data": {"reports": reports, "total_pages": 1, "total_reports": size}},
+        "get_competition_list": {"code": 0, "msg": "Competition list retrieved successfully.", "data": {"competition_list": competitions}},
+    }
+
+def measure(build_response, repeat):
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        build_response()
+        samples.append((time.perf_counter() - start) * 1000)
+    return statistics.median(samples), min(samples)
+
+class Command(BaseCommand):
+    help = '比较 JsonResponse + DjangoJSONEncoder 与 request_success 各 JSON 编码器生成大页面响应的耗时'
+
+    def add_arguments(self, parser):
+        parser.add_argument("--size", type=int, default=1000, help="每页的条目数")
+        parser.add_argument("--repeat", type=int, default=50, help="每种方式重复的次数")
+
+    def handle(self, *args, **options):
+        encoders = ["stdlib"] + (["orjson"] if orjson is not None else [])
+        if orjson is None:
+            self.stdout.write("未安装 orjson，只比较标准库编码")
+        for view, data in build_pages(options["size"]).items():
+            self.stdout.write(f'{view}（{options["size"]} 条）')
+            expected = JsonResponse(data).content
+            self.report("JsonResponse", len(expected), measure(lambda: JsonResponse(data), options["repeat"]))
+            for encoder in encoders:
+                with override_settings(JSON_ENCODER=encoder):
+                    content = request_success(data).content
+                    # 解码后的值必须与原来的 JsonResponse 完全相同
+                    if json.loads(content) != json.loads(expected):
+                        raise CommandError(f"{encoder} 编码 {view} 的结果与 JsonResponse 不一致")
+                    self.report(encoder, len(content), measure(lambda: request_success(data), options["repeat"]))
+
+    def report(self, name, size, timing):
+        median, best = timing
+        self.stdout.write(f'  {name:<14} 中位数 {median:8.2f} ms  最快 {best:8.2f} ms  响应 {size / 1024:8.1f} KiB')
@@ -1,12 +1,94 @@
-from django.core.management.base import BaseCommand
-from forum.models import *
-from users.models import User
-from competitions.models import Competition, Participant
-from tag.models import Tag, TagType
+import csv
+import io
 import random
-from faker import Faker
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+
+from django.contrib.contenttypes.models import ContentType
+from django.core.management.base import BaseCommand
+from django.core.management.color import no_style
+from django.db import connection, transaction
+from django.db.backends.postgresql.psycopg_any import is_psycopg3
 from django.utils import timezone
-from datetime import timedelta
+from faker import Faker
+
+from competitions.models import Competition, Focus, Like, Participant
+from forum.management.commands.reconcile_comment_counts import reconcile_object_counts, reconcile_reply_counts
+from forum.models import Comment, Post, Report
+from settings.models import UserPermission
+from tag.models import Tag, TagType
+from tag.registry import invalidate_tag_registry
+from users.models import User
+from utils.utils_competition import SEARCH_DOCUMENT_SEPARATOR
+from utils.utils_permission import PERMISSION_MATCH_UPDATE_MATCH_INFO, PERMISSION_USER_IS_ADMIN
+
+# COPY (FORMAT csv) 中表示 NULL 的字符串；未加引号的空字段按空串处理
+COPY_NULL = "\\N"
+
+def copy_value(value):
+    if value is None:
+        return COPY_NULL
+    if isinstance(value, bool):
+        return "t" if value else "f"
+    if isinstance(value, (list, tuple)):
+        return "{" + ",".join(str(item) for item in value) + "}"
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return value
+
+class RowWriter:
+    """
+    按批把模型实例写入数据库：默认用 bulk_create，use_copy 时用 PostgreSQL 的 COPY。
+    fields 为写入的字段名，未列出的主键由数据库分配
+    """
+    def __init__(self, model, fields, batch_size, use_copy):
+        self.model = model
+        self.fields = [model._meta.get_field(name) for name in fields]
+        self.batch_size = batch_size
+        self.use_copy = use_copy
+        self.batch = []
+        self.count = 0
+
+    def add(self, obj):
+        self.batch.append(obj)
+        if len(self.batch) >= self.batch_size:
+            self.flush()
+
+    def flush(self):
+        if not self.batch:
+            return
+        if self.use_copy:
+            buffer = io.StringIO()
+            writer = csv.writer(buffer)
+            for obj in self.batch:
+                writer.writerow([copy_value(getattr(obj, field.attname)) for field in self.fields])
+            buffer.seek(0)
+            columns = ", ".join(f'"{field.column}"' for field in self.fields)
+            sql = f'COPY "{self.model._meta.db_table}" ({columns}) FROM STDIN WITH (FORMAT csv, NULL \'{COPY_NULL}\')'
+            with connection.cursor() as cursor:
+                if is_psycopg3:
+                    with cursor.copy(sql) as copy:
+                        copy.write(buffer.getvalue())
+                else:
+                    cursor.copy_expert(sql, buffer)
+        else:
+            self.model.objects.bulk_create(self.batch)
+        self.count += len(self.batch)
+        self.batch = []
+
+@contextmanager
+def keep_created_at(*models):
+    """
+    临时关闭 created_at 的 auto_now_add，使 bulk_create 写入生成的时间而不是当前时间
+    """
+    fields = [model._meta.get_field("created_at") for model in models]
+    for field in fields:
+        field.auto_now_add = False
+    try:
+        yield
+    finally:
+        for field in fields:
+            field.auto_now_add = True
 
 class Command(BaseCommand):
     help = '生成测试数据'
@@ -16,104 +98,289 @@ class Command(BaseCommand):
     COMPETITION_NUM = 10000
     PARTICIPANT_NUM = 5000
     TAG_NUM = 200
+    COMMENT_NUM = 20000
+    LIKE_NUM = 20000
+    FOCUS_NUM = 20000
+    REPORT_NUM = 1000
+    MAX_REPLY_DEPTH = 10
+    BATCH_SIZE = 5000
+
+    def add_arguments(self, parser):
+        parser.add_argument("--users", type=int, default=self.USER_NUM, help="用户数")
+        parser.add_argument("--posts", type=int, default=self.POST_NUM, help="帖子数")
+        parser.add_argument("--competitions", type=int, default=self.COMPETITION_NUM, help="比赛数")
+        parser.add_argument("--participants", type=int, default=self.PARTICIPANT_NUM, help="参与者数")
+        parser.add_argument("--tags", type=int, default=self.TAG_NUM, help="标签数")
+        parser.add_argument("--comments", type=int, default=self.COMMENT_NUM, help="评论数（含回复）")
+        parser.add_argument("--max-reply-depth", type=int, default=self.MAX_REPLY_DEPTH, help="回复的最大层数")
+        parser.add_argument("--likes", type=int, default=self.LIKE_NUM, help="点赞数（约数）")
+        parser.add_argument("--focuses", type=int, default=self.FOCUS_NUM, help="关注数（约数）")
+        parser.add_argument("--reports", type=int, default=self.REPORT_NUM, help="举报数")
+        parser.add_argument("--batch-size", type=int, default=self.BATCH_SIZE, help="每批写入的行数")
+        parser.add_argument("--copy", action="store_true", help="使用 PostgreSQL COPY 写入")
+        parser.add_argument("--seed", type=int, default=0, help="随机种子，相同的种子与参数生成相同的数据")
 
     def handle(self, *args, **options):
-        # 清空数据库
+        self.rng = random.Random(options["seed"])
+        self.fake = Faker()
+        self.fake.seed_instance(options["seed"])
+        self.now = timezone.now()
+        self.batch_size = options["batch_size"]
+        self.use_copy = options["copy"]
+
+        with transaction.atomic(), keep_created_at(Post, Comment, Report):
+            self.clear()
+            tags = self.generate_tags(options["tags"])
+            self.generate_users(options["users"])
+            authors = self.generate_posts(options["posts"], options["users"], tags)
+            names = self.generate_participants(options["participants"], options["users"], options["likes"])
+            self.generate_competitions(options["competitions"], names, tags)
+            self.generate_focuses(options["users"], options["competitions"], options["focuses"])
+            self.generate_permissions(options["users"], options["competitions"])
+            self.generate_comments(options)
+            self.generate_reports(options["reports"], options["users"], authors)
+            self.reset_sequences()
+            self.reconcile_counts()
+        invalidate_tag_registry()
+        self.stdout.write(self.style.SUCCESS('测试数据生成完成！'))
+
+    def writer(self, model, fields):
+        return RowWriter(model, fields, self.batch_size, self.use_copy)
+
+    def finish(self, label, *writers):
+        for writer in writers:
+            writer.flush()
+        self.stdout.write(f'已生成{label} {writers[0].count} 条')
+
+    def random_time(self, days):
+        return self.now - timedelta(seconds=self.rng.randint(0, days * 24 * 60 * 60))
+
+    def clear(self):
         self.stdout.write('清空数据库...')
-        Competition.objects.all().delete()
-        Participant.objects.all().delete()
-        Post.objects.all().delete()
-        User.objects.all().delete()
-        Tag.objects.all().delete()
+        models = [User, Tag, Post, Comment, Report, Participant, Competition, Focus, Like, UserPermission,
+                  Post.tags.through, Competition.tags.through, Competition.participants.through]
+        tables = ", ".join(f'"{model._meta.db_table}"' for model in models)
+        with connection.cursor() as cursor:
+            cursor.execute(f"TRUNCATE {tables} RESTART IDENTITY CASCADE")
         self.stdout.write('数据库已清空')
 
-        fake = Faker()
-        Faker.seed(0)  # 设置随机种子，确保每次生成的数据相同
+    def reset_sequences(self):
+        """
+        主键由本命令指定的表写入后，把序列推进到当前最大 id
+        """
+        statements = connection.ops.sequence_reset_sql(no_style(), [User, Tag, Post, Comment, Participant, Competition])
+        with connection.cursor() as cursor:
+            for sql in statements:
+                cursor.execute(sql)
 
-        # 生成 TAG_NUM 个标签
-        self.stdout.write('开始生成标签...')
-        tags = []
+    def reconcile_counts(self):
+        with connection.cursor() as cursor:
+            reconcile_object_counts(cursor, Post)
+            reconcile_object_counts(cursor, Competition)
+            reconcile_reply_counts(cursor)
+        self.stdout.write('评论计数器已重算')
+
+    def generate_tags(self, count):
+        writer = self.writer(Tag, ["id", "name", "tag_type", "is_post_tag", "is_competition_tag"])
         tag_types = [TagType.SPORTS, TagType.DEPARTMENT, TagType.EVENT, TagType.HIGHLIGHT, TagType.DEFAULT]
-        for i in range(self.TAG_NUM):
-            tag_type = random.choice(tag_types)
-            tag = Tag.objects.create(
-                name=fake.word(),
-                tag_type=tag_type,
-                is_post_tag=random.choice([True, False]),
-                is_competition_tag=random.choice([True, False])
+        tags = []
+        for tag_id in range(1, count + 1):
+            tag = Tag(
+                id=tag_id,
+                name=self.fake.word(),
+                tag_type=self.rng.choice(tag_types),
+                is_post_tag=self.rng.choice([True, False]),
+                is_competition_tag=self.rng.choice([True, False]),
             )
             tags.append(tag)
-            if (i + 1) % 10 == 0:
-                self.stdout.write(f'已生成 {i + 1} 个标签')
-
-        # 生成 USER_NUM 个用户
-        self.stdout.write('开始生成用户...')
-        users = []
-        for i in range(self.USER_NUM):
-            username = f"user_{i}"
-            email = f"user_{i}_fake_email@mails.tsinghua.edu.cn"
-            user = User.objects.create(
-                username=username,
-                nickname=fake.name(),
+            writer.add(tag)
+        self.finish('标签', writer)
+        return tags
+
+    def generate_users(self, count):
+        writer = self.writer(User, ["id", "username", "nickname", "password", "email"])
+        for user_id in range(1, count + 1):
+            writer.add(User(
+                id=user_id,
+                username=f"user_{user_id - 1}",
+                nickname=self.fake.name(),
                 password="dummy_password_hash",  # 使用一个假的密码哈希
-                email=email
-            )
-            users.append(user)
-            if (i + 1) % 100 == 0:
-                self.stdout.write(f'已生成 {i + 1} 个用户')
-
-        # 生成 POST_NUM 个帖子
-        self.stdout.write('开始生成帖子...')
-        for i in range(self.POST_NUM):
-            author = random.choice(users)
-            post = Post.objects.create(
-                title=fake.sentence(),
-                content=fake.paragraph(nb_sentences=5),
-                author=author,
-                created_at=timezone.now() - timedelta(days=random.randint(0, 30))
-            )
+                email=f"user_{user_id - 1}_fake_email@mails.tsinghua.edu.cn",
+            ))
+        self.finish('用户', writer)
+
+    def sample_tag_ids(self, tags):
+        if not tags:
+            return []
+        return sorted(tag.id for tag in self.rng.sample(tags, min(self.rng.randint(1, 5), len(tags))))
+
+    def generate_posts(self, count, user_count, tags):
+        """
+        生成帖子及其标签，返回按 post_id 排列的作者 id
+        """
+        writer = self.writer(Post, ["post_id", "title", "content", "created_at", "author", "tag_ids",
+                                    "comment_count", "total_comment_count"])
+        tag_writer = self.writer(Post.tags.through, ["post", "tag"])
+        post_tags = [tag for tag in tags if tag.is_post_tag]
+        authors = [None]
+        for post_id in range(1, count + 1):
             # 随机选择1-5个帖子标签
-            post_tags = [tag for tag in tags if tag.is_post_tag]
-            if post_tags:
-                selected_tags = random.sample(post_tags, min(random.randint(1, 5), len(post_tags)))
-                post.tags.set(selected_tags)
-            
-            if (i + 1) % 100 == 0:
-                self.stdout.write(f'已生成 {i + 1} 个帖子')
-
-        # 生成 PARTICIPANT_NUM 个参与者
-        self.stdout.write('开始生成参与者...')
-        participants = []
-        for i in range(self.PARTICIPANT_NUM):
-            participant = Participant.objects.create(
-                name=fake.name(),
-                score=random.randint(0, 100)
-            )
-            participants.append(participant)
-            if (i + 1) % 100 == 0:
-                self.stdout.write(f'已生成 {i + 1} 个参与者')
+            tag_ids = self.sample_tag_ids(post_tags)
+            authors.append(self.rng.randint(1, user_count))
+            writer.add(Post(
+                post_id=post_id,
+                title=self.fake.sentence(),
+                content=self.fake.paragraph(nb_sentences=5),
+                author_id=authors[post_id],
+                created_at=self.random_time(30),
+                tag_ids=tag_ids,
+            ))
+            for tag_id in tag_ids:
+                tag_writer.add(Post.tags.through(post_id=post_id, tag_id=tag_id))
+        self.finish('帖子', writer, tag_writer)
+        return authors
+
+    def generate_participants(self, count, user_count, like_count):
+        """
+        生成参与者及其点赞，like_count 与点赞记录一致；返回按 id 排列的参与者名
+        """
+        writer = self.writer(Participant, ["id", "name", "score", "like_count"])
+        like_writer = self.writer(Like, ["user", "participant"])
+        average = like_count / count if count else 0
+        names = [None]
+        for participant_id in range(1, count + 1):
+            user_ids = self.rng.sample(range(1, user_count + 1), min(user_count, self.rng.randint(0, round(2 * average))))
+            name = self.fake.name()
+            names.append(name)
+            writer.add(Participant(id=participant_id, name=name, score=self.rng.randint(0, 100), like_count=len(user_ids)))
+            for user_id in user_ids:
+                like_writer.add(Like(user_id=user_id, participant_id=participant_id))
+        self.finish('参与者', writer)
+        self.finish('点赞', like_writer)
+        return names
 
-        # 生成 COMPETITION_NUM 个比赛
-        self.stdout.write('开始生成比赛...')
+    def generate_competitions(self, count, names, tags):
+        writer = self.writer(Competition, ["id", "name", "sport", "is_finished", "time_begin", "created_at", "updated_at",
+                                           "comment_count", "total_comment_count", "tag_ids", "search_document"])
+        participant_writer = self.writer(Competition.participants.through, ["competition", "participant"])
+        tag_writer = self.writer(Competition.tags.through, ["competition", "tag"])
         sports = ['篮球', '足球', '排球', '网球', '乒乓球', '羽毛球', '游泳', '田径', '体操', '举重']
-        for i in range(self.COMPETITION_NUM):
-            comp = Competition.objects.create(
-                name=f"{random.choice(sports)}比赛 #{i+1}",
-                sport=random.choice(sports),
-                is_finished=random.choice([True, False]),
-                time_begin=timezone.now() - timedelta(days=random.randint(0, 365))
-            )
+        comp_tags = [tag for tag in tags if tag.is_competition_tag]
+        participant_count = len(names) - 1
+        for competition_id in range(1, count + 1):
+            name = f"{self.rng.choice(sports)}比赛 #{competition_id}"
+            sport = self.rng.choice(sports)
             # 随机选2-4个参与者
-            selected_participants = random.sample(participants, random.randint(2, 4))
-            comp.participants.set(selected_participants)
-            
+            participant_ids = sorted(self.rng.sample(range(1, participant_count + 1), min(participant_count, self.rng.randint(2, 4))))
             # 随机选择1-5个比赛标签
-            comp_tags = [tag for tag in tags if tag.is_competition_tag]
-            if comp_tags:
-                selected_tags = random.sample(comp_tags, min(random.randint(1, 5), len(comp_tags)))
-                comp.tags.set(selected_tags)
+            tag_ids = self.sample_tag_ids(comp_tags)
+            writer.add(Competition(
+                id=competition_id,
+                name=name,
+                sport=sport,
+                is_finished=self.rng.choice([True, False]),
+                time_begin=self.random_time(365),
+                created_at=self.now,
+                updated_at=self.now,
+                tag_ids=tag_ids,
+                # 与 refresh_search_documents 的结果一致：名称、项目与按 id 排列的选手名
+                search_document=SEARCH_DOCUMENT_SEPARATOR.join(
+                    [name, sport, SEARCH_DOCUMENT_SEPARATOR.join(names[participant_id] for participant_id in participant_ids)]
+                ),
+            ))
+            for participant_id in participant_ids:
+                participant_writer.add(Competition.participants.through(competition_id=competition_id, participant_id=participant_id))
+            for tag_id in tag_ids:
+                tag_writer.add(Competition.tags.through(competition_id=competition_id, tag_id=tag_id))
+        self.finish('比赛', writer, participant_writer, tag_writer)
+
+    def generate_focuses(self, user_count, competition_count, focus_count):
+        writer = self.writer(Focus, ["user", "competition"])
+        average = focus_count / user_count if user_count else 0
+        for user_id in range(1, user_count + 1):
+            k = min(competition_count, self.rng.randint(0, round(2 * average)))
+            for competition_id in self.rng.sample(range(1, competition_count + 1), k):
+                writer.add(Focus(user_id=user_id, competition_id=competition_id))
+        self.finish('关注', writer)
 
-            if (i + 1) % 100 == 0:
-                self.stdout.write(f'已生成 {i + 1} 个比赛')
+    def generate_permissions(self, user_count, competition_count):
+        """
+        第一个用户为超级管理员，每场比赛另有 0-2 名可修改比赛信息的管理员
+        """
+        writer = self.writer(UserPermission, ["user", "permission", "permission_info"])
+        if user_count:
+            writer.add(UserPermission(user_id=1, permission=PERMISSION_USER_IS_ADMIN, permission_info=""))
+            for competition_id in range(1, competition_count + 1):
+                for user_id in self.rng.sample(range(1, user_count + 1), min(user_count, self.rng.randint(0, 2))):
+                    writer.add(UserPermission(user_id=user_id, permission=PERMISSION_MATCH_UPDATE_MATCH_INFO,
+                                              permission_info=str(competition_id)))
+        self.finish('权限', writer)
+
+    def generate_comments(self, options):
+        """
+        生成评论树：顶层评论挂在随机的帖子或比赛下，回复优先接在最新的回复后面形成长链，
+        层数不超过 max_reply_depth。计数器最后统一由 reconcile_counts 重算
+        """
+        writer = self.writer(Comment, ["comment_id", "content", "created_at", "author", "allow_reply", "content_type",
+                                       "object_id", "root_id", "depth", "path", "comment_count", "total_comment_count"])
+        targets = [
+            (ContentType.objects.get_for_model(model), count)
+            for model, count in ((Post, options["posts"]), (Competition, options["competitions"])) if count
+        ]
+        comment_type = ContentType.objects.get_for_model(Comment)
+        user_count = options["users"]
+        total = options["comments"] if targets and user_count else 0
+        comment_id = 0
+        while comment_id < total:
+            content_type, target_count = self.rng.choice(targets)
+            comment_id += 1
+            root = Comment(
+                comment_id=comment_id,
+                content=self.fake.sentence(),
+                created_at=self.random_time(30),
+                author_id=self.rng.randint(1, user_count),
+                content_type=content_type,
+                object_id=self.rng.randint(1, target_count),
+            )
+            root.set_tree_position(None)
+            writer.add(root)
+            tree = [root]
+            reply_count = min(self.rng.choice([0, 0, 1, 2, 5, 20]), total - comment_id)
+            if options["max_reply_depth"] < 1:
+                reply_count = 0  # 不允许回复时只生成顶层评论
+            for _ in range(reply_count):
+                parent = tree[-1] if self.rng.random() < 0.5 else self.rng.choice(tree)
+                if parent.depth >= options["max_reply_depth"]:
+                    parent = root
+                comment_id += 1
+                reply = Comment(
+                    comment_id=comment_id,
+                    content=self.fake.sentence(),
+                    created_at=max(parent.created_at, self.random_time(30)),
+                    author_id=self.rng.randint(1, user_count),
+                    content_type=comment_type,
+                    object_id=parent.comment_id,
+                )
+                reply.set_tree_position(parent)
+                writer.add(reply)
+                tree.append(reply)
+        self.finish('评论', writer)
 
-        self.stdout.write(self.style.SUCCESS('测试数据生成完成！'))
\ No newline at end of file
+    def generate_reports(self, count, user_count, authors):
+        writer = self.writer(Report, ["reporter", "reported_user", "reported_content", "reason", "created_at", "solved",
+                                      "content_type", "object_id"])
+        post_type = ContentType.objects.get_for_model(Post)
+        post_count = len(authors) - 1
+        for _ in range(count if user_count and post_count else 0):
+            post_id = self.rng.randint(1, post_count)
+            writer.add(Report(
+                reporter_id=self.rng.randint(1, user_count),
+                reported_user_id=authors[post_id],
+                reported_content=self.fake.sentence(),
+                reason=self.fake.sentence(),
+                created_at=self.random_time(30),
+                solved=self.rng.random() < 0.5,
+                content_type=post_type,
+                object_id=post_id,
+            ))
+        self.finish('举报', writer)
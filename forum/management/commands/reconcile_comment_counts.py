@@ -0,0 +1,66 @@
+from django.contrib.contenttypes.models import ContentType
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from forum.models import Comment, Post
+from competitions.models import Competition
+
+def reconcile_object_counts(cursor, model):
+    """
+    按评论表重算帖子 / 赛事的评论计数器，只改写与实际不符的行，返回修正的行数
+    """
+    table = model._meta.db_table
+    pk_column = model._meta.pk.column
+    cursor.execute(f'''
+        UPDATE "{table}" AS o
+        SET "comment_count" = c.direct, "total_comment_count" = c.total
+        FROM (
+            SELECT t."{pk_column}" AS id, COALESCE(s.direct, 0) AS direct, COALESCE(s.total, 0) AS total
+            FROM "{table}" AS t LEFT JOIN (
+                SELECT top."object_id" AS id, COUNT(DISTINCT top."comment_id") AS direct,
+                       COUNT(DISTINCT top."comment_id") + COUNT(reply."comment_id") AS total
+                FROM "{Comment._meta.db_table}" AS top
+                LEFT JOIN "{Comment._meta.db_table}" AS reply ON reply."root_id" = top."comment_id"
+                WHERE top."content_type_id" = %s
+                GROUP BY top."object_id"
+            ) AS s ON s.id = t."{pk_column}"
+        ) AS c
+        WHERE o."{pk_column}" = c.id
+          AND (o."comment_count", o."total_comment_count") IS DISTINCT FROM (c.direct, c.total)
+    ''', [ContentType.objects.get_for_model(model).id])
+    return cursor.rowcount
+
+def reconcile_reply_counts(cursor):
+    """
+    按评论表重算评论的回复计数器，后代数由 path 中出现的祖先 id 分组统计，返回修正的行数
+    """
+    table = Comment._meta.db_table
+    cursor.execute(f'''
+        UPDATE "{table}" AS o
+        SET "comment_count" = c.direct, "total_comment_count" = c.total
+        FROM (
+            SELECT t."comment_id" AS id, COALESCE(d.n, 0) AS direct, COALESCE(s.n, 0) AS total
+            FROM "{table}" AS t
+            LEFT JOIN (
+                SELECT "object_id" AS id, COUNT(*) AS n FROM "{table}"
+                WHERE "content_type_id" = %s GROUP BY "object_id"
+            ) AS d ON d.id = t."comment_id"
+            LEFT JOIN (
+                SELECT a.id::integer AS id, COUNT(*) AS n
+                FROM "{table}", unnest(string_to_array(rtrim("path", '/'), '/')) AS a(id)
+                WHERE "path" <> '' GROUP BY a.id::integer
+            ) AS s ON s.id = t."comment_id"
+        ) AS c
+        WHERE o."comment_id" = c.id
+          AND (o."comment_count", o."total_comment_count") IS DISTINCT FROM (c.direct, c.total)
+    ''', [ContentType.objects.get_for_model(Comment).id])
+    return cursor.rowcount
+
+class Command(BaseCommand):
+    help = '按评论表重新统计帖子、赛事和评论上的评论计数器，修正与实际不符的值'
+
+    def handle(self, *args, **options):
+        with transaction.atomic(), connection.cursor() as cursor:
+            posts = reconcile_object_counts(cursor, Post)
+            competitions = reconcile_object_counts(cursor, Competition)
+            comments = reconcile_reply_counts(cursor)
+        self.stdout.write(f'已修正帖子 {posts} 条，赛事 {competitions} 条，评论 {comments} 条')
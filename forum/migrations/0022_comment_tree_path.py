@@ -0,0 +1,83 @@
+# Generated by Django 5.1.7 on 2026-10-18 00:08
+
+from django.db import migrations, models
+
+PATH_SEGMENT_WIDTH = 10
+BATCH_SIZE = 1000
+
+def fill_comment_tree_path(apps, schema_editor):
+    Comment = apps.get_model("forum", "Comment")
+    ContentType = apps.get_model("contenttypes", "ContentType")
+
+    comment_ct = ContentType.objects.filter(app_label="forum", model="comment").first()
+    comment_ct_id = comment_ct.id if comment_ct else None
+    parent_of = {
+        comment_id: (object_id if content_type_id == comment_ct_id else None)
+        for comment_id, content_type_id, object_id
+        in Comment.objects.values_list("comment_id", "content_type_id", "object_id")
+    }
+
+    # 按祖先链计算每条评论的位置，父评论已不存在的按顶层评论处理
+    position = {}
+    def resolve(target_id):
+        chain = []
+        comment_id = target_id
+        while comment_id not in position:
+            chain.append(comment_id)
+            parent_id = parent_of.get(comment_id)
+            if parent_id is None or parent_id not in parent_of or parent_id in chain:
+                position[chain.pop()] = (None, 0, "")
+                break
+            comment_id = parent_id
+        while chain:
+            child_id = chain.pop()
+            parent_id = parent_of[child_id]
+            root_id, depth, path = position[parent_id]
+            position[child_id] = (root_id or parent_id, depth + 1, f"{path}{parent_id:0{PATH_SEGMENT_WIDTH}d}/")
+        return position[target_id]
+
+    batch = []
+    for comment_id in parent_of:
+        root_id, depth, path = resolve(comment_id)
+        batch.append(Comment(comment_id=comment_id, root_id=root_id, depth=depth, path=path))
+        if len(batch) >= BATCH_SIZE:
+            Comment.objects.bulk_update(batch, ["root_id", "depth", "path"])
+            batch = []
+    if batch:
+        Comment.objects.bulk_update(batch, ["root_id", "depth", "path"])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("contenttypes", "0002_remove_content_type_name"),
+        ("forum", "0021_rename_report2_report"),
+        ("users", "0003_alter_user_nickname"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="comment",
+            name="depth",
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name="comment",
+            name="path",
+            field=models.TextField(blank=True, default=""),
+        ),
+        migrations.AddField(
+            model_name="comment",
+            name="root_id",
+            field=models.PositiveIntegerField(blank=True, null=True),
+        ),
+        migrations.AddIndex(
+            model_name="comment",
+            index=models.Index(fields=["root_id", "created_at"], name="forum_comment_root_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="comment",
+            index=models.Index(fields=["path"], name="forum_comment_path_idx", opclasses=["text_pattern_ops"]),
+        ),
+        migrations.RunPython(fill_comment_tree_path, migrations.RunPython.noop),
+    ]
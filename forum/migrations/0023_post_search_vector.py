@@ -0,0 +1,48 @@
+# Generated by Django 5.1.7 on 2026-10-18 00:11
+
+import django.contrib.postgres.indexes
+import django.contrib.postgres.search
+from django.db import migrations, models
+
+TRIGRAM_INDEXES = {
+    "forum_post_title_trgm_idx": "title",
+    "forum_post_content_trgm_idx": "content",
+}
+
+def create_trigram_indexes(apps, schema_editor):
+    # 短关键词和中文关键词回退到 icontains，若数据库提供 pg_trgm 则为其建立三元组索引
+    with schema_editor.connection.cursor() as cursor:
+        cursor.execute("SELECT 1 FROM pg_available_extensions WHERE name = 'pg_trgm'")
+        if cursor.fetchone() is None:
+            return
+    schema_editor.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+    for index_name, column in TRIGRAM_INDEXES.items():
+        schema_editor.execute(
+            f'CREATE INDEX IF NOT EXISTS "{index_name}" ON "forum_post" USING gin (UPPER("{column}"::text) gin_trgm_ops)'
+        )
+
+def drop_trigram_indexes(apps, schema_editor):
+    for index_name in TRIGRAM_INDEXES:
+        schema_editor.execute(f'DROP INDEX IF EXISTS "{index_name}"')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("forum", "0022_comment_tree_path"),
+        ("tag", "0006_alter_tag_tag_type"),
+        ("users", "0003_alter_user_nickname"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="post",
+            name="search_vector",
+            field=models.GeneratedField(db_persist=True, expression=django.contrib.postgres.search.CombinedSearchVector(django.contrib.postgres.search.SearchVector("title", config="simple", weight="A"), "||", django.contrib.postgres.search.SearchVector("content", config="simple", weight="B"), django.contrib.postgres.search.SearchConfig("simple")), output_field=django.contrib.postgres.search.SearchVectorField()),
+        ),
+        migrations.AddIndex(
+            model_name="post",
+            index=django.contrib.postgres.indexes.GinIndex(fields=["search_vector"], name="forum_post_search_idx"),
+        ),
+        migrations.RunPython(create_trigram_indexes, drop_trigram_indexes),
+    ]
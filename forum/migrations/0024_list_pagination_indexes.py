@@ -0,0 +1,32 @@
+# Generated by Django 5.1.7 on 2026-10-18 00:13
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("contenttypes", "0002_remove_content_type_name"),
+        ("forum", "0023_post_search_vector"),
+        ("tag", "0006_alter_tag_tag_type"),
+        ("users", "0003_alter_user_nickname"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="comment",
+            index=models.Index(fields=["content_type", "object_id", "-created_at", "-comment_id"], name="forum_comment_object_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="post",
+            index=models.Index(fields=["-created_at", "-post_id"], name="forum_post_created_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="report",
+            index=models.Index(fields=["-created_at", "-report_id"], name="forum_report_created_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="report",
+            index=models.Index(fields=["solved", "-created_at", "-report_id"], name="forum_report_solved_idx"),
+        ),
+    ]
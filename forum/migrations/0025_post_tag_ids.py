@@ -0,0 +1,34 @@
+# Generated by Django 5.1.7 on 2026-10-18 00:14
+
+import django.contrib.postgres.fields
+import django.contrib.postgres.indexes
+from django.db import migrations, models
+
+def fill_post_tag_ids(apps, schema_editor):
+    schema_editor.execute(
+        'UPDATE "forum_post" SET "tag_ids" = ARRAY('
+        'SELECT "tag_id" FROM "forum_post_tags" '
+        'WHERE "forum_post_tags"."post_id" = "forum_post"."post_id" ORDER BY "tag_id")'
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("forum", "0024_list_pagination_indexes"),
+        ("tag", "0006_alter_tag_tag_type"),
+        ("users", "0003_alter_user_nickname"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="post",
+            name="tag_ids",
+            field=django.contrib.postgres.fields.ArrayField(base_field=models.IntegerField(), blank=True, default=list, size=None),
+        ),
+        migrations.AddIndex(
+            model_name="post",
+            index=django.contrib.postgres.indexes.GinIndex(fields=["tag_ids"], name="forum_post_tag_ids_idx"),
+        ),
+        migrations.RunPython(fill_post_tag_ids, migrations.RunPython.noop),
+    ]
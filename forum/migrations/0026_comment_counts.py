@@ -0,0 +1,80 @@
+# Generated by Django 5.1.7 on 2026-10-18 00:20
+
+from django.db import migrations, models
+
+def fill_object_comment_counts(schema_editor, table, pk_column, content_type_id):
+    schema_editor.execute(
+        f'UPDATE "{table}" AS o SET "comment_count" = c.direct, "total_comment_count" = c.total FROM ('
+        f'SELECT s."object_id" AS id, COUNT(DISTINCT s."comment_id") AS direct, '
+        f'COUNT(DISTINCT s."comment_id") + COUNT(r."comment_id") AS total '
+        f'FROM "forum_comment" AS s LEFT JOIN "forum_comment" AS r ON r."root_id" = s."comment_id" '
+        f'WHERE s."content_type_id" = %s GROUP BY s."object_id"'
+        f') AS c WHERE o."{pk_column}" = c.id',
+        [content_type_id],
+    )
+
+def fill_comment_counts(apps, schema_editor):
+    ContentType = apps.get_model("contenttypes", "ContentType")
+    content_type_ids = {
+        model: content_type.id
+        for model, content_type in (
+            (model, ContentType.objects.filter(app_label=app_label, model=model).first())
+            for app_label, model in (("forum", "post"), ("forum", "comment"), ("competitions", "competition"))
+        )
+        if content_type is not None
+    }
+    # 新库中还没有任何评论，无需回填
+    if "comment" not in content_type_ids:
+        return
+    if "post" in content_type_ids:
+        fill_object_comment_counts(schema_editor, "forum_post", "post_id", content_type_ids["post"])
+    if "competition" in content_type_ids:
+        fill_object_comment_counts(schema_editor, "competitions_competition", "id", content_type_ids["competition"])
+    schema_editor.execute(
+        'UPDATE "forum_comment" AS o SET "comment_count" = c.n FROM ('
+        'SELECT "object_id" AS id, COUNT(*) AS n FROM "forum_comment" '
+        'WHERE "content_type_id" = %s GROUP BY "object_id"'
+        ') AS c WHERE o."comment_id" = c.id',
+        [content_type_ids["comment"]],
+    )
+    # path 中的每一段都是一个祖先，展开后按祖先分组即得后代数
+    schema_editor.execute(
+        'UPDATE "forum_comment" AS o SET "total_comment_count" = c.n FROM ('
+        'SELECT a.id::integer AS id, COUNT(*) AS n FROM "forum_comment", '
+        'unnest(string_to_array(rtrim("path", \'/\'), \'/\')) AS a(id) '
+        'WHERE "path" <> \'\' GROUP BY a.id::integer'
+        ') AS c WHERE o."comment_id" = c.id'
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("contenttypes", "0002_remove_content_type_name"),
+        ("competitions", "0026_competition_comment_counts"),
+        ("forum", "0025_post_tag_ids"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="comment",
+            name="comment_count",
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name="comment",
+            name="total_comment_count",
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name="post",
+            name="comment_count",
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name="post",
+            name="total_comment_count",
+            field=models.IntegerField(default=0),
+        ),
+        migrations.RunPython(fill_comment_counts, migrations.RunPython.noop),
+    ]
@@ -1,10 +1,19 @@
 from django.db import models
+from django.contrib.postgres.fields import ArrayField
+from django.contrib.postgres.indexes import GinIndex
+from django.contrib.postgres.search import SearchVector, SearchVectorField
 from users.models import User
 from django.contrib.contenttypes.fields import GenericForeignKey
 from django.contrib.contenttypes.models import ContentType
 from tag.models import Tag
 # Create your models here.
 
+# 全文检索使用的文本搜索配置，simple 不做词干处理，对中英文混排更稳妥
+POST_SEARCH_CONFIG = "simple"
+
+# 物化路径中每一级评论 id 补零后的宽度，保证按字符串前缀即可匹配整棵子树
+COMMENT_PATH_SEGMENT_WIDTH = 10
+
 class Post(models.Model):
     post_id = models.AutoField(primary_key=True)
     title = models.CharField(max_length=255)
@@ -12,6 +21,31 @@ class Post(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     author = models.ForeignKey(User, on_delete=models.CASCADE)
     tags = models.ManyToManyField(Tag, related_name="posts", blank=True)
+    # tags 的冗余副本（按 id 升序），由 forum.signals 在 m2m 变化时维护，
+    # 配合 GIN 倒排索引完成多标签求交
+    tag_ids = ArrayField(models.IntegerField(), default=list, blank=True)
+    # 评论计数器，由 forum.signals 在评论增删时用 F() 原子更新
+    # comment_count: 直接评论数；total_comment_count: 含全部回复在内的评论总数
+    comment_count = models.IntegerField(default=0)
+    total_comment_count = models.IntegerField(default=0)
+
+    # 由数据库维护的全文检索向量，标题权重 A，正文权重 B
+    search_vector = models.GeneratedField(
+        expression=(
+            SearchVector("title", weight="A", config=POST_SEARCH_CONFIG)
+            + SearchVector("content", weight="B", config=POST_SEARCH_CONFIG)
+        ),
+        output_field=SearchVectorField(),
+        db_persist=True,
+    )
+
+    class Meta:
+        indexes = [
+            GinIndex(fields=["search_vector"], name="forum_post_search_idx"),
+            GinIndex(fields=["tag_ids"], name="forum_post_tag_ids_idx"),
+            # 列表按 (created_at, post_id) 倒序分页
+            models.Index(fields=["-created_at", "-post_id"], name="forum_post_created_idx"),
+        ]
 
     def __str__(self):
         return f"{self.title} - {self.author}"
@@ -28,9 +62,56 @@ class Comment(models.Model):
     object_id = models.PositiveIntegerField()
     content_object = GenericForeignKey('content_type', 'object_id')
 
+    # 评论树的物化路径，在创建时由 forum.signals 填充
+    # root_id: 所在评论树顶层评论的 id，顶层评论自身为 None
+    # depth: 顶层评论为 0，每回复一层加 1
+    # path: 所有祖先评论 id 依次拼接，如 "0000000001/0000000005/"，顶层评论为空串
+    root_id = models.PositiveIntegerField(null=True, blank=True)
+    depth = models.PositiveIntegerField(default=0)
+    path = models.TextField(default="", blank=True)
+    # 直接回复数与全部后代回复数，维护方式同 Post
+    comment_count = models.IntegerField(default=0)
+    total_comment_count = models.IntegerField(default=0)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["root_id", "created_at"], name="forum_comment_root_idx"),
+            models.Index(fields=["path"], name="forum_comment_path_idx", opclasses=["text_pattern_ops"]),
+            # 某对象下的评论按 (created_at, comment_id) 倒序分页
+            models.Index(fields=["content_type", "object_id", "-created_at", "-comment_id"],
+                         name="forum_comment_object_idx"),
+        ]
+
     def __str__(self):
         return f"{self.content} - {self.author}"
 
+    @property
+    def subtree_path(self):
+        """
+        该评论所有后代评论 path 的公共前缀
+        """
+        return f"{self.path}{self.comment_id:0{COMMENT_PATH_SEGMENT_WIDTH}d}/"
+
+    @property
+    def ancestor_ids(self):
+        """
+        从 path 解析出的全部祖先评论 id，由顶层评论到父评论
+        """
+        return [int(segment) for segment in self.path.split("/") if segment]
+
+    def set_tree_position(self, parent=None):
+        """
+        根据父评论计算 root_id / depth / path，parent 为 None 表示顶层评论
+        """
+        if parent is None:
+            self.root_id = None
+            self.depth = 0
+            self.path = ""
+        else:
+            self.root_id = parent.root_id or parent.comment_id
+            self.depth = parent.depth + 1
+            self.path = parent.subtree_path
+
 class Report(models.Model):
     report_id = models.AutoField(primary_key=True)
     reporter = models.ForeignKey(User, on_delete=models.CASCADE, related_name='reports_made')
@@ -44,5 +125,12 @@ class Report(models.Model):
     object_id = models.PositiveIntegerField()
     content_object = GenericForeignKey('content_type', 'object_id')
 
+    class Meta:
+        indexes = [
+            # 举报列表按 (created_at, report_id) 倒序分页，可按处理状态筛选
+            models.Index(fields=["-created_at", "-report_id"], name="forum_report_created_idx"),
+            models.Index(fields=["solved", "-created_at", "-report_id"], name="forum_report_solved_idx"),
+        ]
+
     def __str__(self):
         return f"{self.reporter} - {self.content_object}"
\ No newline at end of file
@@ -1,32 +1,129 @@
-from django.db.models.signals import post_delete
+from django.contrib.postgres.expressions import ArraySubquery
+from django.db import transaction
+from django.db.models import Case, F, Func, OuterRef, Q, Value, When
+from django.db.models.signals import m2m_changed, post_delete, post_save, pre_delete, pre_save
 from django.dispatch import receiver
 from django.contrib.contenttypes.models import ContentType
 from forum.models import Comment, Post
 from competitions.models import Competition
+from tag.models import Tag
+from utils.utils_response_cache import instance_tag, invalidate_response_cache, model_tag
+
+# 每条 DELETE 语句最多删除的评论数，避免单条语句锁住过多行
+DELETE_BATCH_SIZE = 1000
+
+# 带有评论计数器的顶层评论对象
+COUNTED_MODELS = (Post, Competition)
+
+def delete_comments_in_batches(comment_ids, batch_size=DELETE_BATCH_SIZE):
+    """
+    在同一个事务中按批删除给定的评论，返回删除的评论数。
+    调用方已经展开了整棵子树，这里直接执行 DELETE，不再为每条评论触发信号。
+    """
+    comment_ids = list(comment_ids)
+    deleted = 0
+    with transaction.atomic():
+        for start in range(0, len(comment_ids), batch_size):
+            batch = Comment.objects.filter(pk__in=comment_ids[start:start + batch_size])
+            deleted += batch._raw_delete(batch.db)
+    return deleted
+
+def delete_comment_subtree(comment):
+    """
+    通过物化路径一次查询找出评论的全部后代并删除
+    """
+    descendant_ids = Comment.objects.filter(path__startswith=comment.subtree_path).values_list("pk", flat=True)
+    return delete_comments_in_batches(descendant_ids)
 
 def delete_related_comments(content_type, object_id):
     """
-    递归删除所有指向指定对象的评论
+    一次查询找出指向指定对象的全部评论及其所有后代回复并删除
     """
-    children = Comment.objects.filter(content_type=content_type, object_id=object_id)
-    for child in children:
-        # 递归删除 child 的子评论
-        delete_related_comments(ContentType.objects.get_for_model(Comment), child.comment_id)
-        # 删除 child 自己
-        child.delete()
+    top_level = Comment.objects.filter(content_type=content_type, object_id=object_id)
+    comment_ids = Comment.objects.filter(
+        Q(content_type=content_type, object_id=object_id) | Q(root_id__in=top_level.values("pk"))
+    ).values_list("pk", flat=True)
+    return delete_comments_in_batches(comment_ids)
+
+@receiver(pre_save, sender=Comment)
+def fill_comment_tree_position(sender, instance, **kwargs):
+    """
+    新建评论时根据父评论填充物化路径字段
+    """
+    if not instance._state.adding:
+        return
+    if instance.content_type_id != ContentType.objects.get_for_model(Comment).id:
+        instance.set_tree_position(None)
+        return
+    # content_object 在视图中赋值时已缓存父评论，这里不会产生额外查询
+    instance.set_tree_position(instance.content_object)
+
+def comment_tree_target(comment):
+    """
+    评论树所属的帖子 / 赛事，返回 (content_type_id, object_id)，顶层评论已不存在时返回 None
+    """
+    if comment.depth == 0:
+        return comment.content_type_id, comment.object_id
+    return Comment.objects.filter(pk=comment.root_id).values_list("content_type_id", "object_id").first()
+
+def update_comment_counters(comment, direct_delta, total_delta):
+    """
+    评论增删后用 F() 表达式原子地调整计数器：父对象的直接评论数加 direct_delta，
+    所有祖先评论及评论树所属的帖子 / 赛事的评论总数加 total_delta
+    """
+    if comment.depth == 0:
+        target = comment_tree_target(comment)
+    else:
+        Comment.objects.filter(pk__in=comment.ancestor_ids).update(
+            comment_count=F("comment_count") + Case(
+                When(pk=comment.object_id, then=Value(direct_delta)), default=Value(0)
+            ),
+            total_comment_count=F("total_comment_count") + total_delta,
+        )
+        # 删除时 pre_delete 已经记录了所属对象，级联删除中顶层评论可能已先于回复被删掉
+        target = getattr(comment, "_tree_target", None) or comment_tree_target(comment)
+        if target is None:
+            return
+        direct_delta = 0
+    content_type_id, object_id = target
+    model = ContentType.objects.get_for_id(content_type_id).model_class()
+    if model in COUNTED_MODELS:
+        model.objects.filter(pk=object_id).update(
+            comment_count=F("comment_count") + direct_delta,
+            total_comment_count=F("total_comment_count") + total_delta,
+        )
+        invalidate_response_cache(instance_tag(model, object_id))
+
+@receiver(post_save, sender=Comment)
+def count_created_comment(sender, instance, created, raw, **kwargs):
+    """
+    新建评论时增加父对象与各祖先的计数器
+    """
+    if created and not raw:
+        update_comment_counters(instance, 1, 1)
+
+@receiver(pre_delete, sender=Comment)
+def record_comment_tree_target(sender, instance, **kwargs):
+    """
+    删除回复前记录评论树所属的帖子 / 赛事。
+    级联删除（如删除用户）会先删除同一批的全部评论再依次发送 post_delete，
+    届时顶层评论可能已经不存在，无法再由 root_id 查到所属对象
+    """
+    if instance.depth > 0:
+        instance._tree_target = comment_tree_target(instance)
 
 @receiver(post_delete, sender=Comment)
 def delete_children_comments(sender, instance, **kwargs):
     """
-    每当一个 Comment 被删除时，递归删除它的所有子评论
+    每当一个 Comment 被删除时，删除它的所有后代回复，并扣减父对象与各祖先的计数器
     """
-    content_type = ContentType.objects.get_for_model(Comment)
-    delete_related_comments(content_type, instance.comment_id)
+    deleted = delete_comment_subtree(instance)
+    update_comment_counters(instance, -1, -(deleted + 1))
 
 @receiver(post_delete, sender=Post)
 def delete_comments_for_post(sender, instance, **kwargs):
     """
-    当 Post 被删除时，递归删除它所有的评论及子评论。
+    当 Post 被删除时，删除它所有的评论及子评论。
     """
     content_type = ContentType.objects.get_for_model(Post)
     delete_related_comments(content_type, instance.pk)
@@ -34,15 +131,62 @@ def delete_comments_for_post(sender, instance, **kwargs):
 @receiver(post_delete, sender=Competition)
 def delete_comments_for_competition(sender, instance, **kwargs):
     """
-    当 Competition 被删除时，递归删除它所有的评论及子评论。
+    当 Competition 被删除时，删除它所有的评论及子评论。
     """
     content_type = ContentType.objects.get_for_model(Competition)
     delete_related_comments(content_type, instance.pk)
 
-@receiver(post_delete, sender=Comment)
-def delete_comments_for_comment(sender, instance, **kwargs):
+def refresh_post_tag_ids(post_ids):
+    """
+    用一条 UPDATE 按 m2m 中间表重算帖子的 tag_ids
+    """
+    tag_ids = Post.tags.through.objects.filter(post_id=OuterRef("pk")).order_by("tag_id").values("tag_id")
+    Post.objects.filter(pk__in=post_ids).update(tag_ids=ArraySubquery(tag_ids))
+
+@receiver(m2m_changed, sender=Post.tags.through)
+def sync_post_tag_ids(sender, instance, action, reverse, pk_set, **kwargs):
+    """
+    post.tags 或 tag.posts 变化后同步帖子的 tag_ids
+    """
+    if not reverse:
+        if action in ("post_add", "post_remove", "post_clear"):
+            # 同时更新内存中的实例，避免随后的 post.save() 把旧值写回
+            instance.tag_ids = list(
+                sender.objects.filter(post_id=instance.pk).order_by("tag_id").values_list("tag_id", flat=True)
+            )
+            Post.objects.filter(pk=instance.pk).update(tag_ids=instance.tag_ids)
+        return
+    # 反向修改 tag.posts 时，pk_set 为受影响的帖子；clear 时需要提前记录
+    if action == "pre_clear":
+        instance._cleared_post_ids = list(instance.posts.values_list("pk", flat=True))
+    elif action in ("post_add", "post_remove"):
+        refresh_post_tag_ids(pk_set)
+    elif action == "post_clear":
+        refresh_post_tag_ids(getattr(instance, "_cleared_post_ids", []))
+
+@receiver(pre_delete, sender=Tag)
+def remove_deleted_tag_from_posts(sender, instance, **kwargs):
+    """
+    删除标签时级联删除中间表不会触发 m2m_changed，这里直接从 tag_ids 中移除
+    """
+    Post.objects.filter(tag_ids__contains=[instance.pk]).update(
+        tag_ids=Func(F("tag_ids"), Value(instance.pk), function="array_remove",
+                     output_field=Post._meta.get_field("tag_ids"))
+    )
+    invalidate_response_cache(model_tag(Post))
+
+@receiver(post_save, sender=Post)
+@receiver(post_delete, sender=Post)
+def invalidate_post_responses(sender, instance, **kwargs):
+    """
+    帖子增删改后使其详情与帖子列表第一页的响应缓存失效
+    """
+    invalidate_response_cache(model_tag(Post), instance_tag(Post, instance.pk))
+
+@receiver(m2m_changed, sender=Post.tags.through)
+def invalidate_post_list_responses(sender, action, **kwargs):
     """
-    当 Comment 被删除时，递归删除它所有的子评论。
+    帖子标签变化后按标签筛选的列表随之变化
     """
-    content_type = ContentType.objects.get_for_model(Comment)
-    delete_related_comments(content_type, instance.comment_id)
\ No newline at end of file
+    if action in ("post_add", "post_remove", "post_clear"):
+        invalidate_response_cache(model_tag(Post))
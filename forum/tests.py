@@ -1,11 +1,19 @@
+from collections import Counter, defaultdict
+from datetime import datetime, timezone as dt_timezone
+from unittest import mock
+from django.contrib.contenttypes.models import ContentType
 from django.test import Client, TestCase
 from django.urls import reverse
 from users.models import User
 from forum.models import Post, Comment, Report
+from competitions.models import Competition, Focus, Like, Participant
 from tag.models import Tag, TagType
 from settings.models import UserPermission
 from utils.utils_permission import PERMISSION_FORUM_POST, PERMISSION_FORUM_MANAGE_FORUM, PERMISSION_FORUM_POST_HIGHLIGHT
 from utils.utils_require import ErrorCode
+from forum.management.commands.benchmark_comment_delete import build_comment_tree
+from django.core.management import call_command
+from io import StringIO
 import unittest
 import json
 CONTENT_TYPE = "application/json"
@@ -711,6 +719,110 @@ class ForumTests(TestCase):
         self.assertEqual(data["data"]["total_pages"], 1)
         self.assertEqual(data["data"]["total_posts"], 2)
         
+    def test_post_tag_ids_follow_tag_changes(self):
+        tags = [
+            Tag.objects.create(name=f"Tag {i}", tag_type=TagType.SPORTS, is_post_tag=True, is_competition_tag=False)
+            for i in range(3)
+        ]
+        post = Post.objects.create(title="Test Post", content="This is a test post", author=self.user)
+        post.tags.set([tags[2], tags[0]])
+        post.refresh_from_db()
+        self.assertEqual(post.tag_ids, [tags[0].id, tags[2].id])
+
+        post.tags.remove(tags[0])
+        tags[1].posts.add(post)
+        post.refresh_from_db()
+        self.assertEqual(post.tag_ids, [tags[1].id, tags[2].id])
+
+        tags[2].delete()
+        post.refresh_from_db()
+        self.assertEqual(post.tag_ids, [tags[1].id])
+
+        tags[1].posts.clear()
+        post.refresh_from_db()
+        self.assertEqual(post.tag_ids, [])
+
+    def test_get_post_list_multiple_tags(self):
+        tags = [
+            Tag.objects.create(name=f"Tag {i}", tag_type=TagType.SPORTS, is_post_tag=True, is_competition_tag=False)
+            for i in range(4)
+        ]
+        all_tags = Post.objects.create(title="All", content="This is a test post", author=self.user)
+        all_tags.tags.set(tags)
+        three_tags = Post.objects.create(title="Three", content="This is a test post", author=self.user)
+        three_tags.tags.set(tags[:3])
+        two_tags = Post.objects.create(title="Two", content="This is a test post", author=self.user)
+        two_tags.tags.set(tags[:2])
+        response = self.client.get(reverse('get_post_list'), {
+            "tag_list": [tags[0].id, tags[1].id, tags[2].id],
+            "page": 1,
+            "page_size": 10
+        })
+        data = json.loads(response.content.decode('utf-8'))
+        self.assertEqual(data["code"], 0)
+        self.assertEqual([post["post_id"] for post in data["data"]["posts"]],
+                         [three_tags.post_id, all_tags.post_id])
+
+    def test_get_post_list_cursor(self):
+        posts = [
+            Post.objects.create(title=f"Test Post {i}", content="This is a test post", author=self.user)
+            for i in range(5)
+        ]
+        seen = []
+        cursor = ""
+        while cursor is not None:
+            response = self.client.get(reverse('get_post_list'), {
+                "cursor": cursor,
+                "page_size": 2
+            })
+            data = json.loads(response.content.decode('utf-8'))
+            self.assertEqual(data["code"], 0)
+            self.assertNotIn("total_posts", data["data"])
+            seen.extend(post["post_id"] for post in data["data"]["posts"])
+            cursor = data["data"]["next_cursor"]
+        self.assertEqual(seen, [post.post_id for post in reversed(posts)])
+
+        response = self.client.get(reverse('get_post_list'), {
+            "cursor": "",
+            "page_size": 2,
+            "with_count": "true"
+        })
+        data = json.loads(response.content.decode('utf-8'))
+        self.assertEqual(data["data"]["total_posts"], 5)
+
+    def test_get_post_list_invalid_cursor(self):
+        response = self.client.get(reverse('get_post_list'), {
+            "cursor": "not-a-cursor",
+            "page_size": 2
+        })
+        data = json.loads(response.content.decode('utf-8'))
+        self.assertEqual(data, ErrorCode.INVALID_CURSOR)
+
+    def test_get_comment_list_of_object_cursor(self):
+        test_post = Post.objects.create(title="Test Post", content="This is a test post", author=self.user)
+        comments = [
+            Comment.objects.create(content=f"comment {i}", author=self.user, content_object=test_post)
+            for i in range(3)
+        ]
+        response = self.client.get(reverse('get_comment_list_of_object'), {
+            "content_type": "Post",
+            "object_id": test_post.post_id,
+            "cursor": "",
+            "page_size": 2
+        })
+        data = json.loads(response.content.decode('utf-8'))
+        self.assertEqual([c["comment_id"] for c in data["data"]["comments"]],
+                         [comments[2].comment_id, comments[1].comment_id])
+        response = self.client.get(reverse('get_comment_list_of_object'), {
+            "content_type": "Post",
+            "object_id": test_post.post_id,
+            "cursor": data["data"]["next_cursor"],
+            "page_size": 2
+        })
+        data = json.loads(response.content.decode('utf-8'))
+        self.assertEqual([c["comment_id"] for c in data["data"]["comments"]], [comments[0].comment_id])
+        self.assertIsNone(data["data"]["next_cursor"])
+
     def test_get_post_detail_bad_method(self):
         response = self.client.post(reverse('get_post_detail_by_id'))
         self.assertEqual(response.status_code, 405)
@@ -743,6 +855,22 @@ class ForumTests(TestCase):
         self.assertEqual(data["data"]["title"], "Test Post")
         self.assertEqual(data["data"]["content"], "This is a test post")
         self.assertEqual(data["data"]["author"], self.username)
+
+    def test_get_post_detail_response_cache(self):
+        test_post = Post.objects.create(title="Test Post", content="This is a test post", author=self.user)
+        def detail():
+            response = self.client.get(reverse('get_post_detail_by_id'), {"post_id": str(test_post.post_id)})
+            return json.loads(response.content.decode('utf-8'))["data"]
+        detail()
+        # 命中缓存时不访问数据库
+        with self.assertNumQueries(0):
+            self.assertEqual(detail()["title"], "Test Post")
+        # 评论增删经由计数器使缓存失效，帖子修改经由 post_save 使缓存失效
+        Comment.objects.create(content="comment", author=self.user, content_object=test_post)
+        self.assertEqual(detail()["comment_count"], 1)
+        test_post.title = "Edited"
+        test_post.save()
+        self.assertEqual(detail()["title"], "Edited")
     
     def test_create_comment_bad_method(self):
         response = self.client.get(reverse('create_comment'))
@@ -1124,6 +1252,81 @@ class ForumTests(TestCase):
         self.assertEqual(data["data"]["total_pages"], 1)
         self.assertEqual(data["data"]["total_comments"], 1)
 
+    def test_comment_counters_follow_create_and_delete(self):
+        test_post = Post.objects.create(title="Test Post", content="This is a test post", author=self.user)
+        root = Comment.objects.create(content="root", author=self.user, content_object=test_post)
+        child = Comment.objects.create(content="child", author=self.user, content_object=root)
+        Comment.objects.create(content="grandchild", author=self.user, content_object=child)
+        Comment.objects.create(content="sibling", author=self.user, content_object=root)
+        Comment.objects.create(content="other", author=self.user, content_object=test_post)
+
+        def counts(obj):
+            obj.refresh_from_db()
+            return obj.comment_count, obj.total_comment_count
+
+        self.assertEqual(counts(test_post), (2, 5))
+        self.assertEqual(counts(root), (2, 3))
+        self.assertEqual(counts(child), (1, 1))
+
+        child.delete()
+        self.assertEqual(counts(test_post), (2, 3))
+        self.assertEqual(counts(root), (1, 1))
+
+        response = self.client.get(reverse('get_post_list'), {"page": 1, "page_size": 10})
+        data = json.loads(response.content.decode('utf-8'))
+        self.assertEqual(data["data"]["posts"][0]["comment_count"], 2)
+        self.assertEqual(data["data"]["posts"][0]["total_comment_count"], 3)
+
+    def test_comment_counters_follow_cascade_delete(self):
+        test_post = Post.objects.create(title="Test Post", content="This is a test post", author=self.no_permission_user)
+        kept = Comment.objects.create(content="kept", author=self.no_permission_user, content_object=test_post)
+        root = Comment.objects.create(content="root", author=self.user, content_object=test_post)
+        child = Comment.objects.create(content="child", author=self.user, content_object=root)
+        Comment.objects.create(content="grandchild", author=self.no_permission_user, content_object=child)
+        Comment.objects.create(content="reply", author=self.user, content_object=kept)
+
+        # 删除用户会在同一批中级联删除顶层评论与它下面的回复
+        self.user.delete()
+        self.assertEqual(list(Comment.objects.values_list("content", flat=True)), ["kept"])
+        test_post.refresh_from_db()
+        kept.refresh_from_db()
+        self.assertEqual((test_post.comment_count, test_post.total_comment_count), (1, 1))
+        self.assertEqual((kept.comment_count, kept.total_comment_count), (0, 0))
+
+    def test_get_comment_list_of_object_uses_counter(self):
+        test_post = Post.objects.create(title="Test Post", content="This is a test post", author=self.user)
+        for i in range(3):
+            Comment.objects.create(content=f"comment {i}", author=self.user, content_object=test_post)
+
+        # 父对象计数器一次、评论列表一次，不再单独 COUNT
+        with self.assertNumQueries(2):
+            response = self.client.get(reverse('get_comment_list_of_object'), {
+                "content_type": "Post",
+                "object_id": test_post.post_id,
+                "page": 1,
+                "page_size": 2
+            })
+        data = json.loads(response.content.decode('utf-8'))
+        self.assertEqual(data["data"]["total_pages"], 2)
+        self.assertEqual(data["data"]["total_comments"], 3)
+
+    def test_reconcile_comment_counts(self):
+        test_post = Post.objects.create(title="Test Post", content="This is a test post", author=self.user)
+        # bulk_create 插入的回复不会触发计数器更新
+        root = build_comment_tree(test_post, self.user, 30, 3)
+        Post.objects.filter(pk=test_post.pk).update(comment_count=7)
+
+        out = StringIO()
+        call_command("reconcile_comment_counts", stdout=out)
+        self.assertIn("已修正帖子 1 条", out.getvalue())
+
+        test_post.refresh_from_db()
+        root.refresh_from_db()
+        self.assertEqual((test_post.comment_count, test_post.total_comment_count), (1, 30))
+        self.assertEqual((root.comment_count, root.total_comment_count), (3, 29))
+        leaf = Comment.objects.filter(path__startswith=root.subtree_path).order_by("-depth").first()
+        self.assertEqual((leaf.comment_count, leaf.total_comment_count), (0, 0))
+
     def test_get_reply_list_of_comment_bad_method(self):
         response = self.client.post(reverse('get_reply_list_of_comment'))
         self.assertEqual(response.status_code, 405)
@@ -1174,7 +1377,45 @@ class ForumTests(TestCase):
         self.assertEqual(data["data"][0]["father_object_id"], test_post.post_id)
         self.assertEqual(data["data"][1]["father_object_id"], test_comment1.comment_id)
         self.assertEqual(data["data"][2]["father_object_id"], test_comment2.comment_id)
-        
+
+    def test_comment_tree_position(self):
+        test_post = Post.objects.create(
+            title="Test Post",
+            content="This is a test post",
+            author=self.user)
+        root = Comment.objects.create(content="root", author=self.user, content_object=test_post)
+        child = Comment.objects.create(content="child", author=self.user, content_object=root)
+        grandchild = Comment.objects.create(content="grandchild", author=self.user, content_object=child)
+        self.assertEqual((root.root_id, root.depth, root.path), (None, 0, ""))
+        self.assertEqual((child.root_id, child.depth, child.path), (root.comment_id, 1, root.subtree_path))
+        self.assertEqual((grandchild.root_id, grandchild.depth), (root.comment_id, 2))
+        self.assertTrue(grandchild.path.startswith(root.subtree_path))
+        self.assertEqual(grandchild.path, child.subtree_path)
+
+    def test_get_reply_list_of_comment_constant_queries(self):
+        test_post = Post.objects.create(
+            title="Test Post",
+            content="This is a test post",
+            author=self.user)
+        root = Comment.objects.create(content="root", author=self.user, content_object=test_post)
+        parent = root
+        for i in range(20):
+            Comment.objects.create(content=f"sibling {i}", author=self.no_permission_user, content_object=parent)
+            parent = Comment.objects.create(content=f"reply {i}", author=self.user, content_object=parent)
+        other_root = Comment.objects.create(content="other", author=self.user, content_object=test_post)
+        Comment.objects.create(content="other reply", author=self.user, content_object=other_root)
+
+        # 评论本身 + 回复列表各一次查询，与树的大小无关
+        with self.assertNumQueries(2):
+            response = self.client.get(reverse('get_reply_list_of_comment'), {
+                "comment_id": root.comment_id,
+            })
+        data = json.loads(response.content.decode('utf-8'))
+        self.assertEqual(data["code"], 0)
+        self.assertEqual(len(data["data"]), 41)
+        self.assertEqual(data["data"][0]["comment_id"], root.comment_id)
+        self.assertEqual(data["data"][-1]["comment_id"], parent.comment_id)
+
     def test_delete_comment_bad_method(self):
         response = self.client.get(reverse('delete_comment'))
         self.assertEqual(response.status_code, 405)
@@ -1265,6 +1506,44 @@ class ForumTests(TestCase):
         self.assertEqual(data["msg"], "Comment deleted successfully")
         self.assertEqual(Comment.objects.count(), 0)
 
+    def test_delete_comment_keeps_other_branches(self):
+        test_post = Post.objects.create(
+            title="Test Post",
+            content="This is a test post",
+            author=self.user
+        )
+        root = Comment.objects.create(content="root", author=self.user, content_object=test_post)
+        branch = Comment.objects.create(content="branch", author=self.user, content_object=root)
+        Comment.objects.create(content="leaf", author=self.user, content_object=branch)
+        sibling = Comment.objects.create(content="sibling", author=self.user, content_object=root)
+        sibling_reply = Comment.objects.create(content="sibling reply", author=self.user, content_object=sibling)
+
+        branch.delete()
+        self.assertEqual(
+            set(Comment.objects.values_list("comment_id", flat=True)),
+            {root.comment_id, sibling.comment_id, sibling_reply.comment_id}
+        )
+
+    def test_delete_post_comment_tree_bounded_queries(self):
+        test_post = Post.objects.create(
+            title="Test Post",
+            content="This is a test post",
+            author=self.user
+        )
+        other_post = Post.objects.create(
+            title="Other Post",
+            content="This is another post",
+            author=self.user
+        )
+        build_comment_tree(test_post, self.user, 2500, 4)
+        build_comment_tree(test_post, self.user, 500, 2)
+        kept = Comment.objects.create(content="kept", author=self.user, content_object=other_post)
+
+        # 删除帖子两次 + 查找评论一次 + 每 DELETE_BATCH_SIZE 条评论一次 DELETE + 保存点两次
+        with self.assertNumQueries(8):
+            test_post.delete()
+        self.assertEqual(list(Comment.objects.values_list("comment_id", flat=True)), [kept.comment_id])
+
     def test_search_post_by_keyword_bad_method(self):
         response = self.client.post(reverse('search_post_by_keyword'))
         self.assertEqual(response.status_code, 405)
@@ -1308,6 +1587,55 @@ class ForumTests(TestCase):
         self.assertEqual(data["data"]["posts"][0]["post_id"], test_post2.post_id)
         self.assertEqual(data["data"]["posts"][1]["post_id"], test_post1.post_id)
 
+    def test_search_post_by_keyword_ranks_title_first(self):
+        content_hit = Post.objects.create(
+            title="Weekly notes",
+            content="Basketball final tonight",
+            author=self.user
+        )
+        title_hit = Post.objects.create(
+            title="Basketball final",
+            content="See you there",
+            author=self.user
+        )
+        Post.objects.create(
+            title="Football",
+            content="Nothing about that sport",
+            author=self.user
+        )
+        response = self.client.get(reverse('search_post_by_keyword'), {
+            "keyword": "basket",
+            "page": 1,
+            "page_size": 10
+        })
+        data = json.loads(response.content.decode('utf-8'))
+        self.assertEqual(data["code"], 0)
+        self.assertEqual(data["data"]["total_posts"], 2)
+        self.assertEqual(
+            [post["post_id"] for post in data["data"]["posts"]],
+            [title_hit.post_id, content_hit.post_id]
+        )
+
+    def test_search_post_by_keyword_cjk(self):
+        post = Post.objects.create(
+            title="周末篮球赛",
+            content="紫荆篮球场见",
+            author=self.user
+        )
+        Post.objects.create(
+            title="足球",
+            content="东操",
+            author=self.user
+        )
+        response = self.client.get(reverse('search_post_by_keyword'), {
+            "keyword": "篮球",
+            "page": 1,
+            "page_size": 10
+        })
+        data = json.loads(response.content.decode('utf-8'))
+        self.assertEqual(data["data"]["total_posts"], 1)
+        self.assertEqual(data["data"]["posts"][0]["post_id"], post.post_id)
+
     def test_get_comment_detail_by_id_bad_method(self):
         response = self.client.post(reverse('get_comment_detail_by_id'))
         self.assertEqual(response.status_code, 405)
@@ -1681,6 +2009,67 @@ class ForumTests(TestCase):
         data = json.loads(response.content.decode('utf-8'))
         self.assertEqual(data, ErrorCode.NO_PERMISSION)
 
+    def test_get_report_list_batch_resolves_states(self):
+        def create_reports(count):
+            for i in range(count):
+                post = Post.objects.create(title=f"Post {i}", content="This is a test post", author=self.no_permission_user)
+                comment = Comment.objects.create(content=f"Comment {i}", author=self.user, content_object=post)
+                for target in (post, comment):
+                    Report.objects.create(
+                        reporter=self.user,
+                        reported_user=target.author,
+                        reported_content=target.content,
+                        content_object=target,
+                        reason="This is a test reason"
+                    )
+                if i % 2 == 0:
+                    Post.objects.filter(pk=post.pk).delete()
+
+        def fetch():
+            response = self.client.get(reverse('get_report_list'), {"page": 1, "page_size": 100})
+            return json.loads(response.content.decode('utf-8'))
+
+        create_reports(2)
+        with self.assertNumQueries(5) as small:
+            fetch()
+        create_reports(20)
+        # 查询次数与举报数量无关：计数、分页、每种对象类型一次、封禁状态一次
+        with self.assertNumQueries(len(small.captured_queries)):
+            data = fetch()
+
+        reports = data["data"]["reports"]
+        self.assertEqual(len(reports), 44)
+        for report in reports:
+            if report["content_type"] == "Post":
+                self.assertEqual(report["user_banned"], True)
+                self.assertEqual(report["object_deleted"], not Post.objects.filter(pk=report["object_id"]).exists())
+            else:
+                self.assertEqual(report["user_banned"], False)
+                self.assertEqual(report["object_deleted"], not Comment.objects.filter(pk=report["object_id"]).exists())
+
+    def test_get_report_list_cursor(self):
+        test_post = Post.objects.create(title="Test Post", content="This is a test post", author=self.user)
+        reports = [
+            Report.objects.create(
+                reporter=self.user,
+                reported_user=test_post.author,
+                reported_content=test_post.content,
+                content_object=test_post,
+                reason=f"reason {i}"
+            )
+            for i in range(3)
+        ]
+        response = self.client.get(reverse('get_report_list'), {"cursor": "", "page_size": 2, "with_count": "true"})
+        data = json.loads(response.content.decode('utf-8'))
+        self.assertEqual(data["code"], 0)
+        self.assertEqual(data["data"]["total_reports"], 3)
+        self.assertEqual([r["report_id"] for r in data["data"]["reports"]],
+                         [reports[2].report_id, reports[1].report_id])
+        response = self.client.get(reverse('get_report_list'), {"cursor": data["data"]["next_cursor"], "page_size": 2})
+        data = json.loads(response.content.decode('utf-8'))
+        self.assertEqual([r["report_id"] for r in data["data"]["reports"]], [reports[0].report_id])
+        self.assertIsNone(data["data"]["next_cursor"])
+
     def test_ban_reported_user_success(self):
         test_post = Post.objects.create(
             title="Test Post",
@@ -1703,4 +2092,78 @@ class ForumTests(TestCase):
         data = json.loads(response.content.decode('utf-8'))
         self.assertEqual(data["code"], 0)
         self.assertEqual(data["msg"], "Permission removed successfully")
-        self.assertEqual(UserPermission.objects.filter(user=test_report.reporter, permission=PERMISSION_FORUM_POST).exists(), False)
\ No newline at end of file
+        self.assertEqual(UserPermission.objects.filter(user=test_report.reporter, permission=PERMISSION_FORUM_POST).exists(), False)
+
+FAKE_DATA_OPTIONS = dict(users=30, posts=40, competitions=40, participants=20, tags=10,
+                         comments=200, likes=60, focuses=60, reports=10, max_reply_depth=4)
+
+class GenerateFakeDataTests(TestCase):
+    """
+    generate_fake_data 生成的数据：相同种子可复现，冗余字段与实际数据一致，评论树结构正确
+    """
+    def generate(self, **options):
+        # 固定当前时间，使生成的时间字段与 auto_now 字段可复现
+        with mock.patch("django.utils.timezone.now", return_value=datetime(2025, 1, 1, tzinfo=dt_timezone.utc)):
+            call_command("generate_fake_data", stdout=StringIO(), **{**FAKE_DATA_OPTIONS, **options})
+
+    def snapshot(self):
+        models = [User, Tag, Post, Comment, Report, Participant, Competition, Focus, Like, UserPermission,
+                  Post.tags.through, Competition.tags.through, Competition.participants.through]
+        return {model._meta.db_table: list(model.objects.order_by("pk").values_list()) for model in models}
+
+    def test_same_seed_same_rows(self):
+        self.generate(seed=7)
+        first = self.snapshot()
+        self.generate(seed=7)
+        self.assertEqual(self.snapshot(), first)
+        self.generate(seed=8)
+        self.assertNotEqual(self.snapshot(), first)
+
+    def test_copy_matches_bulk_create(self):
+        self.generate(seed=3)
+        expected = self.snapshot()
+        self.generate(seed=3, copy=True)
+        self.assertEqual(self.snapshot(), expected)
+
+    def test_summary_columns_match_rows(self):
+        self.generate(seed=1)
+        out = StringIO()
+        call_command("reconcile_comment_counts", stdout=out)
+        self.assertIn("已修正帖子 0 条，赛事 0 条，评论 0 条", out.getvalue())
+
+        likes = Counter(Like.objects.values_list("participant_id", flat=True))
+        for participant_id, like_count in Participant.objects.values_list("id", "like_count"):
+            self.assertEqual(like_count, likes[participant_id])
+
+        post_tags = defaultdict(list)
+        for post_id, tag_id in Post.tags.through.objects.order_by("tag_id").values_list("post_id", "tag_id"):
+            post_tags[post_id].append(tag_id)
+        for post_id, tag_ids in Post.objects.values_list("post_id", "tag_ids"):
+            self.assertEqual(tag_ids, post_tags[post_id])
+
+        competition_tags = defaultdict(list)
+        for competition_id, tag_id in Competition.tags.through.objects.order_by("tag_id").values_list("competition_id", "tag_id"):
+            competition_tags[competition_id].append(tag_id)
+        for competition_id, tag_ids in Competition.objects.values_list("id", "tag_ids"):
+            self.assertEqual(tag_ids, competition_tags[competition_id])
+
+    def test_comment_tree_positions(self):
+        self.generate(seed=2)
+        comment_type = ContentType.objects.get_for_model(Comment)
+        comments = {comment.comment_id: comment for comment in Comment.objects.all()}
+        self.assertTrue(any(comment.depth > 0 for comment in comments.values()))
+        for comment in comments.values():
+            self.assertLessEqual(comment.depth, FAKE_DATA_OPTIONS["max_reply_depth"])
+            if comment.content_type_id != comment_type.id:
+                self.assertEqual((comment.root_id, comment.depth, comment.path), (None, 0, ""))
+                continue
+            parent = comments[comment.object_id]
+            self.assertEqual(comment.root_id, parent.root_id or parent.comment_id)
+            self.assertEqual(comment.depth, parent.depth + 1)
+            self.assertEqual(comment.path, parent.subtree_path)
+            self.assertGreaterEqual(comment.created_at, parent.created_at)
+
+    def test_max_reply_depth_zero(self):
+        self.generate(seed=2, max_reply_depth=0)
+        self.assertEqual(Comment.objects.count(), FAKE_DATA_OPTIONS["comments"])
+        self.assertFalse(Comment.objects.exclude(depth=0).exists())
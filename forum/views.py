@@ -9,15 +9,22 @@ from settings.models import UserPermission
 from .models import Post, Comment, Report
 from competitions.models import Competition
 from tag.models import Tag, TagType
+from tag.registry import get_tag_registry
 from django.contrib.contenttypes.models import ContentType
 from utils.utils_request import BAD_METHOD, request_failed, request_success, return_field
 from utils.utils_require import check_require, require, ErrorCode
+from utils.utils_schema import compile_schema, validate_request
 from django.core.paginator import Paginator, EmptyPage
 from utils import utils_time
 from utils.utils_permission import has_permission, PERMISSION_FORUM_MANAGE_FORUM, PERMISSION_FORUM_POST, PERMISSION_FORUM_POST_HIGHLIGHT
 from utils.utils_permission import add_permission, remove_permission
-from utils.utils_forum import get_reply_list_by_dfs, get_post_info_by_paginator, get_comment_info_by_paginator, get_user_post_tag_from_body
+from utils.utils_forum import get_reply_list_by_path, get_post_info_by_paginator, get_comment_info_by_paginator, get_user_post_tag_from_body
+from utils.utils_forum import get_post_info_by_cursor, get_comment_info_by_cursor, resolve_report_states
+from utils.utils_forum import aget_post_info_by_cursor, aget_post_info_by_paginator, post_to_dict
+from utils.utils_pagination import InvalidCursor, get_cursor_info, paginate_by_cursor
 from utils.utils_params import get_user, get_post, get_comment, get_report, get_tag, get_page_info
+from utils.utils_response_cache import acache_response, aget_cached_response, cache_response, get_cached_response, instance_tag, model_tag
+from utils.utils_search import search_posts
 
 CONTENT_TYPE = {
     "Post" : Post,
@@ -78,11 +85,11 @@ def create_post_with_tag(req: HttpRequest):
             "msg": "Too many tags"
         })
 
+    registry = get_tag_registry()
     tags = list()
     for tag_id in tag_ids:
-        try:
-            tag = Tag.objects.get(id=tag_id)
-        except Tag.DoesNotExist:
+        tag = registry.get(tag_id)
+        if tag is None:
             return request_success({
                 "code": 1046,
                 "msg": f"Invalid tag id: {tag_id}"
@@ -100,7 +107,7 @@ def create_post_with_tag(req: HttpRequest):
         tags.append(tag)
 
     post = Post.objects.create(title=title, content=content, author=user, created_at=utils_time.get_timestamp())
-    post.tags.set(tags)
+    post.tags.set([tag.id for tag in tags])
     return request_success({
             "code": 0, 
             "msg": "Post created successfully"
@@ -114,7 +121,7 @@ def get_tag_list_by_post_id(req: HttpRequest):
         post = get_post(req.GET, "post_id")
     except Post.DoesNotExist:
         return request_success(ErrorCode.POST_DOES_NOT_EXIST)
-    tags = post.tags.all()
+    tags = get_tag_registry().get_many(post.tag_ids)
     return request_success({
         "code": 0,
         "data": [
@@ -151,13 +158,12 @@ def add_tag_to_post(req: HttpRequest):
             "code": 1048,
             "msg": "No permission for highlight tag"
         })
-    if len(post.tags.all()) + 1 > TAG_NUM_LIMIT:
+    if len(post.tag_ids) + 1 > TAG_NUM_LIMIT:
         return request_success({
             "code": 1045,
             "msg": "Too many tags"
         })
-    post.tags.add(tag)
-    post.save()
+    post.tags.add(tag.id)
     return request_success({
         "code": 0,
         "msg": "Tag added to post successfully"
@@ -173,15 +179,14 @@ def remove_tag_from_post(req: HttpRequest):
     if error:
         return request_success(error)
 
-    if tag not in post.tags.all():
+    if tag.id not in post.tag_ids:
         return request_success({
             "code": 1050,
             "msg": f"Tag is not in the post"
         })
     if not (has_permission(user, PERMISSION_FORUM_MANAGE_FORUM) or post.author == user) :
         return request_success(ErrorCode.NO_PERMISSION)
-    post.tags.remove(tag)
-    post.save()
+    post.tags.remove(tag.id)
     return request_success({
         "code": 0,
         "msg": "Tag removed from post successfully"
@@ -230,48 +235,114 @@ def delete_comment(req: HttpRequest):
         "msg": "Comment deleted successfully"
     })
 
-@check_require
-def get_post_list(req: HttpRequest):
-    if req.method != 'GET':
-        return BAD_METHOD
-    tag_list = req.GET.getlist("tag_list")
+def get_post_list_params(params):
+    """
+    解析帖子列表的请求参数，返回 (帖子查询集, 游标信息, 缓存参数, 是否第一页)。
+    页码模式下游标信息为 None，页码与每页数量在缓存参数中
+    """
+    tag_list = params.getlist("tag_list")
     try:
-        keyword = require(req.GET, "keyword", "string")
+        keyword = require(params, "keyword", "string")
     except KeyError:
         keyword = ""
-    page, page_size = get_page_info(req.GET)
-    tag_list = list(set(tag_list))
-    tag_num = len(tag_list)
-    query_tags = Tag.objects.filter(id__in=tag_list)
-    if tag_num == 0:
+    cursor_info = get_cursor_info(params)
+    if cursor_info is None:
+        page, page_size = get_page_info(params)
+    tag_list = sorted(set(int(tag_id) for tag_id in tag_list))
+    # 只缓存第一页：游标为空串，或页码模式的第 1 页
+    if cursor_info is not None:
+        cache_params = {"tag_list": tag_list, "keyword": keyword, "page_size": cursor_info[1], "with_count": cursor_info[2]}
+        first_page = cursor_info[0] == ""
+    else:
+        cache_params = {"tag_list": tag_list, "keyword": keyword, "page_size": page_size, "page": page}
+        first_page = page == 1
+    if len(tag_list) == 0:
         posts = Post.objects.all()
     else:
-        posts = (
-            Post.objects
-            .annotate(
-                matching_tag_count = Count('tags', filter = Q(tags__in = query_tags), distinct=True)
-            )
-            .filter(matching_tag_count = tag_num)
-        )
-    posts = posts.filter(Q(title__icontains=keyword) | Q(content__icontains=keyword)).order_by('-created_at', '-post_id')
-    paginator = Paginator(posts, page_size)
-    try:
-        return request_success({
-            "code": 0,
-            "data": get_post_info_by_paginator(paginator, page)
-        })
-    except EmptyPage:
-        return request_success(ErrorCode.PAGE_OUT_OF_RANGE)
+        # tag_ids 上的 GIN 倒排索引直接对各标签的帖子列表求交
+        posts = Post.objects.filter(tag_ids__contains=tag_list)
+    posts = search_posts(posts, keyword).select_related("author")
+    return posts, cursor_info, cache_params, first_page
+
+def get_post_list_cache_tags(data):
+    # 任一帖子增删改都可能改变第一页；本页帖子的评论数变化只影响本页
+    return [model_tag(Post)] + [instance_tag(Post, post["post_id"]) for post in data["posts"]]
+
+@check_require
+def get_post_list(req: HttpRequest):
+    if req.method != 'GET':
+        return BAD_METHOD
+    posts, cursor_info, cache_params, first_page = get_post_list_params(req.GET)
+    if first_page:
+        response, seq = get_cached_response("get_post_list", cache_params)
+        if response is not None:
+            return response
+    if cursor_info is not None:
+        try:
+            data = get_post_info_by_cursor(posts, *cursor_info)
+        except InvalidCursor:
+            return request_success(ErrorCode.INVALID_CURSOR)
+    else:
+        try:
+            data = get_post_info_by_paginator(Paginator(posts, cache_params["page_size"]), cache_params["page"])
+        except EmptyPage:
+            return request_success(ErrorCode.PAGE_OUT_OF_RANGE)
+    response = request_success({
+        "code": 0,
+        "data": data
+    })
+    if not first_page:
+        return response
+    return cache_response("get_post_list", cache_params, response, get_post_list_cache_tags(data), seq)
+
+# get_post_list 的异步版本，ASGI 下通过异步 ORM 查询
+@check_require
+async def aget_post_list(req: HttpRequest):
+    if req.method != 'GET':
+        return BAD_METHOD
+    posts, cursor_info, cache_params, first_page = get_post_list_params(req.GET)
+    if first_page:
+        response, seq = await aget_cached_response("get_post_list", cache_params)
+        if response is not None:
+            return response
+    if cursor_info is not None:
+        try:
+            data = await aget_post_info_by_cursor(posts, *cursor_info)
+        except InvalidCursor:
+            return request_success(ErrorCode.INVALID_CURSOR)
+    else:
+        try:
+            data = await aget_post_info_by_paginator(Paginator(posts, cache_params["page_size"]), cache_params["page"])
+        except EmptyPage:
+            return request_success(ErrorCode.PAGE_OUT_OF_RANGE)
+    response = request_success({
+        "code": 0,
+        "data": data
+    })
+    if not first_page:
+        return response
+    return await acache_response("get_post_list", cache_params, response, get_post_list_cache_tags(data), seq)
 
 @check_require
 def search_post_by_keyword(req: HttpRequest):
     if req.method != 'GET':
         return BAD_METHOD
     keyword = require(req.GET, "keyword", "string")
+    cursor_info = get_cursor_info(req.GET)
+    if cursor_info is not None:
+        # 游标按时间定位，游标模式下结果按时间倒序而不是按相关度排序
+        posts = search_posts(Post.objects.all(), keyword).select_related("author")
+        try:
+            return request_success({
+                "code": 0,
+                "data": get_post_info_by_cursor(posts, *cursor_info)
+            })
+        except InvalidCursor:
+            return request_success(ErrorCode.INVALID_CURSOR)
     page = require(req.GET, "page", "int")
     page_size = require(req.GET, "page_size", "int")
 
-    posts = Post.objects.filter(Q(title__icontains=keyword) | Q(content__icontains=keyword)).order_by('-created_at', '-post_id')
+    posts = search_posts(Post.objects.all(), keyword, rank=True).select_related("author")
     paginator = Paginator(posts, page_size)
     try:
         return request_success({
@@ -299,27 +370,46 @@ def get_comment_detail_by_id(req: HttpRequest):
             "allow_reply": comment.allow_reply,
             "object_id": comment.object_id,
             "content_type": comment.content_type.model_class().__name__,
+            "comment_count": comment.comment_count,
+            "total_comment_count": comment.total_comment_count,
         }
     })
 
+POST_DETAIL_SCHEMA = compile_schema({"post_id": "int"})
+
 @check_require
-def get_post_detail_by_id(req: HttpRequest):
-    if req.method != 'GET':
-        return BAD_METHOD
+@validate_request("GET", POST_DETAIL_SCHEMA)
+def get_post_detail_by_id(req: HttpRequest, params):
+    cache_params = {"post_id": params["post_id"]}
+    response, seq = get_cached_response("get_post_detail_by_id", cache_params)
+    if response is not None:
+        return response
     try:
-        post = get_post(req.GET, "post_id")
+        post = Post.objects.get(pk=cache_params["post_id"])
     except Post.DoesNotExist:
         return request_success(ErrorCode.POST_DOES_NOT_EXIST)
-    return request_success({
+    return cache_response("get_post_detail_by_id", cache_params, request_success({
         "code": 0,
-        "data": {
-            "post_id": post.post_id,
-            "title": post.title,
-            "content": post.content,
-            "created_at": post.created_at,
-            "author": post.author.username,
-        }
-    })
+        "data": post_to_dict(post)
+    }), [instance_tag(Post, post.pk)], seq)
+
+# get_post_detail_by_id 的异步版本
+@check_require
+@validate_request("GET", POST_DETAIL_SCHEMA)
+async def aget_post_detail_by_id(req: HttpRequest, params):
+    cache_params = {"post_id": params["post_id"]}
+    response, seq = await aget_cached_response("get_post_detail_by_id", cache_params)
+    if response is not None:
+        return response
+    try:
+        # 异步视图中不能惰性加载外键，作者随帖子一并取出
+        post = await Post.objects.select_related("author").aget(pk=cache_params["post_id"])
+    except Post.DoesNotExist:
+        return request_success(ErrorCode.POST_DOES_NOT_EXIST)
+    return await acache_response("get_post_detail_by_id", cache_params, request_success({
+        "code": 0,
+        "data": post_to_dict(post)
+    }), [instance_tag(Post, post.pk)], seq)
 
 @check_require
 def create_comment_of_post(req: HttpRequest):
@@ -355,9 +445,18 @@ def get_comment_list_by_post_id(req: HttpRequest):
         post = get_post(req.GET, "post_id")
     except Post.DoesNotExist:
         return request_success(ErrorCode.POST_DOES_NOT_EXIST)
-    page, page_size = get_page_info(req.GET)
     comments = Comment.objects.filter(content_type=ContentType.objects.get_for_model(Post),
-                                      object_id=post.post_id).order_by('-created_at', '-comment_id')
+                                      object_id=post.post_id).order_by('-created_at', '-comment_id').select_related("author")
+    cursor_info = get_cursor_info(req.GET)
+    if cursor_info is not None:
+        try:
+            return request_success({
+                "code": 0,
+                "data": get_comment_info_by_cursor(comments, *cursor_info)
+            })
+        except InvalidCursor:
+            return request_success(ErrorCode.INVALID_CURSOR)
+    page, page_size = get_page_info(req.GET)
     paginator = Paginator(comments, page_size)
     try:
         return request_success({
@@ -416,18 +515,30 @@ def get_comment_list_of_object(req: HttpRequest):
     content_type = require(req.GET, "content_type", "string")
     object_id = require(req.GET, "object_id", "int")
 
-    page, page_size = get_page_info(req.GET)
+    cursor_info = get_cursor_info(req.GET)
+    if cursor_info is None:
+        page, page_size = get_page_info(req.GET)
 
     if content_type not in CONTENT_TYPE.keys():
         return request_success(ErrorCode.INVALID_CONTENT_TYPE)
     content_type_model = CONTENT_TYPE.get(content_type)
+    # 只取父对象的直接评论计数，既检查存在性又省去对评论表的 COUNT 查询
     try:
-        content_type_model.objects.get(pk=object_id)
+        comment_count = content_type_model.objects.values_list("comment_count", flat=True).get(pk=object_id)
     except content_type_model.DoesNotExist:
         return request_success(ErrorCode.OBJECT_DOES_NOT_EXIST)
     comments = Comment.objects.filter(content_type=ContentType.objects.get_for_model(content_type_model),
-                                      object_id=object_id).order_by('-created_at', '-comment_id')
+                                      object_id=object_id).order_by('-created_at', '-comment_id').select_related("author")
+    if cursor_info is not None:
+        try:
+            return request_success({
+                "code": 0,
+                "data": get_comment_info_by_cursor(comments, *cursor_info, total=comment_count)
+            })
+        except InvalidCursor:
+            return request_success(ErrorCode.INVALID_CURSOR)
     paginator = Paginator(comments, page_size)
+    paginator.count = comment_count
     try:
         return request_success({
             "code": 0,
@@ -445,7 +556,7 @@ def get_reply_list_of_comment(req: HttpRequest):
     except Comment.DoesNotExist:
         return request_success(ErrorCode.COMMENT_DOES_NOT_EXIST)
 
-    reply_list = get_reply_list_by_dfs(comment)
+    reply_list = get_reply_list_by_path(comment)
     return request_success({
         "code": 0,
         "data": reply_list
@@ -516,33 +627,33 @@ def get_report_list(req: HttpRequest):
         solved_state = require(req.GET, "solved_state", "bool")
     except KeyError:
         solved_state = None
-    page, page_size = get_page_info(req.GET)
     if solved_state is not None:
         reports = Report.objects.filter(solved=solved_state).order_by('-created_at', '-report_id')
     else:
         reports = Report.objects.all().order_by('-created_at', '-report_id')
-    paginator = Paginator(reports, page_size)
-    try:
-        page_obj = paginator.page(page)
-    except EmptyPage:
-        return request_success(ErrorCode.PAGE_OUT_OF_RANGE)
-    data = []
-    for report in page_obj:
-        content_type_model = report.content_type.model_class()
-        object_deleted = False
-        user_banned = False
+    reports = reports.select_related("reporter", "reported_user")
+    cursor_info = get_cursor_info(req.GET)
+    if cursor_info is not None:
+        cursor, page_size, with_count = cursor_info
+        try:
+            page_obj, next_cursor, total = paginate_by_cursor(reports, cursor, page_size, "report_id", with_count)
+        except InvalidCursor:
+            return request_success(ErrorCode.INVALID_CURSOR)
+    else:
+        page, page_size = get_page_info(req.GET)
+        paginator = Paginator(reports, page_size)
         try:
-            content_type_model.objects.get(pk=report.object_id)
-        except content_type_model.DoesNotExist:
-            object_deleted = True
-        try: 
-            UserPermission.objects.get(user=report.reported_user, permission=PERMISSION_FORUM_POST)
-        except UserPermission.DoesNotExist:
-            user_banned = True
+            page_obj = paginator.page(page)
+        except EmptyPage:
+            return request_success(ErrorCode.PAGE_OUT_OF_RANGE)
+    page_reports = list(page_obj)
+    report_states = resolve_report_states(page_reports)
+    data = []
+    for report in page_reports:
         data.append({
             "report_id": report.report_id,
             "reporter": report.reporter.username,
-            "content_type": report.content_type.model_class().__name__,
+            "content_type": ContentType.objects.get_for_id(report.content_type_id).model_class().__name__,
             "object_id": report.object_id,
             "reason": report.reason,
             "created_at": report.created_at,
@@ -551,8 +662,18 @@ def get_report_list(req: HttpRequest):
                 "author": report.reported_user.username,
                 "content": report.reported_content
             },
-            "object_deleted": object_deleted,
-            "user_banned": user_banned
+            **report_states[report.report_id]
+        })
+    if cursor_info is not None:
+        cursor_data = {
+            "reports": data,
+            "next_cursor": next_cursor
+        }
+        if with_count:
+            cursor_data["total_reports"] = total
+        return request_success({
+            "code": 0,
+            "data": cursor_data
         })
     return request_success({
         "code": 0,
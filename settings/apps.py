@@ -4,3 +4,5 @@ from django.apps import AppConfig
 class SettingsConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "settings"
+    def ready(self):
+        import settings.signals  # 确保 signals 被自动加载
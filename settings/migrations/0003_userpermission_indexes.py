@@ -0,0 +1,20 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("settings", "0002_alter_userpermission_permission_info"),
+        ("users", "0005_outgoingemail"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="userpermission",
+            index=models.Index(fields=["user", "permission", "permission_info"], name="settings_userperm_user_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="userpermission",
+            index=models.Index(fields=["permission", "permission_info"], name="settings_userperm_perm_idx"),
+        ),
+    ]
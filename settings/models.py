@@ -7,5 +7,13 @@ class UserPermission(models.Model):
     permission = models.CharField(max_length=255)
     permission_info = models.CharField(max_length=255, blank=True)
 
+    class Meta:
+        indexes = [
+            # 按用户取全部权限、按 (用户, 权限, 权限信息) 检查或删除单条权限
+            models.Index(fields=["user", "permission", "permission_info"], name="settings_userperm_user_idx"),
+            # 按 (权限, 权限信息) 反查拥有者，如某赛事的管理员列表
+            models.Index(fields=["permission", "permission_info"], name="settings_userperm_perm_idx"),
+        ]
+
     def __str__(self):
         return f"{self.user.username} - {self.permission} {self.permission_info}"
\ No newline at end of file
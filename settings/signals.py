@@ -0,0 +1,15 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from settings.models import UserPermission
+from utils.utils_permission import clear_permission_memo, invalidate_permission_cache
+
+@receiver(post_save, sender=UserPermission)
+@receiver(post_delete, sender=UserPermission)
+def invalidate_user_permissions(sender, instance, **kwargs):
+    """
+    权限增删（注册、add_permission / remove_permission、删除赛事等）后使该用户的权限缓存失效
+    """
+    invalidate_permission_cache(instance.user_id)
+    # 创建时传入的 user 对象可能正在本次请求中使用，一并清除其上的缓存
+    if UserPermission.user.is_cached(instance):
+        clear_permission_memo(instance.user)
@@ -3,10 +3,11 @@ from django.urls import reverse
 from django.contrib.auth.hashers import make_password, check_password
 import unittest
 import json
+from django.test import override_settings
 
 from users.models import User
 from settings.models import UserPermission
-from utils.utils_permission import PERMISSION_USER_IS_ADMIN
+from utils.utils_permission import PERMISSION_USER_IS_ADMIN, has_permission, add_permission, remove_permission
 from utils.utils_require import ErrorCode
 
 CONTENT_TYPE = "application/json"
@@ -228,6 +229,19 @@ class GetUserInfoTests(TestCase):
         self.assertEqual(data["data"]["nickname"], self.nickname)
         self.assertEqual(data["data"]["email"], self.email)
 
+    # 用户名前缀搜索不区分大小写，且不超过 limit 个
+    def test_search_username_case_insensitive(self):
+        for i in range(3):
+            User.objects.create(username=f"Alice{i}", email=f"alice{i}@example.com", password="", nickname=f"alice{i}")
+        response = self.client.get(reverse('search_username_settings'), {"username_prefix": "aLi", "limit": 2})
+        data = json.loads(response.content.decode('utf-8'))
+        self.assertEqual(data["code"], 0)
+        self.assertEqual([user["username"] for user in data["data"]["users"]], ["Alice0", "Alice1"])
+
+        response = self.client.get(reverse('search_username_settings'), {"username_prefix": "bob"})
+        data = json.loads(response.content.decode('utf-8'))
+        self.assertEqual(data["code"], 1019)
+
 class UserPermissionTests(TestCase):
     def setUp(self):
         self.client = Client()
@@ -481,6 +495,36 @@ class UserPermissionTests(TestCase):
             permission_info=self.permission_info
         ).exists())
 
+    # 权限缓存预热后检查不再查询数据库，权限变更后立即生效
+    def test_has_permission_cache(self):
+        self.assertTrue(has_permission(self.user, self.permission_name))
+        other_request_user = User.objects.get(username=self.username)
+        with self.assertNumQueries(0):
+            self.assertTrue(has_permission(self.user, self.permission_name, self.permission_info))
+            self.assertFalse(has_permission(self.user, "new_permission"))
+            self.assertTrue(has_permission(other_request_user, self.permission_name))
+
+        self.assertEqual(add_permission(self.admin, self.user, "new_permission")["code"], 0)
+        self.assertTrue(has_permission(self.user, "new_permission"))
+        self.assertTrue(has_permission(User.objects.get(username=self.username), "new_permission"))
+
+        self.assertEqual(remove_permission(self.admin, self.user, "new_permission")["code"], 0)
+        self.assertFalse(has_permission(self.user, "new_permission"))
+        self.assertFalse(has_permission(User.objects.get(username=self.username), "new_permission"))
+
+    # 多进程部署下没有共享缓存时只在同一请求内复用权限，撤销权限对其他 worker 立即生效
+    @override_settings(SINGLE_PROCESS=False)
+    def test_has_permission_without_shared_cache(self):
+        self.assertTrue(has_permission(self.user, self.permission_name))
+        with self.assertNumQueries(0):
+            self.assertTrue(has_permission(self.user, self.permission_name, self.permission_info))
+        other_request_user = User.objects.get(username=self.username)
+        with self.assertNumQueries(1):
+            self.assertTrue(has_permission(other_request_user, self.permission_name))
+
+        UserPermission.objects.filter(user=self.user, permission=self.permission_name).delete()
+        self.assertFalse(has_permission(User.objects.get(username=self.username), self.permission_name))
+
     # 获取权限信息方式不为GET
     def test_get_user_permission_info_bad_method(self):
         response = self.client.post(reverse('get_user_permission_info'))
@@ -8,6 +8,7 @@ from utils.utils_require import check_require, require, ErrorCode
 from utils.utils_params import get_user
 from utils.utils_password import MAX_PASSWORD_LENGTH
 from utils.utils_permission import add_permission, remove_permission 
+from utils.utils_autocomplete import get_autocomplete_limit, search_usernames
 from users.models import User
 from .models import UserPermission
 
@@ -181,9 +182,7 @@ def search_username_settings(req: HttpRequest):
 
     username_prefix = require(req.GET, "username_prefix", "string") 
     
-    users = User.objects.filter(username__startswith=username_prefix).values("username", "nickname")[:10]
-    
-    user_list = list(users)
+    user_list = search_usernames(username_prefix, get_autocomplete_limit(req.GET))
     if len(user_list) == 0:
         return request_success({
             'code': 1019,
@@ -2,6 +2,26 @@
 python3 manage.py makemigrations
 python3 manage.py migrate
 
+# 后台进程与 uwsgi 使用相同的数据库配置
+export DJANGO_SETTINGS_MODULE=tsingleap_backend.settings
+export POSTGRES_DB="tsingleap_db"
+export POSTGRES_USER="tsingleap_backend"
+export POSTGRES_PASSWORD="tsingleap_backend_password"
+export POSTGRES_HOST="tsingleap-database.TsingLeap.secoder.local"
+export POSTGRES_PORT="5432"
+
+# 在后台发送发件箱中的邮件（验证码等）
+python3 manage.py send_emails --interval 1 &
+
+# 开启点赞写缓冲时在后台每秒落库一次；缓冲保存在 Redis 中，未配置 REDIS_URL 时无法开启
+if [ "$TSINGLEAP_LIKE_BUFFER" = "1" ] && [ -n "$REDIS_URL" ]; then
+    python3 manage.py flush_like_buffer --interval 1 &
+fi
+
+# ASGI 入口，提供赛事实时推送等长连接接口；读多的接口在此使用异步视图（见 tsingleap_backend/urls_asgi.py）
+# ASGI 下同步的 ORM 调用在每个请求各自的线程中执行，线程级的长连接无法复用，改用连接池
+TSINGLEAP_DB_CONN_MODE=pool uvicorn tsingleap_backend.asgi:application --host 0.0.0.0 --port 8000 &
+
 uwsgi --module=tsingleap_backend.wsgi:application \
     --env DJANGO_SETTINGS_MODULE=tsingleap_backend.settings \
     --env POSTGRES_DB="tsingleap_db" \
@@ -11,6 +31,17 @@ uwsgi --module=tsingleap_backend.wsgi:application \
     --env POSTGRES_PORT="5432" \
     --env TSINGLEAP_SECRET_SALT="$TSINGLEAP_SECRET_SALT" \
     --env TSINGLEAP_EMAIL_HOST_PASSWORD="$TSINGLEAP_EMAIL_HOST_PASSWORD" \
+    --env TSINGLEAP_LIKE_BUFFER="$TSINGLEAP_LIKE_BUFFER" \
+    --env REDIS_URL="$REDIS_URL" \
+    --env TSINGLEAP_METRICS_TOKEN="$TSINGLEAP_METRICS_TOKEN" \
+    --env TSINGLEAP_METRICS_QUERY_LIMIT="$TSINGLEAP_METRICS_QUERY_LIMIT" \
+    --env TSINGLEAP_DB_CONN_MODE="$TSINGLEAP_DB_CONN_MODE" \
+    --env TSINGLEAP_DB_CONN_MAX_AGE="$TSINGLEAP_DB_CONN_MAX_AGE" \
+    --env TSINGLEAP_DB_POOL_MIN_SIZE="$TSINGLEAP_DB_POOL_MIN_SIZE" \
+    --env TSINGLEAP_DB_POOL_MAX_SIZE="$TSINGLEAP_DB_POOL_MAX_SIZE" \
+    --env POSTGRES_REPLICA_HOSTS="$POSTGRES_REPLICA_HOSTS" \
+    --env TSINGLEAP_REPLICA_STICKY_SECONDS="$TSINGLEAP_REPLICA_STICKY_SECONDS" \
+    --env TSINGLEAP_JSON_ENCODER="$TSINGLEAP_JSON_ENCODER" \
     --master \
     --http=0.0.0.0:80 \
     --processes=5 \
@@ -4,3 +4,5 @@ from django.apps import AppConfig
 class TagConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "tag"
+    def ready(self):
+        import tag.signals  # 确保 signals 被自动加载
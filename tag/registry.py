@@ -0,0 +1,146 @@
+import bisect
+import heapq
+import time
+from collections import Counter, namedtuple
+from types import MappingProxyType
+
+from django.contrib.postgres.aggregates import StringAgg
+from django.db import connection, transaction
+from django.db.models import CharField, Count, TextField, Value
+from django.db.models.functions import MD5, Cast, Concat
+from tag.models import Tag
+from tsingleap_backend.routers import reading_from_primary
+from utils.utils_autocomplete import autocomplete_keys, normalize_keyword
+from utils.utils_cache import bump_cache_version, get_cache_version, has_shared_cache
+
+# 共享缓存中的标签版本号，标签增删时更换，各 worker 据此重新加载快照
+TAG_REGISTRY_VERSION_KEY = "tag:registry:version"
+# 快照的最长使用时间（秒）。标签的使用次数随帖子、赛事变化，不触发版本号，到期后随快照一起刷新
+TAG_REGISTRY_MAX_AGE = 300
+
+TagInfo = namedtuple("TagInfo", ["id", "name", "tag_type", "is_post_tag", "is_competition_tag"])
+
+class TagRegistry:
+    """
+    某一版本全部标签的只读快照，按 id、类型和名称前缀建立索引
+    """
+    def __init__(self, version, tags, usage=None):
+        self.version = version
+        self.loaded_at = time.monotonic()
+        # {tag_id: 使用该标签的帖子与赛事数}，自动补全按此排序
+        self.usage = MappingProxyType(dict(usage or {}))
+        self.tags = tuple(sorted(tags, key=lambda tag: tag.id))
+        self.by_id = MappingProxyType({tag.id: tag for tag in self.tags})
+        by_type = {}
+        for tag in self.tags:
+            by_type.setdefault(tag.tag_type, []).append(tag)
+        self.by_type = MappingProxyType({tag_type: tuple(tags) for tag_type, tags in by_type.items()})
+        # 按名称排序，前缀相同的标签在其中连续，二分查找定位起点
+        self.by_name = tuple(sorted((tag.name, tag.id) for tag in self.tags))
+        self.names = tuple(name for name, _ in self.by_name)
+        # 自动补全索引：(规范化后的名称 / 全拼 / 拼音首字母, tag_id)，同样按键排序后二分查找
+        self.by_key = tuple(sorted({(key, tag.id) for tag in self.tags for key in autocomplete_keys(tag.name)}))
+        self.keys = tuple(key for key, _ in self.by_key)
+
+    def get(self, tag_id):
+        """
+        按 id 取标签，不存在时返回 None
+        """
+        return self.by_id.get(int(tag_id))
+
+    def get_many(self, tag_ids):
+        """
+        按 id 取多个标签，去重并忽略不存在的 id，按 id 排序
+        """
+        tags = (self.by_id.get(tag_id) for tag_id in sorted({int(tag_id) for tag_id in tag_ids}))
+        return [tag for tag in tags if tag is not None]
+
+    def of_type(self, tag_type):
+        return self.by_type.get(tag_type, ())
+
+    def find(self, name, tag_type):
+        """
+        按名称和类型取标签，不存在时返回 None
+        """
+        start = bisect.bisect_left(self.names, name)
+        for tag_name, tag_id in self.by_name[start:]:
+            if tag_name != name:
+                break
+            if self.by_id[tag_id].tag_type == tag_type:
+                return self.by_id[tag_id]
+        return None
+
+    def autocomplete(self, prefix, tag_type=None, limit=None):
+        """
+        名称、全拼或拼音首字母以 prefix 开头（不区分大小写）的标签，按使用次数从多到少取前 limit 个，
+        次数相同时按 id 排序；tag_type 为 None 时不限类型，limit 为 None 时不限个数
+        """
+        prefix = normalize_keyword(prefix)
+        start = bisect.bisect_left(self.keys, prefix)
+        matched = {}
+        for key, tag_id in self.by_key[start:]:
+            if not key.startswith(prefix):
+                break
+            tag = self.by_id[tag_id]
+            if tag_type is None or tag.tag_type == tag_type:
+                matched[tag_id] = tag
+        rank = lambda tag: (-self.usage.get(tag.id, 0), tag.id)
+        if limit is None:
+            return sorted(matched.values(), key=rank)
+        return heapq.nsmallest(limit, matched.values(), key=rank)
+
+_registry = None
+
+def load_tag_usage():
+    """
+    {tag_id: 使用该标签的帖子数 + 赛事数}，直接在两张关联表上分组计数
+    """
+    usage = Counter()
+    for through in (Tag.posts.through, Tag.competition.through):
+        usage.update(dict(through.objects.values_list("tag_id").annotate(count=Count("id")).order_by()))
+    return usage
+
+def load_tag_fingerprint():
+    """
+    标签表全部内容的摘要。没有共享缓存时其他 worker 的失效无法送达，
+    改为每次取快照前用一条查询在数据库中计算摘要作为版本号，标签增删改后随之变化
+    """
+    row = Concat(
+        Cast("id", CharField()), Value("\x1f"), "name", Value("\x1f"), "tag_type", Value("\x1f"),
+        Cast("is_post_tag", CharField()), Value("\x1f"), Cast("is_competition_tag", CharField()),
+        output_field=TextField(),
+    )
+    return Tag.objects.aggregate(
+        version=MD5(StringAgg(row, delimiter="\x1e", ordering="id", default=Value("")))
+    )["version"]
+
+def get_tag_registry():
+    """
+    返回当前版本的标签快照，版本号变化或快照过期时重新加载
+    """
+    global _registry
+    # 快照在各请求间复用，从主库加载，避免从库的复制延迟使旧标签以新版本号保存下来
+    with reading_from_primary():
+        if has_shared_cache():
+            version = get_cache_version(TAG_REGISTRY_VERSION_KEY)
+        else:
+            version = load_tag_fingerprint()
+        if (_registry is not None and _registry.version == version
+                and time.monotonic() - _registry.loaded_at < TAG_REGISTRY_MAX_AGE):
+            return _registry
+        tags = [TagInfo(*row) for row in Tag.objects.values_list(*TagInfo._fields)]
+        registry = TagRegistry(version, tags, load_tag_usage())
+    # 事务中可能读到尚未提交的标签，只保存在事务外加载的快照
+    if not connection.in_atomic_block:
+        _registry = registry
+    return registry
+
+def bump_tag_registry_version():
+    bump_cache_version(TAG_REGISTRY_VERSION_KEY)
+
+def invalidate_tag_registry():
+    """
+    使各 worker 的标签快照失效；事务提交后再失效一次，避免提交前加载的快照被沿用
+    """
+    bump_tag_registry_version()
+    transaction.on_commit(bump_tag_registry_version)
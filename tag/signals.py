@@ -0,0 +1,14 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from tag.models import Tag
+from tag.registry import invalidate_tag_registry
+from utils.utils_response_cache import invalidate_response_cache, model_tag
+
+@receiver(post_save, sender=Tag)
+@receiver(post_delete, sender=Tag)
+def invalidate_tags(sender, instance, **kwargs):
+    """
+    标签增删改后通知各 worker 重新加载标签快照，并使标签列表的响应缓存失效
+    """
+    invalidate_tag_registry()
+    invalidate_response_cache(model_tag(Tag))
@@ -1,10 +1,11 @@
-from django.test import Client, TestCase
+from django.test import Client, TestCase, TransactionTestCase, override_settings
 from django.urls import reverse
 from users.models import User
 from forum.models import Post
 from tag.models import Tag, TagType
 from settings.models import UserPermission
 from utils.utils_permission import PERMISSION_TAG_MANAGE_TAG
+from tag.registry import TagInfo, TagRegistry, get_tag_registry, bump_tag_registry_version
 import unittest
 import json
 CONTENT_TYPE = "application/json"
@@ -325,4 +326,95 @@ class TagTests(TestCase):
         self.assertEqual(data["data"]["posts"][0]["id"], post.post_id)
         self.assertEqual(data["data"]["posts"][0]["title"], post.title)
         self.assertEqual(data["data"]["posts"][0]["content"], post.content)
-        self.assertEqual(data["data"]["posts"][0]["author"], self.user.username)
\ No newline at end of file
+        self.assertEqual(data["data"]["posts"][0]["author"], self.user.username)
+    def test_get_post_list_by_tag_cursor(self):
+        tag = Tag.objects.create(
+            name="Test Tag",
+            tag_type=TagType.SPORTS,
+            is_post_tag=True,
+            is_competition_tag=False
+        )
+        posts = []
+        for i in range(3):
+            post = Post.objects.create(
+                title=f"Test Post {i}",
+                content="This is a test post",
+                author=self.user
+            )
+            post.tags.add(tag)
+            posts.append(post)
+        response = self.client.get(
+            reverse('get_post_list_by_tag'),
+            data = {"tag_id": tag.id, "cursor": "", "page_size": 2, "with_count": "true"}
+        )
+        data = json.loads(response.content.decode('utf-8'))
+        self.assertEqual(data["code"], 0)
+        self.assertEqual(data["data"]["total_posts"], 3)
+        self.assertEqual([p["id"] for p in data["data"]["posts"]], [posts[2].post_id, posts[1].post_id])
+        response = self.client.get(
+            reverse('get_post_list_by_tag'),
+            data = {"tag_id": tag.id, "cursor": data["data"]["next_cursor"], "page_size": 2}
+        )
+        data = json.loads(response.content.decode('utf-8'))
+        self.assertEqual([p["id"] for p in data["data"]["posts"]], [posts[0].post_id])
+        self.assertIsNone(data["data"]["next_cursor"])
+
+    # 自动补全：不区分大小写，支持全拼与拼音首字母，按使用次数排序并截断
+    def test_tag_registry_autocomplete(self):
+        registry = TagRegistry(0, [
+            TagInfo(1, "Basketball", TagType.SPORTS, True, True),
+            TagInfo(2, "篮球", TagType.SPORTS, True, True),
+            TagInfo(3, "老年组", TagType.EVENT, True, True),
+            TagInfo(4, "badminton", TagType.SPORTS, True, True),
+        ], {2: 5, 3: 7, 4: 1})
+        self.assertEqual([tag.id for tag in registry.autocomplete("BA")], [4, 1])
+        self.assertEqual([tag.id for tag in registry.autocomplete("lq")], [2])
+        self.assertEqual([tag.id for tag in registry.autocomplete("lan")], [2])
+        self.assertEqual([tag.id for tag in registry.autocomplete("l")], [3, 2])
+        self.assertEqual([tag.id for tag in registry.autocomplete("l", TagType.SPORTS)], [2])
+        self.assertEqual([tag.id for tag in registry.autocomplete("", limit=2)], [3, 2])
+
+# 事务中加载的标签快照不会被保存，需在事务外验证快照的复用与失效
+class TagRegistryTests(TransactionTestCase):
+    def tearDown(self):
+        # 测试结束时清空数据库不会触发信号，手动让快照失效
+        bump_tag_registry_version()
+
+    def test_tag_registry_reload(self):
+        basketball = Tag.objects.create(name="basketball", tag_type=TagType.SPORTS, is_post_tag=True, is_competition_tag=True)
+        Tag.objects.create(name="badminton", tag_type=TagType.SPORTS, is_post_tag=True, is_competition_tag=True)
+        Tag.objects.create(name="bachelor", tag_type=TagType.DEPARTMENT, is_post_tag=True, is_competition_tag=False)
+        get_tag_registry()
+
+        with self.assertNumQueries(0):
+            response = self.client.get(reverse('search_tag_by_prefix'), {"prefix": "ba", "tag_type": "sports"})
+            self.assertEqual(get_tag_registry().get(basketball.id).name, "basketball")
+            self.assertIsNone(get_tag_registry().find("basketball", TagType.DEPARTMENT))
+        data = json.loads(response.content.decode('utf-8'))
+        self.assertEqual([tag["name"] for tag in data["data"]], ["basketball", "badminton"])
+
+        Tag.objects.create(name="baseball", tag_type=TagType.SPORTS, is_post_tag=True, is_competition_tag=True)
+        basketball.delete()
+        response = self.client.get(reverse('search_tag_by_prefix'), {"prefix": "bas", "tag_type": "all"})
+        data = json.loads(response.content.decode('utf-8'))
+        self.assertEqual([tag["name"] for tag in data["data"]], ["baseball"])
+
+    @override_settings(SINGLE_PROCESS=False)
+    def test_tag_registry_without_shared_cache(self):
+        basketball = Tag.objects.create(name="basketball", tag_type=TagType.SPORTS, is_post_tag=True, is_competition_tag=True)
+        get_tag_registry()
+        # 每次取快照前查询一次标签表摘要，快照本身仍然复用
+        with self.assertNumQueries(1):
+            self.assertEqual(get_tag_registry().get(basketball.id).name, "basketball")
+
+        # 其他 worker 的修改不会更换本进程的版本号，直接改表不触发信号来模拟
+        baseball = Tag.objects.bulk_create([
+            Tag(name="baseball", tag_type=TagType.SPORTS, is_post_tag=True, is_competition_tag=True)
+        ])[0]
+        Tag.objects.filter(pk=basketball.pk).update(is_post_tag=False)
+        registry = get_tag_registry()
+        self.assertEqual(registry.get(baseball.id).name, "baseball")
+        self.assertFalse(registry.get(basketball.id).is_post_tag)
+
+        basketball.delete()
+        self.assertIsNone(get_tag_registry().get(basketball.id))
@@ -1,18 +1,25 @@
 import json, jinja2
+from asgiref.sync import sync_to_async
 from django.shortcuts import render
 from django.http import JsonResponse
 from django.http import HttpRequest, HttpResponse
 
 from users.models import User
 from tag.models import Tag, TagType
+from tag.registry import get_tag_registry
+from utils.utils_autocomplete import get_autocomplete_limit
 from forum.models import Post, Comment
 from competitions.models import Competition
 from django.contrib.contenttypes.models import ContentType
 from utils.utils_request import BAD_METHOD, request_failed, request_success, return_field
-from utils.utils_require import check_require, require
+from utils.utils_require import check_require, require, ErrorCode
+from utils.utils_forum import post_to_dict
+from utils.utils_schema import compile_schema, validate_request
 from django.core.paginator import Paginator, EmptyPage
 from utils import utils_time
 from utils.utils_permission import has_permission, PERMISSION_TAG_MANAGE_TAG
+from utils.utils_pagination import InvalidCursor, get_cursor_info, paginate_by_cursor
+from utils.utils_response_cache import acache_response, aget_cached_response, cache_response, get_cached_response, model_tag
 
 tag_type_map = {
     "sports": TagType.SPORTS,
@@ -22,16 +29,24 @@ tag_type_map = {
     "default": TagType.DEFAULT,
 }
 
+CREATE_TAG_SCHEMA = compile_schema({
+    "username": "string",
+    "name": "string",
+    "tag_type": "string",
+    "is_post_tag": "bool",
+    "is_competition_tag": "bool",
+})
+DELETE_TAG_SCHEMA = compile_schema({"username": "string", "tag_id": "int"})
+SEARCH_TAG_SCHEMA = compile_schema({"prefix": "string", "tag_type": "string"})
+
 @check_require
-def create_tag(req: HttpRequest):
-    if req.method != 'POST':
-        return BAD_METHOD
-    body = json.loads(req.body.decode("utf-8")) if req.body else {}
-    username = require(body, "username", "string")
-    name = require(body, "name", "string")
-    tag_type = require(body, "tag_type", "string")
-    is_post_tag = require(body, "is_post_tag", "bool")
-    is_competition_tag = require(body, "is_competition_tag", "bool")
+@validate_request("POST", CREATE_TAG_SCHEMA)
+def create_tag(req: HttpRequest, params):
+    username = params["username"]
+    name = params["name"]
+    tag_type = params["tag_type"]
+    is_post_tag = params["is_post_tag"]
+    is_competition_tag = params["is_competition_tag"]
     try:
         user = User.objects.get(username=username)
     except User.DoesNotExist:
@@ -51,7 +66,7 @@ def create_tag(req: HttpRequest):
             "code": 1020,
             "msg": "No permission"
         })
-    if Tag.objects.filter(name=name, tag_type=tag_type).exists():
+    if get_tag_registry().find(name, tag_type) is not None:
         return request_success({
             "code": 1041,
             "msg": "Tag already exists"
@@ -75,12 +90,10 @@ def create_tag(req: HttpRequest):
     })
     
 @check_require
-def delete_tag(req: HttpRequest):
-    if req.method != 'POST':
-        return BAD_METHOD
-    body = json.loads(req.body.decode("utf-8")) if req.body else {}
-    username = require(body, "username", "string")
-    tag_id = require(body, "tag_id", "int")
+@validate_request("POST", DELETE_TAG_SCHEMA)
+def delete_tag(req: HttpRequest, params):
+    username = params["username"]
+    tag_id = params["tag_id"]
     try:
         user = User.objects.get(username=username)
     except User.DoesNotExist:
@@ -88,9 +101,7 @@ def delete_tag(req: HttpRequest):
             "code": 1021,
             "msg": "User does not exist"
         })
-    try:
-        tag = Tag.objects.get(id=tag_id)
-    except Tag.DoesNotExist:
+    if get_tag_registry().get(tag_id) is None:
         return request_success({
             "code": 1042,
             "msg": "Tag does not exist"
@@ -100,7 +111,7 @@ def delete_tag(req: HttpRequest):
             "code": 1020,
             "msg": "No permission"
         })
-    tag.delete()
+    Tag.objects.filter(id=tag_id).delete()
     return request_success({
         "code": 0,
         "msg": "Tag deleted successfully"
@@ -110,7 +121,23 @@ def delete_tag(req: HttpRequest):
 def get_tag_list(req: HttpRequest):
     if req.method != 'GET':
         return BAD_METHOD
-    tags = Tag.objects.all()
+    response, seq = get_cached_response("get_tag_list", {})
+    if response is not None:
+        return response
+    return cache_response("get_tag_list", {}, tag_list_response(get_tag_registry().tags), [model_tag(Tag)], seq)
+
+# get_tag_list 的异步版本，标签注册表的加载放到线程中执行
+@check_require
+async def aget_tag_list(req: HttpRequest):
+    if req.method != 'GET':
+        return BAD_METHOD
+    response, seq = await aget_cached_response("get_tag_list", {})
+    if response is not None:
+        return response
+    registry = await sync_to_async(get_tag_registry)()
+    return await acache_response("get_tag_list", {}, tag_list_response(registry.tags), [model_tag(Tag)], seq)
+
+def tag_list_response(tags):
     return request_success({
         "code": 0,
         "msg": "Tag list fetched successfully",
@@ -127,15 +154,12 @@ def get_tag_list(req: HttpRequest):
     })
 
 @check_require
-def search_tag_by_prefix(req: HttpRequest):
-    if req.method != 'GET':
-        return BAD_METHOD
-    prefix = require(req.GET, "prefix", "string")
-    tag_type = require(req.GET, "tag_type", "string")
-    if tag_type not in tag_type_map.keys():
-        tags = Tag.objects.filter(name__startswith=prefix)
-    else:
-        tags = Tag.objects.filter(name__startswith=prefix, tag_type=tag_type_map[tag_type])
+@validate_request("GET", SEARCH_TAG_SCHEMA)
+def search_tag_by_prefix(req: HttpRequest, params):
+    prefix = params["prefix"]
+    tag_type = params["tag_type"]
+    limit = get_autocomplete_limit(req.GET)
+    tags = get_tag_registry().autocomplete(prefix, tag_type_map.get(tag_type), limit)
     return request_success({
         "code": 0,
         "msg": "Tag list fetched successfully",
@@ -151,21 +175,43 @@ def search_tag_by_prefix(req: HttpRequest):
         ]
     })
 
+def tag_post_to_dict(post):
+    # 本接口历来以 id 返回帖子编号，保留该键以兼容已有客户端
+    return {"id": post.post_id, **post_to_dict(post)}
+
 @check_require
 def get_post_list_by_tag(req: HttpRequest):
     if req.method != 'GET':
         return BAD_METHOD
     tag_id = require(req.GET, "tag_id", "int")
-    page = require(req.GET, "page", "int")
-    page_size = require(req.GET, "page_size", "int")
-    try:
-        tag = Tag.objects.get(id=tag_id)
-    except Tag.DoesNotExist:
+    cursor_info = get_cursor_info(req.GET)
+    if cursor_info is None:
+        page = require(req.GET, "page", "int")
+        page_size = require(req.GET, "page_size", "int")
+    tag = get_tag_registry().get(tag_id)
+    if tag is None:
         return request_success({
             "code": 1042,
             "msg": "Tag does not exist"
         })
-    posts = Post.objects.filter(tags=tag).order_by('-created_at', '-post_id')
+    posts = Post.objects.filter(tag_ids__contains=[tag.id]).order_by('-created_at', '-post_id').select_related("author")
+    if cursor_info is not None:
+        cursor, page_size, with_count = cursor_info
+        try:
+            page_obj, next_cursor, total = paginate_by_cursor(posts, cursor, page_size, "post_id", with_count)
+        except InvalidCursor:
+            return request_success(ErrorCode.INVALID_CURSOR)
+        data = {
+            "posts": [tag_post_to_dict(post) for post in page_obj],
+            "next_cursor": next_cursor
+        }
+        if with_count:
+            data["total_posts"] = total
+        return request_success({
+            "code": 0,
+            "msg": "Post list fetched successfully",
+            "data": data
+        })
     paginator = Paginator(posts, page_size)
     try:
         page_obj = paginator.page(page)
@@ -178,16 +224,7 @@ def get_post_list_by_tag(req: HttpRequest):
         "code": 0,
         "msg": "Post list fetched successfully",
         "data": {
-            "posts": [
-                {
-                    "id": post.post_id,
-                    "title": post.title,
-                    "content": post.content,
-                    "author": post.author.username,
-                    "created_at": post.created_at,
-                }
-                for post in page_obj
-            ],
+            "posts": [tag_post_to_dict(post) for post in page_obj],
             "total_pages": paginator.num_pages,
             "total_posts": paginator.count
         }
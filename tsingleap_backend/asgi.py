@@ -12,5 +12,7 @@ import os
 from django.core.asgi import get_asgi_application
 
 os.environ.setdefault("DJANGO_SETTINGS_MODULE", "tsingleap_backend.settings")
+# 读多的接口使用异步视图；设为 tsingleap_backend.urls 则与 WSGI 完全相同
+os.environ.setdefault("TSINGLEAP_ROOT_URLCONF", "tsingleap_backend.urls_asgi")
 
 application = get_asgi_application()
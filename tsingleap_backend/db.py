@@ -0,0 +1,20 @@
+# 数据库连接的复用方式，由 TSINGLEAP_DB_CONN_MODE 选择
+#   none: 每个请求新建连接，请求结束时关闭（Django 默认行为）
+#   persistent: 每个 worker 线程保持长连接，最长复用 conn_max_age 秒，复用前检查连接是否可用
+#   pool: 每个 worker 进程维护一个 psycopg 3 连接池，请求结束时把连接归还到池中
+DB_CONN_MODES = ("none", "persistent", "pool")
+
+def connection_settings(mode, conn_max_age=60, pool_min_size=2, pool_max_size=4, pool_timeout=10):
+    """
+    返回 DATABASES 中与连接复用相关的配置项：CONN_MAX_AGE、CONN_HEALTH_CHECKS 与 OPTIONS
+    """
+    if mode == "none":
+        return {"CONN_MAX_AGE": 0, "CONN_HEALTH_CHECKS": False, "OPTIONS": {}}
+    if mode == "persistent":
+        return {"CONN_MAX_AGE": conn_max_age, "CONN_HEALTH_CHECKS": True, "OPTIONS": {}}
+    if mode == "pool":
+        # 连接池与长连接不能同时开启，池本身会在取出连接时检查其状态
+        return {"CONN_MAX_AGE": 0, "CONN_HEALTH_CHECKS": False, "OPTIONS": {
+            "pool": {"min_size": pool_min_size, "max_size": pool_max_size, "timeout": pool_timeout},
+        }}
+    raise ValueError(f"Unknown database connection mode {mode!r}, expected one of {DB_CONN_MODES}")
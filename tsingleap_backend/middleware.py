@@ -0,0 +1,90 @@
+import time
+
+from asgiref.sync import iscoroutinefunction, sync_to_async
+from django.conf import settings
+from django.utils.decorators import sync_and_async_middleware
+
+from tsingleap_backend.routers import RouteState, get_sticky_seconds, reset_route_state, set_route_state
+from utils.utils_metrics import QueryRecorder, record_request
+
+# 客户端写入后在此 cookie 中记录粘滞窗口的截止时间戳，窗口内的请求读主库
+PRIMARY_STICKY_COOKIE = "tsingleap_primary_until"
+# 只读的 HTTP 方法，默认读从库
+READ_ONLY_METHODS = ("GET", "HEAD", "OPTIONS")
+
+@sync_and_async_middleware
+def metrics_middleware(get_response):
+    """
+    按路由名统计每个请求的耗时、数据库查询数、查询总耗时与响应大小，汇总到共享的指标存储，
+    由 /metrics/ 接口以 Prometheus 格式输出
+    """
+    if iscoroutinefunction(get_response):
+        async def middleware(request):
+            recorder = QueryRecorder()
+            # ASGI 下 ORM 调用在同一个线程中执行，计数器需安装在该线程的数据库连接上
+            await sync_to_async(recorder.start)()
+            start = time.perf_counter()
+            try:
+                response = await get_response(request)
+            finally:
+                await sync_to_async(recorder.stop)()
+            await sync_to_async(record_request)(request, response, time.perf_counter() - start, recorder)
+            return response
+        return middleware
+
+    def middleware(request):
+        recorder = QueryRecorder()
+        recorder.start()
+        start = time.perf_counter()
+        try:
+            response = get_response(request)
+        finally:
+            recorder.stop()
+        record_request(request, response, time.perf_counter() - start, recorder)
+        return response
+    return middleware
+
+def start_routing(request):
+    try:
+        sticky = float(request.COOKIES.get(PRIMARY_STICKY_COOKIE, 0)) > time.time()
+    except ValueError:
+        sticky = False
+    state = RouteState(use_replica=request.method in READ_ONLY_METHODS, sticky=sticky)
+    return state, set_route_state(state)
+
+def set_sticky_cookie(state, response):
+    """
+    本请求写过主库时设置粘滞 cookie，使该客户端随后的请求在窗口内读主库
+    """
+    if state.wrote:
+        seconds = get_sticky_seconds()
+        response.set_cookie(
+            PRIMARY_STICKY_COOKIE, str(time.time() + seconds), max_age=seconds, httponly=True,
+            domain=settings.CSRF_COOKIE_DOMAIN, samesite=settings.CSRF_COOKIE_SAMESITE, secure=settings.CSRF_COOKIE_SECURE,
+        )
+    return response
+
+@sync_and_async_middleware
+def replica_routing_middleware(get_response):
+    """
+    为每个请求选择读库：只读方法读从库，其余读主库；写过主库后设置读写一致的粘滞窗口。
+    视图可用 tsingleap_backend.routers 中的 read_from_replica / read_from_primary 覆盖
+    """
+    if iscoroutinefunction(get_response):
+        async def middleware(request):
+            state, token = start_routing(request)
+            try:
+                response = await get_response(request)
+            finally:
+                reset_route_state(token)
+            return set_sticky_cookie(state, response)
+        return middleware
+
+    def middleware(request):
+        state, token = start_routing(request)
+        try:
+            response = get_response(request)
+        finally:
+            reset_route_state(token)
+        return set_sticky_cookie(state, response)
+    return middleware
@@ -0,0 +1,118 @@
+import random
+from contextlib import contextmanager
+from contextvars import ContextVar
+from functools import wraps
+
+from asgiref.sync import iscoroutinefunction
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections
+
+class RouteState:
+    """
+    一个请求的读库选择：use_replica 表示读操作可以走从库；sticky 表示客户端刚写过数据，
+    在粘滞窗口内始终读主库；wrote 表示本请求已经写过主库，之后的读也走主库；
+    read_replica 表示本请求已有读操作走了从库
+    """
+    def __init__(self, use_replica, sticky=False):
+        self.use_replica = use_replica
+        self.sticky = sticky
+        self.wrote = False
+        self.read_replica = False
+
+# 当前请求的读库选择，由 replica_routing_middleware 设置；请求之外（管理命令、后台进程）为 None，全部读主库
+_route_state = ContextVar("db_route_state", default=None)
+
+def get_route_state():
+    return _route_state.get()
+
+def set_route_state(state):
+    return _route_state.set(state)
+
+def reset_route_state(token):
+    _route_state.reset(token)
+
+def get_replicas():
+    return getattr(settings, "DATABASE_REPLICAS", [])
+
+def get_sticky_seconds():
+    return getattr(settings, "REPLICA_STICKY_SECONDS", 10)
+
+class ReplicaRouter:
+    """
+    写操作与迁移只在主库进行；请求允许时读操作随机分配到 DATABASE_REPLICAS 中的从库。
+    事务中的读、本请求写过之后的读与粘滞窗口内的读均走主库，保证读到自己刚写入的数据
+    """
+    def db_for_read(self, model, **hints):
+        state = _route_state.get()
+        if state is None or not state.use_replica or state.sticky or state.wrote:
+            return DEFAULT_DB_ALIAS
+        replicas = get_replicas()
+        if not replicas or connections[DEFAULT_DB_ALIAS].in_atomic_block:
+            return DEFAULT_DB_ALIAS
+        state.read_replica = True
+        return random.choice(replicas)
+
+    def db_for_write(self, model, **hints):
+        state = _route_state.get()
+        if state is not None:
+            state.wrote = True
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # 从库是主库的副本，不同库读出的对象之间可以建立关联
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return db == DEFAULT_DB_ALIAS
+
+def route_reads(use_replica):
+    """
+    视图级的读库覆盖：use_replica 为 True 时只读的非 GET 视图（如 POST 传参的查询）也读从库，
+    为 False 时 GET 视图也读主库。粘滞窗口与写后读的规则仍然优先
+    """
+    def decorator(view):
+        def apply():
+            state = _route_state.get()
+            if state is not None:
+                state.use_replica = use_replica
+
+        if iscoroutinefunction(view):
+            @wraps(view)
+            async def wrapped_async(*args, **kwargs):
+                apply()
+                return await view(*args, **kwargs)
+            return wrapped_async
+
+        @wraps(view)
+        def wrapped(*args, **kwargs):
+            apply()
+            return view(*args, **kwargs)
+        return wrapped
+    return decorator
+
+read_from_replica = route_reads(True)
+read_from_primary = route_reads(False)
+
+def has_read_replica():
+    """
+    本请求是否有读操作走了从库。从库落后于主库，读出的数据按当前的版本号或失效序号写入共享缓存时
+    可能是旧数据，且直到过期都不会失效
+    """
+    state = _route_state.get()
+    return state is not None and state.read_replica
+
+@contextmanager
+def reading_from_primary():
+    """
+    范围内的读操作走主库，离开后恢复原来的选择。
+    加载要按当前版本号跨请求缓存、且没有更短有效期的数据时使用，原因见 has_read_replica
+    """
+    state = _route_state.get()
+    if state is None or not state.use_replica:
+        yield
+        return
+    state.use_replica = False
+    try:
+        yield
+    finally:
+        state.use_replica = True
@@ -10,6 +10,7 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/4.1/ref/settings/
 """
 
+import os
 from pathlib import Path
 import dotenv
 dotenv.load_dotenv()
@@ -66,6 +67,7 @@ INSTALLED_APPS = [
     "django.contrib.sessions",
     "django.contrib.messages",
     "django.contrib.staticfiles",
+    "django.contrib.postgres",
     "users",
     "settings",
     "competitions",
@@ -75,6 +77,8 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    "tsingleap_backend.middleware.metrics_middleware",
+    "tsingleap_backend.middleware.replica_routing_middleware",
     "corsheaders.middleware.CorsMiddleware",
     'whitenoise.middleware.WhiteNoiseMiddleware',
     "django.middleware.security.SecurityMiddleware",
@@ -86,7 +90,8 @@ MIDDLEWARE = [
     "django.middleware.clickjacking.XFrameOptionsMiddleware",
 ]
 
-ROOT_URLCONF = "tsingleap_backend.urls"
+# ASGI 入口默认使用 urls_asgi，其中读多的接口为异步视图
+ROOT_URLCONF = os.getenv("TSINGLEAP_ROOT_URLCONF") or "tsingleap_backend.urls"
 
 TEMPLATES = [
     {
@@ -110,7 +115,7 @@ WSGI_APPLICATION = "tsingleap_backend.wsgi.application"
 # Database
 # https://docs.djangoproject.com/en/4.1/ref/settings/#databases
 # 使用 PostgreSQL 数据库
-import os
+from tsingleap_backend.db import connection_settings
 
 DATABASES = {
     'default': {
@@ -120,9 +125,64 @@ DATABASES = {
         'PASSWORD': os.getenv('POSTGRES_PASSWORD', 'tsingleap_backend_password'),  # 你的数据库密码
         'HOST': os.getenv('POSTGRES_HOST', '127.0.0.1'),  # PostgreSQL 的服务器地址
         'PORT': os.getenv('POSTGRES_PORT', '5432'),
+        # 连接复用方式见 tsingleap_backend/db.py，默认使用带健康检查的长连接
+        **connection_settings(
+            os.getenv('TSINGLEAP_DB_CONN_MODE') or 'persistent',
+            conn_max_age=int(os.getenv('TSINGLEAP_DB_CONN_MAX_AGE') or 60),
+            pool_min_size=int(os.getenv('TSINGLEAP_DB_POOL_MIN_SIZE') or 2),
+            pool_max_size=int(os.getenv('TSINGLEAP_DB_POOL_MAX_SIZE') or 4),
+        ),
     }
 }
 
+# 只读从库：POSTGRES_REPLICA_HOSTS 为逗号分隔的从库地址，其余配置与主库相同。
+# 读写分离规则见 tsingleap_backend/routers.py；测试时从库镜像主库
+import copy
+
+DATABASE_REPLICAS = []
+for index, host in enumerate(host for host in os.getenv('POSTGRES_REPLICA_HOSTS', '').split(',') if host.strip()):
+    alias = f'replica_{index}'
+    DATABASES[alias] = copy.deepcopy(DATABASES['default'])
+    DATABASES[alias].update({'HOST': host.strip(), 'TEST': {'MIRROR': 'default'}})
+    DATABASE_REPLICAS.append(alias)
+DATABASE_ROUTERS = ['tsingleap_backend.routers.ReplicaRouter']
+# 客户端写入后读主库的时长（秒），覆盖从库的复制延迟
+REPLICA_STICKY_SECONDS = int(os.getenv('TSINGLEAP_REPLICA_STICKY_SECONDS') or 10)
+
+# 缓存：配置了 REDIS_URL 时使用 Redis，供多个 worker 共享；否则使用进程内缓存
+REDIS_URL = os.getenv('REDIS_URL')
+if REDIS_URL:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django_redis.cache.RedisCache',
+            'LOCATION': REDIS_URL,
+            'OPTIONS': {
+                'CLIENT_CLASS': 'django_redis.client.DefaultClient',
+            },
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        }
+    }
+
+# 只运行单个进程（测试、runserver）时置为 1，此时进程内缓存也可视为各 worker 共享；
+# uWSGI 等多进程部署不要开启，依赖共享缓存的功能应配置 REDIS_URL
+SINGLE_PROCESS = os.getenv('TSINGLEAP_SINGLE_PROCESS', '') == '1'
+
+# 点赞写缓冲：开启后点赞 / 取消点赞先写入缓存，由 flush_like_buffer 批量落库；需要配置 REDIS_URL
+LIKE_BUFFER_ENABLED = os.getenv('TSINGLEAP_LIKE_BUFFER', '') == '1'
+
+# 请求指标：/metrics/ 需携带此令牌访问，未配置时接口关闭；单个请求的查询数超过上限时记录告警
+METRICS_TOKEN = os.getenv('TSINGLEAP_METRICS_TOKEN', '')
+METRICS_QUERY_LIMIT = int(os.getenv('TSINGLEAP_METRICS_QUERY_LIMIT') or 50)
+
+# 响应的 JSON 编码器：stdlib（默认，与 JsonResponse 相同）、orjson 或 auto（装有 orjson 时使用 orjson）。
+# orjson 把 NaN 与 ±Infinity 编码为 null，标准库输出 NaN / Infinity，按需显式开启
+JSON_ENCODER = os.getenv('TSINGLEAP_JSON_ENCODER') or 'stdlib'
+
 # Password validation
 # https://docs.djangoproject.com/en/4.1/ref/settings/#auth-password-validators
 
@@ -0,0 +1,475 @@
+import asyncio
+import datetime
+import io
+import json
+import unittest
+from unittest import mock
+
+from asgiref.sync import sync_to_async
+
+from django.contrib.contenttypes.models import ContentType
+from django.core.cache import cache
+from django.core.exceptions import ImproperlyConfigured
+from django.core.management import call_command
+from django.db import connection
+from django.http import HttpResponse, JsonResponse
+from django.test import Client, RequestFactory, SimpleTestCase, TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import resolve, reverse
+from django.utils import timezone
+
+from competitions.models import Competition, Focus, Like
+from forum.models import Comment, Post, Report
+from settings.models import UserPermission
+from tag.models import Tag, TagType
+from tsingleap_backend.db import connection_settings
+from tsingleap_backend.middleware import PRIMARY_STICKY_COOKIE, replica_routing_middleware
+from tsingleap_backend.routers import ReplicaRouter, read_from_primary, read_from_replica, reading_from_primary
+from users.models import User
+from utils.utils_json import orjson
+from utils.utils_metrics import get_metrics_store
+from utils.utils_permission import PERMISSION_MATCH_UPDATE_MATCH_INFO
+from utils.utils_request import BAD_METHOD, request_success
+from utils.utils_response_cache import cache_response, entry_timeout, get_cached_response, mark_tags_invalidated, tag_seq_key
+from utils.utils_schema import Field, compile_schema, validate_request
+
+CONTENT_TYPE = "application/json"
+
+class QueryPlanTests(TestCase):
+    """
+    热点接口主查询的执行计划回归测试：用 generate_fake_data 生成数据后调用接口，
+    对其中访问给定表的 SELECT 执行 EXPLAIN，要求计划使用预期的索引且不对该表顺序扫描。
+    测试数据量小，规划器本会倾向顺序扫描，因此 EXPLAIN 时关闭 enable_seqscan：
+    查询形状与索引匹配时计划改走该索引，索引缺失或查询形状变化时测试失败。
+    """
+    @classmethod
+    def setUpTestData(cls):
+        call_command(
+            "generate_fake_data",
+            users=50, posts=300, competitions=300, participants=100, tags=20,
+            comments=300, likes=200, focuses=200, reports=50,
+            stdout=io.StringIO(),
+        )
+        users = list(User.objects.order_by("id")[:20])
+        cls.user = users[0]
+        cls.post = Post.objects.exclude(tag_ids=[]).order_by("post_id").first()
+        cls.competition = Competition.objects.filter(is_finished=False).order_by("id").first()
+        cls.participant = cls.competition.participants.order_by("id").first()
+
+        post_type = ContentType.objects.get_for_model(Post)
+        Comment.objects.bulk_create([
+            Comment(content=f"comment {i}", author=users[i % len(users)],
+                    content_type=post_type, object_id=cls.post.post_id)
+            for i in range(100)
+        ])
+        Report.objects.bulk_create([
+            Report(reporter=users[i % len(users)], reported_user=cls.post.author, reported_content=cls.post.content,
+                   reason=f"reason {i}", content_type=post_type, object_id=cls.post.post_id, solved=i % 2 == 0)
+            for i in range(100)
+        ])
+        competitions = list(Competition.objects.order_by("id")[:100])
+        Focus.objects.bulk_create([Focus(user=user, competition=competition) for user in users for competition in competitions[:10]])
+        Like.objects.bulk_create([Like(user=user, participant=cls.participant) for user in users])
+        UserPermission.objects.bulk_create([
+            UserPermission(user=user, permission=PERMISSION_MATCH_UPDATE_MATCH_INFO, permission_info=str(competition.id))
+            for user in users for competition in competitions
+        ])
+        with connection.cursor() as cursor:
+            cursor.execute("ANALYZE")
+
+    def setUp(self):
+        self.client = Client()
+
+    def explain(self, sql):
+        with connection.cursor() as cursor:
+            cursor.execute("SET LOCAL enable_seqscan = off")
+            try:
+                cursor.execute("EXPLAIN " + sql)
+                return "\n".join(row[0] for row in cursor.fetchall())
+            finally:
+                cursor.execute("SET LOCAL enable_seqscan = on")
+
+    def assert_uses_index(self, table, indexes, request):
+        """
+        执行 request()，检查其中访问 table 的 SELECT：均不顺序扫描 table，且至少一条使用 indexes 之一。
+        indexes 中的名称按前缀匹配，外键上自动创建的索引可写作 "<表名>_<列名>_"
+        """
+        with CaptureQueriesContext(connection) as queries:
+            response = request()
+        self.assertEqual(json.loads(response.content.decode("utf-8"))["code"], 0)
+        statements = [
+            query["sql"] for query in queries
+            if query["sql"].startswith("SELECT") and f'"{table}"' in query["sql"]
+        ]
+        self.assertTrue(statements, f"no query on {table}")
+        plans = [self.explain(sql) for sql in statements]
+        for sql, plan in zip(statements, plans):
+            self.assertNotIn(f"Seq Scan on {table}", plan, f"{sql}\n{plan}")
+        if isinstance(indexes, str):
+            indexes = (indexes,)
+        self.assertTrue(any(f"using {index}" in plan.lower() for plan in plans for index in indexes), "\n\n".join(plans))
+
+    def test_post_list(self):
+        self.assert_uses_index("forum_post", "forum_post_created_idx", lambda: self.client.get(
+            reverse("get_post_list"), {"cursor": "", "page_size": 10}))
+
+    def test_post_list_by_tag(self):
+        self.assert_uses_index("forum_post", ("forum_post_tag_ids_idx", "forum_post_created_idx"), lambda: self.client.get(
+            reverse("get_post_list_by_tag"), {"tag_id": self.post.tag_ids[0], "cursor": "", "page_size": 10}))
+
+    def test_comment_list_of_object(self):
+        self.assert_uses_index("forum_comment", "forum_comment_object_idx", lambda: self.client.get(
+            reverse("get_comment_list_of_object"),
+            {"content_type": "Post", "object_id": self.post.post_id, "cursor": "", "page_size": 10}))
+
+    def test_report_list(self):
+        self.assert_uses_index("forum_report", "forum_report_solved_idx", lambda: self.client.get(
+            reverse("get_report_list"), {"solved_state": "false", "cursor": "", "page_size": 10}))
+
+    def test_competition_list(self):
+        body = {"user_id": self.user.id, "tag_list": [], "search_text": "", "before_time": "", "before_id": -1,
+                "is_finished": False, "filter_focus": False}
+        self.assert_uses_index("competitions_competition", "competitions_list_idx", lambda: self.client.post(
+            reverse("get_competition_list"), data=json.dumps(body), content_type=CONTENT_TYPE))
+
+    def test_competition_list_focus(self):
+        body = {"user_id": self.user.id, "tag_list": [], "search_text": "", "before_time": "", "before_id": -1,
+                "is_finished": False, "filter_focus": True}
+        self.assert_uses_index("competitions_focus",
+            ("competitions_focus_user_idx", "competitions_focus_user_id_", "competitions_focus_competition_id_"), lambda: self.client.post(
+            reverse("get_competition_list"), data=json.dumps(body), content_type=CONTENT_TYPE))
+
+    def test_participant_list_likes(self):
+        self.assert_uses_index("competitions_like", ("competitions_like_user_idx", "competitions_like_user_id_"), lambda: self.client.get(
+            reverse("get_participant_list"), {"user_id": self.user.id, "competition_id": self.competition.id}))
+
+    def test_like_count(self):
+        self.assert_uses_index("competitions_like", ("competitions_like_user_idx", "competitions_like_user_id_"), lambda: self.client.get(
+            reverse("get_like_count"), {"user_id": self.user.id, "participant_id": self.participant.id}))
+
+    def test_user_permission_info(self):
+        self.assert_uses_index("settings_userpermission", ("settings_userperm_user_idx", "settings_userpermission_user_id_"), lambda: self.client.get(
+            reverse("get_user_permission_info"), {"username": self.user.username}))
+
+    def test_competition_admin_list(self):
+        self.assert_uses_index("settings_userpermission", "settings_userperm_perm_idx", lambda: self.client.get(
+            reverse("get_competition_admin_list"), {"id": self.competition.id}))
+
+@override_settings(METRICS_TOKEN="metrics-token", METRICS_QUERY_LIMIT=1)
+class MetricsTests(TestCase):
+    def setUp(self):
+        self.client = Client()
+        get_metrics_store().clear()
+        User.objects.create(username="metrics_user", email="metrics@mails.tsinghua.edu.cn", password="password")
+
+    def test_metrics_require_token(self):
+        response = self.client.get(reverse("metrics"))
+        self.assertEqual(response.status_code, 403)
+        response = self.client.get(reverse("metrics"), HTTP_AUTHORIZATION="Bearer wrong")
+        self.assertEqual(response.status_code, 403)
+
+    def test_metrics_record_requests(self):
+        with self.assertLogs("utils.utils_metrics", level="WARNING") as logs:
+            with CaptureQueriesContext(connection) as queries:
+                response = self.client.get(reverse("get_user_permission_info"), {"username": "metrics_user"})
+            self.assertEqual(response.json()["code"], 0)
+            self.client.get(reverse("get_user_permission_info"), {"username": "metrics_user"})
+        self.assertEqual(len(logs.output), 2)
+        response = self.client.get(reverse("metrics"), HTTP_AUTHORIZATION="Bearer metrics-token")
+        self.assertEqual(response.status_code, 200)
+        text = response.content.decode("utf-8")
+        self.assertIn('tsingleap_requests_total{view="get_user_permission_info",status="200"} 2', text)
+        self.assertIn('tsingleap_request_duration_seconds_count{view="get_user_permission_info"} 2', text)
+        self.assertIn('tsingleap_request_duration_seconds_bucket{view="get_user_permission_info",le="+Inf"} 2', text)
+        self.assertIn(f'tsingleap_db_queries_total{{view="get_user_permission_info"}} {2 * len(queries)}', text)
+        self.assertIn('tsingleap_query_limit_exceeded_total{view="get_user_permission_info"} 2', text)
+        self.assertIn('tsingleap_db_query_duration_seconds_total{view="get_user_permission_info"}', text)
+        self.assertIn('tsingleap_response_bytes_total{view="get_user_permission_info"}', text)
+
+    @override_settings(SINGLE_PROCESS=False)
+    def test_metrics_require_shared_store(self):
+        self.client.get(reverse("get_user_permission_info"), {"username": "metrics_user"})
+        response = self.client.get(reverse("metrics"), HTTP_AUTHORIZATION="Bearer metrics-token")
+        self.assertEqual(response.status_code, 503)
+        self.assertEqual(response.json()["code"], 1128)
+        self.assertIsNone(get_metrics_store())
+
+    def test_metrics_response_cache_ratio(self):
+        self.client.get(reverse("get_tag_list"))
+        self.client.get(reverse("get_tag_list"))
+        text = self.client.get(reverse("metrics"), HTTP_AUTHORIZATION="Bearer metrics-token").content.decode("utf-8")
+        self.assertIn('tsingleap_response_cache_lookups_total{view="get_tag_list",result="hit"} 1', text)
+        self.assertIn('tsingleap_response_cache_lookups_total{view="get_tag_list",result="miss"} 1', text)
+        self.assertIn('tsingleap_response_cache_hit_ratio{view="get_tag_list"} 0.5', text)
+
+class AsyncViewTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create(username="async_user", email="async@mails.tsinghua.edu.cn", password="password")
+        self.tag = Tag.objects.create(name="async_tag", tag_type=TagType.SPORTS, is_post_tag=True, is_competition_tag=True)
+        self.competition = Competition.objects.create(name="async", sport="S", is_finished=False, time_begin=timezone.now())
+        Focus.objects.create(user=self.user, competition=self.competition)
+        self.posts = [Post.objects.create(title=f"async {index}", content="content", author=self.user) for index in range(3)]
+
+    def test_asgi_urlconf_uses_async_views(self):
+        for name in ("get_competition_list", "get_competition_info", "get_post_list", "get_post_detail_by_id", "get_tag_list"):
+            self.assertTrue(asyncio.iscoroutinefunction(resolve(reverse(name), "tsingleap_backend.urls_asgi").func))
+        self.assertFalse(asyncio.iscoroutinefunction(resolve(reverse("create_post"), "tsingleap_backend.urls_asgi").func))
+
+    async def test_async_views_match_sync_views(self):
+        list_body = {
+            "user_id": self.user.id, "tag_list": [], "search_text": "", "before_time": "",
+            "before_id": -1, "is_finished": False, "filter_focus": True,
+        }
+        requests = [
+            ("post", "get_competition_list", json.dumps(list_body)),
+            ("get", "get_competition_info", {"id": self.competition.id}),
+            ("get", "get_competition_info", {"id": 999}),
+            ("get", "get_post_list", {"page": 1, "page_size": 2}),
+            ("get", "get_post_list", {"page": 9, "page_size": 2}),
+            ("get", "get_post_list", {"cursor": "", "page_size": 2, "with_count": "true"}),
+            ("get", "get_post_detail_by_id", {"post_id": self.posts[0].post_id}),
+            ("get", "get_post_detail_by_id", {"post_id": 999}),
+            ("get", "get_tag_list", {}),
+        ]
+        for method, name, data in requests:
+            kwargs = {"content_type": CONTENT_TYPE} if method == "post" else {}
+            await sync_to_async(cache.clear)()
+            expected = await sync_to_async(getattr(self.client, method))(reverse(name), data, **kwargs)
+            await sync_to_async(cache.clear)()
+            with override_settings(ROOT_URLCONF="tsingleap_backend.urls_asgi"):
+                response = await getattr(self.async_client, method)(reverse(name), data, **kwargs)
+            self.assertEqual(response.json(), expected.json(), name)
+
+class ResponseCacheTests(SimpleTestCase):
+    def fill(self, tags=("forum.post:1",)):
+        response, seq = get_cached_response("view", {"id": 1})
+        self.assertIsNone(response)
+        cache_response("view", {"id": 1}, request_success({"code": 0}), list(tags), seq)
+
+    def test_invalidated_during_query_is_not_stored(self):
+        response, seq = get_cached_response("view", {"id": 1})
+        # 查询期间其他 worker 修改了依赖的对象，查询结果可能是旧数据
+        mark_tags_invalidated(["forum.post:1"])
+        cache_response("view", {"id": 1}, request_success({"code": 0}), ["forum.post:1"], seq)
+        self.fill()
+        response, _ = get_cached_response("view", {"id": 1})
+        self.assertEqual(json.loads(response.content), {"code": 0})
+
+    def test_evicted_tag_invalidates_entry(self):
+        self.fill()
+        self.assertIsNotNone(get_cached_response("view", {"id": 1})[0])
+        cache.delete(tag_seq_key("forum.post:1"))
+        self.assertIsNone(get_cached_response("view", {"id": 1})[0])
+
+    @override_settings(SINGLE_PROCESS=False)
+    def test_disabled_without_shared_cache(self):
+        self.assertEqual(get_cached_response("view", {"id": 1}), (None, None))
+        response = request_success({"code": 0})
+        self.assertIs(cache_response("view", {"id": 1}, response, ["forum.post:1"], None), response)
+        with override_settings(SINGLE_PROCESS=True):
+            self.assertIsNone(get_cached_response("view", {"id": 1})[0])
+
+class JsonEncoderTests(SimpleTestCase):
+    data = {
+        "posts": [{
+            "post_id": 1,
+            "title": "标题",
+            "created_at": datetime.datetime(2025, 5, 1, 8, 30, 15, 123456, tzinfo=datetime.timezone.utc),
+            "ratio": 0.1,
+        }],
+        "day": datetime.date(2025, 5, 1),
+        "msg": "ok",
+    }
+
+    @override_settings(JSON_ENCODER="stdlib")
+    def test_stdlib_matches_json_response(self):
+        response = request_success(self.data)
+        self.assertEqual(response.content, JsonResponse({"code": 0, **self.data}).content)
+        self.assertEqual(response["Content-Type"], "application/json")
+
+    @unittest.skipIf(orjson is None, "orjson is not installed")
+    @override_settings(JSON_ENCODER="orjson")
+    def test_orjson_matches_json_response(self):
+        expected = json.loads(JsonResponse({"code": 0, **self.data}).content)
+        content = json.loads(request_success(self.data).content)
+        self.assertEqual(content, expected)
+        self.assertEqual(content["posts"][0]["created_at"], "2025-05-01T08:30:15.123Z")
+        # orjson 不支持的超长整数回退到标准库
+        self.assertEqual(json.loads(request_success({"total": 2 ** 70}).content)["total"], 2 ** 70)
+
+    floats = {"values": [0.1, 1 / 3, -0.0, 1e-7, 1.5e300, 2 ** 53 + 1.0, 123456789.125]}
+    non_finite = {"nan": float("nan"), "inf": float("inf"), "-inf": float("-inf")}
+
+    @override_settings(JSON_ENCODER="stdlib")
+    def test_stdlib_floats(self):
+        self.assertEqual(json.loads(request_success(self.floats).content)["values"], self.floats["values"])
+        self.assertEqual(
+            request_success(self.non_finite).content,
+            b'{"code": 0, "nan": NaN, "inf": Infinity, "-inf": -Infinity}',
+        )
+
+    @unittest.skipIf(orjson is None, "orjson is not installed")
+    @override_settings(JSON_ENCODER="orjson")
+    def test_orjson_floats(self):
+        # 有限浮点数与标准库一样以最短的可往返表示输出
+        values = json.loads(request_success(self.floats).content)["values"]
+        self.assertEqual(values, self.floats["values"])
+        self.assertEqual(str(values[2]), "-0.0")
+        # NaN 与 ±Infinity 编码为 null，与标准库不同
+        self.assertEqual(request_success(self.non_finite).content, b'{"code":0,"nan":null,"inf":null,"-inf":null}')
+
+    @override_settings(JSON_ENCODER="unknown")
+    def test_unknown_encoder(self):
+        with self.assertRaises(ImproperlyConfigured):
+            request_success(self.data)
+
+class RequestSchemaTests(SimpleTestCase):
+    schema = compile_schema({
+        "user_id": "int",
+        "tag_list": "list",
+        "is_finished": "bool",
+        "keyword": Field("string", default=""),
+    })
+
+    def setUp(self):
+        self.factory = RequestFactory()
+
+        @validate_request("POST", self.schema)
+        def view(req, params):
+            return request_success({"data": params})
+        self.view = view
+
+    def post(self, body):
+        return self.view(self.factory.post("/", data=body if isinstance(body, str) else json.dumps(body), content_type=CONTENT_TYPE))
+
+    def test_valid_request(self):
+        response = self.post({"user_id": "3", "tag_list": [1], "is_finished": "false"})
+        self.assertEqual(json.loads(response.content)["data"], {"user_id": 3, "tag_list": [1], "is_finished": False, "keyword": ""})
+
+    def test_errors_reported_together(self):
+        response = self.post({"tag_list": "1", "is_finished": True})
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(json.loads(response.content), {
+            "code": -2,
+            "msg": "Invalid parameters. Expected `user_id`, but not found.; Missing or error type of [tag_list]",
+        })
+
+    def test_bad_method_and_body(self):
+        self.assertIs(self.view(self.factory.get("/")), BAD_METHOD)
+        self.assertEqual(json.loads(self.post("{").content)["code"], -2)
+        self.assertEqual(self.post([1, 2]).status_code, 400)
+
+    def test_async_view(self):
+        @validate_request("GET", compile_schema({"id": "int"}))
+        async def view(req, params):
+            return request_success({"data": params})
+        self.assertTrue(asyncio.iscoroutinefunction(view))
+        response = asyncio.run(view(self.factory.get("/", {"id": "7"})))
+        self.assertEqual(json.loads(response.content)["data"], {"id": 7})
+
+class ConnectionSettingsTests(SimpleTestCase):
+    def test_connection_modes(self):
+        self.assertEqual(connection_settings("none")["CONN_MAX_AGE"], 0)
+        persistent = connection_settings("persistent", conn_max_age=30)
+        self.assertEqual((persistent["CONN_MAX_AGE"], persistent["CONN_HEALTH_CHECKS"]), (30, True))
+        # 连接池模式下 Django 要求 CONN_MAX_AGE 为 0
+        pool = connection_settings("pool", pool_max_size=8)
+        self.assertEqual(pool["CONN_MAX_AGE"], 0)
+        self.assertEqual(pool["OPTIONS"]["pool"]["max_size"], 8)
+        with self.assertRaises(ValueError):
+            connection_settings("unknown")
+
+@override_settings(DATABASE_REPLICAS=["replica_0"], REPLICA_STICKY_SECONDS=10)
+class ReplicaRouterTests(SimpleTestCase):
+    def setUp(self):
+        self.factory = RequestFactory()
+        self.router = ReplicaRouter()
+
+    def route(self, request, view):
+        """
+        经过读写分离中间件调用 view，返回 (view 内各次读操作选择的库, 响应)
+        """
+        reads = []
+        def get_response(request):
+            view(reads)
+            return HttpResponse()
+        response = replica_routing_middleware(get_response)(request)
+        return reads, response
+
+    def test_reads_follow_method(self):
+        def view(reads):
+            reads.append(self.router.db_for_read(User))
+        reads, response = self.route(self.factory.get("/"), view)
+        self.assertEqual(reads, ["replica_0"])
+        self.assertNotIn(PRIMARY_STICKY_COOKIE, response.cookies)
+        reads, _ = self.route(self.factory.post("/"), view)
+        self.assertEqual(reads, ["default"])
+        # 请求之外（管理命令等）读主库
+        self.assertEqual(self.router.db_for_read(User), "default")
+
+    def test_read_your_writes(self):
+        def view(reads):
+            reads.append(self.router.db_for_read(User))
+            self.assertEqual(self.router.db_for_write(User), "default")
+            reads.append(self.router.db_for_read(User))
+        reads, response = self.route(self.factory.get("/"), view)
+        self.assertEqual(reads, ["replica_0", "default"])
+        cookie = response.cookies[PRIMARY_STICKY_COOKIE]
+        self.assertEqual(cookie["max-age"], 10)
+
+        def read_only(reads):
+            reads.append(self.router.db_for_read(User))
+        sticky = self.factory.get("/")
+        sticky.COOKIES[PRIMARY_STICKY_COOKIE] = cookie.value
+        self.assertEqual(self.route(sticky, read_only)[0], ["default"])
+        expired = self.factory.get("/")
+        expired.COOKIES[PRIMARY_STICKY_COOKIE] = "0"
+        self.assertEqual(self.route(expired, read_only)[0], ["replica_0"])
+
+    def test_view_overrides(self):
+        @read_from_replica
+        def replica_view(reads):
+            reads.append(self.router.db_for_read(User))
+        @read_from_primary
+        def primary_view(reads):
+            reads.append(self.router.db_for_read(User))
+        self.assertEqual(self.route(self.factory.post("/"), replica_view)[0], ["replica_0"])
+        self.assertEqual(self.route(self.factory.get("/"), primary_view)[0], ["default"])
+
+    def test_cache_fills(self):
+        def view(reads):
+            # 响应缓存未命中，随后的查询仍读从库，写入的缓存项有效期不超过粘滞窗口
+            self.assertIsNone(get_cached_response("view", {"id": 1})[0])
+            self.assertEqual(entry_timeout(), 300)
+            reads.append(self.router.db_for_read(User))
+            self.assertEqual(entry_timeout(), 10)
+            # 加载按版本号跨请求缓存的数据时临时读主库
+            with reading_from_primary():
+                reads.append(self.router.db_for_read(User))
+            reads.append(self.router.db_for_read(User))
+        self.assertEqual(self.route(self.factory.get("/"), view)[0], ["replica_0", "default", "replica_0"])
+
+    def test_migrations_on_primary(self):
+        self.assertTrue(self.router.allow_migrate("default", "users"))
+        self.assertFalse(self.router.allow_migrate("replica_0", "users"))
+
+@override_settings(DATABASE_REPLICAS=["replica_0"], REPLICA_STICKY_SECONDS=10)
+class ReplicaCacheMissTests(TransactionTestCase):
+    """
+    响应缓存未命中的查询仍读从库。测试环境没有从库，记录路由的选择后实际仍查询主库；
+    事务中的读走主库，因此不使用 TestCase
+    """
+    def test_uncached_keyword_search_reads_replica(self):
+        user = User.objects.create(username="replica_user", nickname="replica_user", password="x",
+                                   email="replica_user@mails.tsinghua.edu.cn")
+        Post.objects.create(title="replica keyword", content="content", author=user)
+        reads = []
+        db_for_read = ReplicaRouter.db_for_read
+        def record(router, model, **hints):
+            reads.append(db_for_read(router, model, **hints))
+            return "default"
+        with mock.patch.object(ReplicaRouter, "db_for_read", autospec=True, side_effect=record):
+            response = self.client.get(reverse("get_post_list"), {"keyword": "replica", "page": 1, "page_size": 10})
+        self.assertEqual(response.json()["code"], 0)
+        self.assertTrue(reads)
+        self.assertEqual(set(reads), {"replica_0"})
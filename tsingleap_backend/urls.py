@@ -16,6 +16,7 @@ Including another URLconf
 
 from django.contrib import admin
 from django.urls import path, include
+from tsingleap_backend.views import metrics
 from users.views import register, login, send_verification_code, get_csrf_token
 
 urlpatterns = [
@@ -28,4 +29,5 @@ urlpatterns = [
     path("competitions/", include("competitions.urls")),
     path("forum/", include("forum.urls")),
     path("tag/", include("tag.urls")),
+    path("metrics/", metrics, name="metrics"),
 ]
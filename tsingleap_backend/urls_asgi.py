@@ -0,0 +1,43 @@
+"""
+ASGI 入口使用的 URL 配置：路由与 tsingleap_backend.urls 相同，
+读多的接口换成各自的异步版本，其余视图仍为同步视图；另有只在 ASGI 下提供的长连接接口
+"""
+
+from django.urls import URLPattern, URLResolver, path
+
+import competitions.views as competitions
+import forum.views as forum
+import tag.views as tag
+from tsingleap_backend.urls import urlpatterns as sync_urlpatterns
+
+# URL 名称 -> 异步视图
+ASYNC_VIEWS = {
+    "get_competition_list": competitions.aget_competition_list,
+    "get_competition_info": competitions.aget_competition_info,
+    "get_post_list": forum.aget_post_list,
+    "get_post_detail_by_id": forum.aget_post_detail_by_id,
+    "get_tag_list": tag.aget_tag_list,
+}
+
+def use_async_views(patterns):
+    """
+    复制一份路由表并替换其中的视图，同一进程中的同步路由表不受影响
+    """
+    result = []
+    for pattern in patterns:
+        if isinstance(pattern, URLResolver):
+            pattern = URLResolver(
+                pattern.pattern, use_async_views(pattern.url_patterns), pattern.default_kwargs,
+                pattern.app_name, pattern.namespace,
+            )
+        elif isinstance(pattern, URLPattern) and pattern.name in ASYNC_VIEWS:
+            pattern = URLPattern(pattern.pattern, ASYNC_VIEWS[pattern.name], pattern.default_args, pattern.name)
+        result.append(pattern)
+    return result
+
+# 只在 ASGI 入口提供的接口。推送连接会长时间占用处理它的 worker，不能交给数量固定的 uWSGI 进程
+ASGI_ONLY_PATTERNS = [
+    path("competitions/subscribe_competition/", competitions.subscribe_competition, name="subscribe_competition"),
+]
+
+urlpatterns = use_async_views(sync_urlpatterns) + ASGI_ONLY_PATTERNS
@@ -0,0 +1,24 @@
+import hmac
+
+from django.conf import settings
+from django.http import HttpRequest, HttpResponse
+
+from utils.utils_metrics import get_metrics_store, render_metrics
+from utils.utils_request import BAD_METHOD, request_failed
+from utils.utils_require import ErrorCode
+
+def metrics(req: HttpRequest):
+    """
+    以 Prometheus 文本格式输出各接口的请求指标，需携带 Authorization: Bearer <METRICS_TOKEN>；
+    未配置 METRICS_TOKEN 时接口关闭；多进程部署下未配置 Redis 时各 worker 的指标无法汇总，返回 503
+    """
+    if req.method != "GET":
+        return BAD_METHOD
+    token = getattr(settings, "METRICS_TOKEN", "")
+    authorization = req.headers.get("Authorization", "")
+    if not token or not hmac.compare_digest(authorization, f"Bearer {token}"):
+        return request_failed(ErrorCode.NO_PERMISSION["code"], ErrorCode.NO_PERMISSION["msg"], 403)
+    store = get_metrics_store()
+    if store is None:
+        return request_failed(ErrorCode.REDIS_REQUIRED["code"], "Metrics require Redis", 503)
+    return HttpResponse(render_metrics(store), content_type="text/plain; version=0.0.4; charset=utf-8")
@@ -1,7 +1,7 @@
 from django.contrib import admin
 
 # Register your models here.
-from .models import EmailVerification, User
+from .models import EmailVerification, OutgoingEmail, User
 
 @admin.register(EmailVerification)
 class EmailVerificationAdmin(admin.ModelAdmin):
@@ -9,6 +9,12 @@ class EmailVerificationAdmin(admin.ModelAdmin):
     search_fields = ('email',)  # 添加搜索功能
     list_filter = ('created_at',)  # 添加筛选器
 
+@admin.register(OutgoingEmail)
+class OutgoingEmailAdmin(admin.ModelAdmin):
+    list_display = ('id', 'recipient', 'subject', 'status', 'attempts', 'next_attempt_at')  # 列表显示的字段
+    search_fields = ('recipient',)  # 添加搜索功能
+    list_filter = ('status',)  # 添加筛选器
+
 @admin.register(User)
 class UserAdmin(admin.ModelAdmin):
     list_display = ('id', 'username', 'email')  # 在后台列表中显示的字段
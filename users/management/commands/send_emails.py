@@ -0,0 +1,39 @@
+import logging
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+from utils.utils_email import EMAIL_SEND_BATCH_SIZE, send_pending_emails
+
+logger = logging.getLogger(__name__)
+
+class Command(BaseCommand):
+    help = '批量发送发件箱中的邮件，指定 --interval 时持续运行'
+
+    def add_arguments(self, parser):
+        parser.add_argument("--interval", type=float, default=0, help="发件箱为空时两次检查之间的间隔秒数，0 表示只执行一次")
+        parser.add_argument("--batch-size", type=int, default=EMAIL_SEND_BATCH_SIZE, help="每批发送的最多邮件数")
+
+    def handle(self, *args, **options):
+        interval = options["interval"]
+        batch_size = options["batch_size"]
+        while True:
+            # 常驻进程没有请求边界，每批之前自行关闭超时或已断开的数据库连接
+            close_old_connections()
+            try:
+                sent, failed = send_pending_emails(batch_size)
+            except Exception:
+                # 持续运行时一批出错（如数据库重启）不应使进程退出，记录后等待下一轮
+                if interval <= 0:
+                    raise
+                logger.exception("发送发件箱邮件失败")
+                time.sleep(interval)
+                continue
+            if sent or failed:
+                self.stdout.write(f'已发送 {sent} 封邮件，发送失败 {failed} 封')
+            # 本批取满说明可能还有积压，立即发送下一批
+            if sent + failed >= batch_size:
+                continue
+            if interval <= 0:
+                break
+            time.sleep(interval)
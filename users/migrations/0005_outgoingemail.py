@@ -0,0 +1,38 @@
+import utils.utils_time
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("users", "0004_user_username_prefix_idx"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="OutgoingEmail",
+            fields=[
+                ("id", models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name="ID")),
+                ("recipient", models.EmailField(max_length=254)),
+                ("subject", models.CharField(max_length=255)),
+                ("message", models.TextField()),
+                ("html_message", models.TextField(blank=True)),
+                (
+                    "status",
+                    models.CharField(
+                        choices=[("pending", "待发送"), ("failed", "发送失败")],
+                        default="pending",
+                        max_length=16,
+                    ),
+                ),
+                ("attempts", models.IntegerField(default=0)),
+                ("next_attempt_at", models.FloatField(default=utils.utils_time.get_timestamp)),
+                ("last_error", models.TextField(blank=True)),
+                ("created_at", models.FloatField(default=utils.utils_time.get_timestamp)),
+            ],
+            options={
+                "indexes": [
+                    models.Index(fields=["status", "next_attempt_at"], name="users_outbox_due_idx"),
+                ],
+            },
+        ),
+    ]
@@ -1,6 +1,8 @@
 import secrets, string
 from django.db import models
+from django.db.models.functions import Upper
 from django.contrib.auth.models import AbstractUser
+from django.contrib.postgres.indexes import OpClass
 
 from utils.utils_require import MAX_CHAR_LENGTH
 from utils import utils_time
@@ -16,6 +18,30 @@ class EmailVerification(models.Model):
     def generate_verification_code():
         return ''.join(secrets.choice(string.ascii_letters + string.digits) for _ in range(6))
 
+class OutgoingEmailStatus(models.TextChoices):
+    PENDING = "pending", "待发送"
+    FAILED = "failed", "发送失败"
+
+class OutgoingEmail(models.Model):
+    """
+    待发送邮件的发件箱，由 send_emails 命令批量发送，发送成功后删除
+    """
+    recipient = models.EmailField()
+    subject = models.CharField(max_length=MAX_CHAR_LENGTH)
+    message = models.TextField()
+    html_message = models.TextField(blank=True)
+    status = models.CharField(max_length=16, choices=OutgoingEmailStatus.choices, default=OutgoingEmailStatus.PENDING)
+    attempts = models.IntegerField(default=0) # 已尝试发送的次数
+    next_attempt_at = models.FloatField(default=utils_time.get_timestamp) # 最早的下次发送时间
+    last_error = models.TextField(blank=True)
+    created_at = models.FloatField(default=utils_time.get_timestamp)
+
+    class Meta:
+        indexes = [
+            # 发送进程按 (status, next_attempt_at) 取到期的待发送邮件
+            models.Index(fields=["status", "next_attempt_at"], name="users_outbox_due_idx"),
+        ]
+
 class User(models.Model):
     id = models.BigAutoField(primary_key=True) # 主键
     username = models.CharField(max_length=MAX_CHAR_LENGTH, unique=True) # 用户名
@@ -23,5 +49,12 @@ class User(models.Model):
     password = models.CharField(max_length=MAX_CHAR_LENGTH) # 密码
     email = models.EmailField(unique=True) # 邮箱
 
+    class Meta:
+        indexes = [
+            # 用户名不区分大小写的前缀搜索（UPPER(username) LIKE 'PREFIX%'），
+            # text_pattern_ops 使 LIKE 前缀匹配在非 C 排序规则下也能走索引
+            models.Index(OpClass(Upper("username"), name="text_pattern_ops"), name="users_username_prefix_idx"),
+        ]
+
     def __str__(self):
         return f"{self.username} ({self.nickname})"
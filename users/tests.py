@@ -1,11 +1,16 @@
+from django.core import mail
+from django.db import connection
 from django.test import Client, TestCase
+from django.test.utils import CaptureQueriesContext
+from unittest import mock
 from django.urls import reverse
 from django.contrib.auth.hashers import make_password
 from utils import utils_time
 import unittest
 import json
 
-from users.models import User, EmailVerification
+from users.models import User, EmailVerification, OutgoingEmail, OutgoingEmailStatus
+from utils.utils_email import EMAIL_MAX_ATTEMPTS, send_pending_emails
 
 CONTENT_TYPE = "application/json"
 
@@ -108,6 +113,42 @@ class SendVerificationCodeTests(TestCase):
         self.assertEqual(response.status_code, 200)
         data = json.loads(response.content.decode('utf-8'))
         self.assertEqual(data["msg"], "Verification code sent successfully")
+        # 请求中只写入发件箱，不直接发送
+        self.assertEqual(len(mail.outbox), 0)
+        self.assertEqual(OutgoingEmail.objects.filter(recipient=self.valid_email).count(), 1)
+
+    # 发件箱批量发送，查询数与邮件数无关
+    def test_send_pending_emails_batch(self):
+        for i in range(20):
+            self.client.post(
+                reverse('send_verification_code'),
+                data = json.dumps({"email": f"user{i}@mails.tsinghua.edu.cn"}),
+                content_type = CONTENT_TYPE
+            )
+        with CaptureQueriesContext(connection) as queries:
+            self.assertEqual(send_pending_emails(batch_size=50), (20, 0))
+        self.assertLessEqual(len(queries), 6)
+        self.assertEqual(len(mail.outbox), 20)
+        self.assertIn(EmailVerification.objects.get(email="user0@mails.tsinghua.edu.cn").verification_code,
+                      mail.outbox[0].alternatives[0][0])
+        self.assertFalse(OutgoingEmail.objects.exists())
+        self.assertEqual(send_pending_emails(), (0, 0))
+
+    # 发送失败时退避重试，达到次数上限后标记为发送失败
+    def test_send_pending_emails_retry(self):
+        email = OutgoingEmail.objects.create(recipient=self.valid_email, subject="subject", message="message")
+        with mock.patch("django.core.mail.EmailMultiAlternatives.send", side_effect=OSError("connection reset")):
+            for attempts in range(1, EMAIL_MAX_ATTEMPTS + 1):
+                self.assertEqual(send_pending_emails(), (0, 1))
+                email.refresh_from_db()
+                self.assertEqual(email.attempts, attempts)
+                self.assertGreater(email.next_attempt_at, utils_time.get_timestamp())
+                # 跳过退避时间
+                OutgoingEmail.objects.filter(pk=email.pk).update(next_attempt_at=0)
+        email.refresh_from_db()
+        self.assertEqual(email.status, OutgoingEmailStatus.FAILED)
+        self.assertEqual(send_pending_emails(), (0, 0))
+        self.assertEqual(len(mail.outbox), 0)
 
 class RegisterTests(TestCase):
     def setUp(self):
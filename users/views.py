@@ -1,10 +1,10 @@
 import json, jinja2
 from django.shortcuts import render
-from django.core.mail import send_mail
 from django.http import JsonResponse
 from django.http import HttpRequest, HttpResponse
 from django.middleware.csrf import get_token
 from django.contrib.auth.hashers import make_password, check_password
+from django.db import transaction
 from .models import EmailVerification
 
 from users.models import User
@@ -15,6 +15,7 @@ from utils.utils_require import check_require, require
 from utils.utils_time import EMAIL_VERIFICATION_EXPIRE_TIME, EMAIL_VERIFICATION_SEND_INTERVAL, get_timestamp
 from utils.utils_password import MAX_PASSWORD_LENGTH
 from utils.utils_permission import PERMISSION_FORUM_POST
+from utils.utils_email import enqueue_email
 
 from django.views.decorators.csrf import ensure_csrf_cookie
 
@@ -55,19 +56,19 @@ def send_verification_code(req: HttpRequest):
 
     verification_code = EmailVerification.generate_verification_code()
 
-    # 用邮箱发送验证码
+    # 验证码邮件写入发件箱，由 send_emails 命令在请求之外发送
     subject = "TsingLeap Email Verification Code"
     message = f"Please use the verification code below."
     html_message = email_template.render(
         verification_code=verification_code, 
         expire_time=EMAIL_VERIFICATION_EXPIRE_TIME // 60
     )
-    send_mail(subject, message, "tsingleap-auth@foxmail.com", [email], html_message=html_message)
-
-    EmailVerification.objects.update_or_create(
-        email=email,
-        defaults={"verification_code": verification_code, "created_at": get_timestamp()},
-    )
+    with transaction.atomic():
+        EmailVerification.objects.update_or_create(
+            email=email,
+            defaults={"verification_code": verification_code, "created_at": get_timestamp()},
+        )
+        enqueue_email(email, subject, message, html_message)
 
     return request_success({ 
         "code": 0,
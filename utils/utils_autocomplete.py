@@ -0,0 +1,50 @@
+import unicodedata
+
+from django.db.models.functions import Upper
+from pypinyin import Style, lazy_pinyin
+
+from users.models import User
+from utils.utils_require import require
+
+AUTOCOMPLETE_LIMIT = 10
+AUTOCOMPLETE_MAX_LIMIT = 50
+
+def normalize_keyword(text):
+    """
+    统一全角 / 半角与大小写，用于不区分大小写的前缀匹配
+    """
+    return unicodedata.normalize("NFKC", text).casefold().strip()
+
+def autocomplete_keys(name):
+    """
+    名称可被前缀匹配的全部键：名称本身、全拼与拼音首字母，如「篮球」对应 篮球、lanqiu、lq
+    """
+    keys = {normalize_keyword(name)}
+    syllables = lazy_pinyin(name)
+    initials = lazy_pinyin(name, style=Style.FIRST_LETTER)
+    keys.add(normalize_keyword("".join(syllables)))
+    keys.add(normalize_keyword("".join(initials)))
+    keys.discard("")
+    return keys
+
+def get_autocomplete_limit(body):
+    """
+    读取可选的 limit 参数，默认 AUTOCOMPLETE_LIMIT，且不超过 AUTOCOMPLETE_MAX_LIMIT
+    """
+    if "limit" not in body.keys():
+        return AUTOCOMPLETE_LIMIT
+    limit = require(body, "limit", "int")
+    if limit <= 0:
+        raise KeyError("Invalid parameters. `limit` must be positive.", -2)
+    return min(limit, AUTOCOMPLETE_MAX_LIMIT)
+
+def search_usernames(prefix, limit):
+    """
+    用户名不区分大小写的前缀匹配，按 UPPER(username) 排序取前 limit 个，
+    查询条件与排序均可由 users_username_prefix_idx 索引的范围扫描完成
+    """
+    return list(
+        User.objects.filter(username__istartswith=prefix.strip())
+        .order_by(Upper("username"))
+        .values("username", "nickname")[:limit]
+    )
@@ -0,0 +1,52 @@
+import secrets
+
+from django.conf import settings
+from django.core.cache import cache
+
+def is_redis_cache():
+    """
+    默认缓存是否为 django-redis
+    """
+    return settings.CACHES["default"]["BACKEND"].startswith("django_redis.")
+
+def has_shared_cache():
+    """
+    各 worker 能否看到同一份缓存：使用 django-redis，或只运行单个进程（测试与 runserver）时成立。
+    进程内缓存在多进程部署下各自独立，写入与失效都无法到达其他 worker
+    """
+    return is_redis_cache() or getattr(settings, "SINGLE_PROCESS", False)
+
+def new_cache_version():
+    return secrets.token_hex(8)
+
+def get_cache_versions(keys):
+    """
+    读取多个版本号。版本号不存在（从未设置或已被缓存淘汰）时写入一个随机的新版本号而不是从 0 开始，
+    旧版本号下的缓存项因此不会在版本号丢失后重新生效
+    """
+    versions = cache.get_many(keys)
+    for key in keys:
+        if key not in versions:
+            version = new_cache_version()
+            versions[key] = version if cache.add(key, version, None) else cache.get(key, version)
+    return [versions[key] for key in keys]
+
+async def aget_cache_versions(keys):
+    """
+    get_cache_versions 的异步版本
+    """
+    versions = await cache.aget_many(keys)
+    for key in keys:
+        if key not in versions:
+            version = new_cache_version()
+            versions[key] = version if await cache.aadd(key, version, None) else await cache.aget(key, version)
+    return [versions[key] for key in keys]
+
+def get_cache_version(key):
+    return get_cache_versions([key])[0]
+
+def bump_cache_version(key):
+    """
+    换用新的随机版本号，使旧版本号下的缓存项全部失效
+    """
+    cache.set(key, new_cache_version(), None)
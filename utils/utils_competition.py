@@ -1,2 +1,40 @@
+from django.contrib.postgres.aggregates import StringAgg
+from django.contrib.postgres.expressions import ArraySubquery
+from django.db.models import F, OuterRef, Subquery, TextField, Value
+from django.db.models.functions import Coalesce, Concat
+
+from competitions.models import Competition
+
 MAX_COMPETITION_LIST_LENGTH = 12
-TAG_NUM_LIMIT = 8
\ No newline at end of file
+TAG_NUM_LIMIT = 8
+# 批量写入选手时每条 SQL 包含的最多行数
+PARTICIPANT_BATCH_SIZE = 1000
+# 检索文本中名称、项目与各选手名之间的分隔符
+SEARCH_DOCUMENT_SEPARATOR = "\n"
+
+def refresh_search_documents(competition_ids):
+    """
+    用一条 UPDATE 按当前的名称、项目与选手重算赛事的 search_document
+    """
+    through = Competition.participants.through
+    participant_names = (
+        through.objects.filter(competition_id=OuterRef("pk"))
+        .order_by().values("competition_id")
+        .annotate(names=StringAgg("participant__name", delimiter=SEARCH_DOCUMENT_SEPARATOR, ordering="participant_id"))
+        .values("names")
+    )
+    Competition.objects.filter(pk__in=competition_ids).update(
+        search_document=Concat(
+            F("name"), Value(SEARCH_DOCUMENT_SEPARATOR),
+            F("sport"), Value(SEARCH_DOCUMENT_SEPARATOR),
+            Coalesce(Subquery(participant_names), Value("")),
+            output_field=TextField(),
+        )
+    )
+
+def refresh_tag_ids(competition_ids):
+    """
+    用一条 UPDATE 按 m2m 中间表重算赛事的 tag_ids
+    """
+    tag_ids = Competition.tags.through.objects.filter(competition_id=OuterRef("pk")).order_by("tag_id").values("tag_id")
+    Competition.objects.filter(pk__in=competition_ids).update(tag_ids=ArraySubquery(tag_ids))
@@ -0,0 +1,88 @@
+import smtplib
+
+from django.core.mail import EmailMultiAlternatives, get_connection
+from django.db import transaction
+
+from users.models import OutgoingEmail, OutgoingEmailStatus
+from utils.utils_time import get_timestamp
+
+EMAIL_SEND_BATCH_SIZE = 50
+EMAIL_MAX_ATTEMPTS = 5
+# 第 n 次发送失败后等待 EMAIL_RETRY_DELAY * 2^(n-1) 秒再重试，最长 EMAIL_MAX_RETRY_DELAY 秒
+EMAIL_RETRY_DELAY = 15
+EMAIL_MAX_RETRY_DELAY = 600
+# 被取出的邮件在此时间内不会被其他发送进程重复取出；发送进程中途退出时，到期后重新发送
+EMAIL_CLAIM_TIMEOUT = 120
+
+def enqueue_email(recipient, subject, message, html_message=""):
+    """
+    把邮件写入发件箱，由 send_emails 命令异步发送
+    """
+    return OutgoingEmail.objects.create(
+        recipient=recipient,
+        subject=subject,
+        message=message,
+        html_message=html_message,
+    )
+
+def get_retry_delay(attempts):
+    return min(EMAIL_RETRY_DELAY * 2 ** (attempts - 1), EMAIL_MAX_RETRY_DELAY)
+
+def claim_due_emails(batch_size):
+    """
+    取出一批到期的待发送邮件，并把它们的下次发送时间推迟 EMAIL_CLAIM_TIMEOUT 秒。
+    SKIP LOCKED 使多个发送进程取到互不相同的邮件
+    """
+    now = get_timestamp()
+    with transaction.atomic():
+        emails = list(
+            OutgoingEmail.objects.select_for_update(skip_locked=True)
+            .filter(status=OutgoingEmailStatus.PENDING, next_attempt_at__lte=now)
+            .order_by("next_attempt_at", "id")[:batch_size]
+        )
+        if emails:
+            OutgoingEmail.objects.filter(pk__in=[email.pk for email in emails]).update(
+                next_attempt_at=now + EMAIL_CLAIM_TIMEOUT
+            )
+    return emails
+
+def send_pending_emails(batch_size=EMAIL_SEND_BATCH_SIZE):
+    """
+    发送一批到期的邮件，整批复用同一个 SMTP 连接，返回 (发送成功数, 发送失败数)。
+    发送成功的邮件从发件箱删除；失败的按指数退避安排重试，达到 EMAIL_MAX_ATTEMPTS 次后标记为发送失败。
+    """
+    emails = claim_due_emails(batch_size)
+    if not emails:
+        return 0, 0
+    sent = []
+    errors = {}
+    connection = get_connection()
+    try:
+        connection.open()
+    except (smtplib.SMTPException, OSError) as error:
+        errors = {email.pk: error for email in emails}
+    else:
+        for email in emails:
+            message = EmailMultiAlternatives(email.subject, email.message, to=[email.recipient], connection=connection)
+            if email.html_message:
+                message.attach_alternative(email.html_message, "text/html")
+            try:
+                message.send()
+                sent.append(email.pk)
+            except (smtplib.SMTPException, OSError) as error:
+                errors[email.pk] = error
+        connection.close()
+
+    if sent:
+        OutgoingEmail.objects.filter(pk__in=sent).delete()
+    if errors:
+        now = get_timestamp()
+        failed = [email for email in emails if email.pk in errors]
+        for email in failed:
+            email.attempts += 1
+            email.last_error = repr(errors[email.pk])
+            email.next_attempt_at = now + get_retry_delay(email.attempts)
+            if email.attempts >= EMAIL_MAX_ATTEMPTS:
+                email.status = OutgoingEmailStatus.FAILED
+        OutgoingEmail.objects.bulk_update(failed, ["attempts", "last_error", "next_attempt_at", "status"])
+    return len(sent), len(errors)
@@ -1,41 +1,73 @@
+from collections import defaultdict
 from forum.models import Comment
+from django.db.models import Q
 from django.contrib.contenttypes.models import ContentType
+from settings.models import UserPermission
 from utils.utils_params import get_user, get_post, require
 from utils.utils_require import ErrorCode
 from utils.utils_request import request_success
-from tag.models import Tag
+from utils.utils_pagination import apaginate_by_cursor, paginate_by_cursor
+from utils.utils_permission import PERMISSION_FORUM_POST
+from tag.registry import get_tag_registry
 from users.models import User
 from forum.models import Post
 
-def get_reply_list_by_dfs(comment: Comment) -> list[Comment]:
-    def comment_to_dict(comment: Comment) -> dict:
-        return {
-            "comment_id": comment.comment_id,
-            "content": comment.content,
-            "created_at": comment.created_at,
-            "author": comment.author.username,
-            "father_object_id": comment.object_id
-        }
-    reply_list = [comment_to_dict(comment)]
-    reply_of_comment = Comment.objects.filter(content_type=ContentType.objects.get_for_model(Comment),
-                                              object_id=comment.comment_id)
-    for r in reply_of_comment:
-        reply_list.extend(get_reply_list_by_dfs(r))
+def get_reply_list_by_path(comment: Comment) -> list[dict]:
+    """
+    通过物化路径一次查询取出评论及其全部后代回复，按创建时间排序
+    """
+    replies = (
+        Comment.objects
+        .filter(Q(pk=comment.pk) | Q(path__startswith=comment.subtree_path))
+        .select_related("author")
+        .order_by("created_at", "comment_id")
+    )
+    return [{
+        "comment_id": reply.comment_id,
+        "content": reply.content,
+        "created_at": reply.created_at,
+        "author": reply.author.username,
+        "father_object_id": reply.object_id
+    } for reply in replies]
 
-    reply_list = sorted(reply_list, key=lambda x: x["created_at"])
+def post_to_dict(post: Post) -> dict:
+    return {
+        "post_id": post.post_id,
+        "title": post.title,
+        "content": post.content,
+        "created_at": post.created_at,
+        "author": post.author.username,
+        "comment_count": post.comment_count,
+        "total_comment_count": post.total_comment_count,
+    }
 
-    return reply_list
+def comment_to_dict(comment: Comment) -> dict:
+    return {
+        "comment_id": comment.comment_id,
+        "content": comment.content,
+        "created_at": comment.created_at,
+        "author": comment.author.username,
+        "comment_count": comment.comment_count,
+        "total_comment_count": comment.total_comment_count,
+    }
 
 def get_post_info_by_paginator(paginator, page) :
     page_obj = paginator.page(page)
     return {
-        "posts": [{
-            "post_id": post.post_id,
-            "title": post.title,
-            "content": post.content,
-            "created_at": post.created_at,
-            "author": post.author.username,
-        } for post in page_obj],
+        "posts": [post_to_dict(post) for post in page_obj],
+        "total_pages": paginator.num_pages,
+        "total_posts": paginator.count
+    }
+
+async def aget_post_info_by_paginator(paginator, page) :
+    """
+    get_post_info_by_paginator 的异步版本。Paginator 只会同步查询，
+    这里先异步计数填入 paginator.count，校验页码后再异步取出本页
+    """
+    paginator.count = await paginator.object_list.acount()
+    bottom = (paginator.validate_number(page) - 1) * paginator.per_page
+    return {
+        "posts": [post_to_dict(post) async for post in paginator.object_list[bottom:bottom + paginator.per_page]],
         "total_pages": paginator.num_pages,
         "total_posts": paginator.count
     }
@@ -43,16 +75,48 @@ def get_post_info_by_paginator(paginator, page) :
 def get_comment_info_by_paginator(paginator, page) :
     page_obj = paginator.page(page)
     return {
-        "comments": [{
-            "comment_id": comment.comment_id,
-            "content": comment.content,
-            "created_at": comment.created_at,
-            "author": comment.author.username,
-        } for comment in page_obj],
+        "comments": [comment_to_dict(comment) for comment in page_obj],
         "total_pages": paginator.num_pages,
         "total_comments": paginator.count
     }
 
+def get_post_info_by_cursor(posts, cursor, page_size, with_count) :
+    page_items, next_cursor, total = paginate_by_cursor(posts, cursor, page_size, "post_id", with_count)
+    data = {
+        "posts": [post_to_dict(post) for post in page_items],
+        "next_cursor": next_cursor,
+    }
+    if with_count:
+        data["total_posts"] = total
+    return data
+
+async def aget_post_info_by_cursor(posts, cursor, page_size, with_count) :
+    page_items, next_cursor, total = await apaginate_by_cursor(posts, cursor, page_size, "post_id", with_count)
+    data = {
+        "posts": [post_to_dict(post) for post in page_items],
+        "next_cursor": next_cursor,
+    }
+    if with_count:
+        data["total_posts"] = total
+    return data
+
+def get_comment_info_by_cursor(comments, cursor, page_size, with_count, total=None) :
+    """
+    total 为调用方已知的评论总数（如父对象的计数器）时不再执行 COUNT 查询
+    """
+    page_items, next_cursor, counted = paginate_by_cursor(
+        comments, cursor, page_size, "comment_id", with_count and total is None
+    )
+    if total is None:
+        total = counted
+    data = {
+        "comments": [comment_to_dict(comment) for comment in page_items],
+        "next_cursor": next_cursor,
+    }
+    if with_count:
+        data["total_comments"] = total
+    return data
+
 def get_user_post_tag_from_body(body) :
     try:
         user = get_user(body, "username")
@@ -63,12 +127,43 @@ def get_user_post_tag_from_body(body) :
         return None, None, None, ErrorCode.POST_DOES_NOT_EXIST
 
     tag_id = require(body, "tag_id", "int")
-    try:
-        tag = Tag.objects.get(id=tag_id)
-    except Tag.DoesNotExist:
+    tag = get_tag_registry().get(tag_id)
+    if tag is None:
         return None, None, None, {
             "code": 1046,
             "msg": f"Invalid tag id: {tag_id}"
         }
     
-    return user, post, tag, None
\ No newline at end of file
+    return user, post, tag, None
+
+def resolve_report_states(reports) -> dict:
+    """
+    批量计算一组举报的处理状态，返回 {report_id: {"object_deleted": bool, "user_banned": bool}}。
+    每种被举报对象类型一次 id__in 查询，封禁状态一次权限查询，与举报数量无关。
+    """
+    object_ids_by_type = defaultdict(set)
+    for report in reports:
+        object_ids_by_type[report.content_type_id].add(report.object_id)
+
+    existing_objects = set()
+    for content_type_id, object_ids in object_ids_by_type.items():
+        model = ContentType.objects.get_for_id(content_type_id).model_class()
+        existing_objects.update(
+            (content_type_id, pk) for pk in model.objects.filter(pk__in=object_ids).values_list("pk", flat=True)
+        )
+
+    # 没有发帖权限即视为被封禁
+    reported_user_ids = {report.reported_user_id for report in reports}
+    allowed_user_ids = set(
+        UserPermission.objects
+        .filter(user_id__in=reported_user_ids, permission=PERMISSION_FORUM_POST)
+        .values_list("user_id", flat=True)
+    )
+
+    return {
+        report.report_id: {
+            "object_deleted": (report.content_type_id, report.object_id) not in existing_objects,
+            "user_banned": report.reported_user_id not in allowed_user_ids,
+        }
+        for report in reports
+    }
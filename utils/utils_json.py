@@ -0,0 +1,53 @@
+import json
+
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from django.core.serializers.json import DjangoJSONEncoder
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# 可选的 JSON 编码器，由 settings.JSON_ENCODER 选择，默认 stdlib；auto 表示装有 orjson 时用 orjson
+JSON_ENCODERS = ("auto", "orjson", "stdlib")
+
+_django_encoder = DjangoJSONEncoder()
+
+def encode_stdlib(data):
+    """
+    与 JsonResponse 默认行为相同的编码：标准库 json + DjangoJSONEncoder
+    """
+    return json.dumps(data, cls=DjangoJSONEncoder).encode("utf-8")
+
+def encode_orjson(data):
+    """
+    orjson 编码。日期时间交给 DjangoJSONEncoder 格式化（毫秒精度、UTC 写作 Z），输出为紧凑的 UTF-8，
+    不转义非 ASCII 字符。超出 64 位的整数等 orjson 不支持的值回退到标准库。
+    与 encode_stdlib 的差别：NaN 与 ±Infinity 编码为 null，标准库输出非标准的 NaN / Infinity；
+    其余值解码后相同
+    """
+    try:
+        return orjson.dumps(
+            data,
+            default=_django_encoder.default,
+            option=orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_NON_STR_KEYS,
+        )
+    except orjson.JSONEncodeError:
+        return encode_stdlib(data)
+
+def get_json_encoder():
+    name = getattr(settings, "JSON_ENCODER", "stdlib")
+    if name not in JSON_ENCODERS:
+        raise ImproperlyConfigured(f"Unknown JSON_ENCODER {name!r}, expected one of {', '.join(JSON_ENCODERS)}")
+    if name == "stdlib" or (name == "auto" and orjson is None):
+        return encode_stdlib
+    if orjson is None:
+        raise ImproperlyConfigured("JSON_ENCODER is 'orjson' but orjson is not installed")
+    return encode_orjson
+
+def encode_json(data):
+    """
+    把响应数据编码为 bytes
+    """
+    return get_json_encoder()(data)
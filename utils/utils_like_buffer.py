@@ -0,0 +1,253 @@
+import threading
+from collections import Counter
+
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from django.db import transaction
+from django.db.models import Case, F, Value, When
+
+from competitions.models import Like, Participant
+from users.models import User
+from utils.utils_cache import has_shared_cache, is_redis_cache
+from utils.utils_response_cache import instance_tag, invalidate_response_cache
+
+# 待落库的点赞状态：field 为 "user_id:participant_id"，值为 "1"（点赞）或 "0"（取消点赞），
+# 同一对 (用户, 选手) 只保留最后一次操作，重复点赞不会重复计数
+PENDING_KEY = "like_buffer:pending"
+# 各选手尚未落库的点赞数增量
+DELTA_KEY = "like_buffer:delta"
+# 正在落库的快照，落库完成后删除；落库中途失败时下次会重新处理
+FLUSHING_PENDING_KEY = "like_buffer:flushing:pending"
+FLUSHING_DELTA_KEY = "like_buffer:flushing:delta"
+
+# 状态与上次相同时返回 0，否则记录新状态、调整增量并返回 1
+RECORD_SCRIPT = """
+local current = redis.call('HGET', KEYS[1], ARGV[1])
+if not current then current = redis.call('HGET', KEYS[2], ARGV[1]) end
+if not current then current = ARGV[3] end
+if current == ARGV[2] then return 0 end
+redis.call('HSET', KEYS[1], ARGV[1], ARGV[2])
+redis.call('HINCRBY', KEYS[3], ARGV[4], ARGV[2] == '1' and 1 or -1)
+return 1
+"""
+
+# 把待落库的数据整体改名为快照；上一次的快照尚未处理完时不做改动
+ROTATE_SCRIPT = """
+if redis.call('EXISTS', KEYS[3]) == 0 and redis.call('EXISTS', KEYS[1]) == 1 then
+    redis.call('RENAME', KEYS[1], KEYS[3])
+    if redis.call('EXISTS', KEYS[2]) == 1 then redis.call('RENAME', KEYS[2], KEYS[4]) end
+end
+return 1
+"""
+
+def pair_field(user_id, participant_id):
+    return f"{user_id}:{participant_id}"
+
+def parse_pair_field(field):
+    user_id, participant_id = field.split(":")
+    return int(user_id), int(participant_id)
+
+class RedisLikeStore:
+    """
+    基于 Redis 哈希的点赞缓冲，多个 worker 与落库进程共享
+    """
+    def __init__(self, client):
+        self.client = client
+        self.record_script = client.register_script(RECORD_SCRIPT)
+        self.rotate_script = client.register_script(ROTATE_SCRIPT)
+
+    def get_states(self, user_id, participant_ids):
+        fields = [pair_field(user_id, participant_id) for participant_id in participant_ids]
+        if not fields:
+            return {}
+        pending = self.client.hmget(PENDING_KEY, fields)
+        flushing = self.client.hmget(FLUSHING_PENDING_KEY, fields)
+        states = {}
+        for participant_id, current, previous in zip(participant_ids, pending, flushing):
+            value = current if current is not None else previous
+            if value is not None:
+                states[participant_id] = value == b"1"
+        return states
+
+    def get_deltas(self, participant_ids):
+        fields = [str(participant_id) for participant_id in participant_ids]
+        if not fields:
+            return {}
+        pending = self.client.hmget(DELTA_KEY, fields)
+        flushing = self.client.hmget(FLUSHING_DELTA_KEY, fields)
+        return {
+            participant_id: int(current or 0) + int(previous or 0)
+            for participant_id, current, previous in zip(participant_ids, pending, flushing)
+            if current is not None or previous is not None
+        }
+
+    def record(self, user_id, participant_id, liked, persisted):
+        keys = [PENDING_KEY, FLUSHING_PENDING_KEY, DELTA_KEY]
+        args = [pair_field(user_id, participant_id), int(liked), int(persisted), participant_id]
+        return self.record_script(keys=keys, args=args) == 1
+
+    def take_snapshot(self):
+        self.rotate_script(keys=[PENDING_KEY, DELTA_KEY, FLUSHING_PENDING_KEY, FLUSHING_DELTA_KEY])
+        return {
+            parse_pair_field(field.decode()): value == b"1"
+            for field, value in self.client.hgetall(FLUSHING_PENDING_KEY).items()
+        }
+
+    def clear_snapshot(self):
+        self.client.delete(FLUSHING_PENDING_KEY, FLUSHING_DELTA_KEY)
+
+class LocalLikeStore:
+    """
+    进程内的点赞缓冲，语义与 RedisLikeStore 相同，仅用于测试与单进程开发环境
+    """
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.pending = {}
+        self.delta = Counter()
+        self.flushing = {}
+        self.flushing_delta = Counter()
+
+    def get_states(self, user_id, participant_ids):
+        with self.lock:
+            states = {}
+            for participant_id in participant_ids:
+                pair = (user_id, participant_id)
+                if pair in self.pending:
+                    states[participant_id] = self.pending[pair]
+                elif pair in self.flushing:
+                    states[participant_id] = self.flushing[pair]
+            return states
+
+    def get_deltas(self, participant_ids):
+        with self.lock:
+            return {
+                participant_id: self.delta[participant_id] + self.flushing_delta[participant_id]
+                for participant_id in participant_ids
+                if participant_id in self.delta or participant_id in self.flushing_delta
+            }
+
+    def record(self, user_id, participant_id, liked, persisted):
+        pair = (user_id, participant_id)
+        with self.lock:
+            current = self.pending.get(pair, self.flushing.get(pair, persisted))
+            if current == liked:
+                return False
+            self.pending[pair] = liked
+            self.delta[participant_id] += 1 if liked else -1
+            return True
+
+    def take_snapshot(self):
+        with self.lock:
+            if not self.flushing:
+                self.flushing, self.pending = self.pending, {}
+                self.flushing_delta, self.delta = self.delta, Counter()
+            return dict(self.flushing)
+
+    def clear_snapshot(self):
+        with self.lock:
+            self.flushing = {}
+            self.flushing_delta = Counter()
+
+_local_store = LocalLikeStore()
+_redis_store = None
+
+def check_like_buffer_config():
+    """
+    开启点赞写缓冲却没有共享的缓冲存储时在启动阶段报错，而不是让每个点赞请求都失败
+    """
+    if is_like_buffer_enabled() and not has_shared_cache():
+        raise ImproperlyConfigured("TSINGLEAP_LIKE_BUFFER requires REDIS_URL (django-redis cache)")
+
+def get_like_store():
+    """
+    缓存使用 django-redis 时返回共享的 Redis 缓冲；单进程运行时返回进程内缓冲。
+    多进程部署下进程内缓冲对落库进程不可见，点赞会丢失，因此直接报错
+    """
+    global _redis_store
+    if not is_redis_cache():
+        check_like_buffer_config()
+        return _local_store
+    if _redis_store is None:
+        from django_redis import get_redis_connection
+        _redis_store = RedisLikeStore(get_redis_connection("default"))
+    return _redis_store
+
+def is_like_buffer_enabled():
+    return getattr(settings, "LIKE_BUFFER_ENABLED", False)
+
+def buffer_like(user_id, participant_id, liked):
+    """
+    把一次点赞 / 取消点赞写入缓冲，状态未变化（重复点赞或取消未点赞的选手）时返回 False。
+    缓冲中没有该用户对该选手的记录时，以数据库中的状态为准。
+    """
+    store = get_like_store()
+    state = store.get_states(user_id, [participant_id]).get(participant_id)
+    if state is None:
+        state = Like.objects.filter(user_id=user_id, participant_id=participant_id).exists()
+    if state == liked:
+        return False
+    recorded = store.record(user_id, participant_id, liked, state)
+    if recorded:
+        invalidate_response_cache(instance_tag(Participant, participant_id))
+    return recorded
+
+def get_pending_likes(user_id, participant_ids):
+    """
+    返回 ({participant_id: 该用户缓冲中的点赞状态}, {participant_id: 未落库的点赞数增量})，
+    未开启缓冲时均为空
+    """
+    if not is_like_buffer_enabled():
+        return {}, {}
+    store = get_like_store()
+    return store.get_states(user_id, participant_ids), store.get_deltas(participant_ids)
+
+def flush_like_buffer():
+    """
+    把缓冲中的点赞状态批量写入 Like 表并更新 like_count，返回实际增删的点赞记录数。
+    按最终状态与数据库比对后落库，快照被重复处理时结果不变。
+    """
+    store = get_like_store()
+    snapshot = store.take_snapshot()
+    if not snapshot:
+        return 0
+    user_ids = {user_id for user_id, _ in snapshot}
+    participant_ids = {participant_id for _, participant_id in snapshot}
+    with transaction.atomic():
+        existing_users = set(User.objects.filter(id__in=user_ids).values_list("id", flat=True))
+        existing_participants = set(Participant.objects.filter(id__in=participant_ids).values_list("id", flat=True))
+        liked = {}
+        for like_id, user_id, participant_id in (
+            Like.objects.filter(user_id__in=user_ids, participant_id__in=participant_ids)
+            .values_list("id", "user_id", "participant_id")
+        ):
+            liked.setdefault((user_id, participant_id), []).append(like_id)
+
+        to_create = [
+            Like(user_id=user_id, participant_id=participant_id)
+            for (user_id, participant_id), state in snapshot.items()
+            if state and (user_id, participant_id) not in liked
+            and user_id in existing_users and participant_id in existing_participants
+        ]
+        deltas = Counter(like.participant_id for like in to_create)
+        to_delete = []
+        for (user_id, participant_id), state in snapshot.items():
+            if not state and (user_id, participant_id) in liked:
+                to_delete.extend(liked[(user_id, participant_id)])
+                deltas[participant_id] -= len(liked[(user_id, participant_id)])
+
+        Like.objects.bulk_create(to_create, batch_size=1000)
+        if to_delete:
+            batch = Like.objects.filter(pk__in=to_delete)
+            batch._raw_delete(batch.db)
+        deltas = {participant_id: delta for participant_id, delta in deltas.items() if delta}
+        if deltas:
+            Participant.objects.filter(pk__in=deltas).update(
+                like_count=F("like_count") + Case(
+                    *[When(pk=participant_id, then=Value(delta)) for participant_id, delta in deltas.items()],
+                    default=Value(0),
+                )
+            )
+    store.clear_snapshot()
+    # 快照中的增量已并入 like_count，缓存中合并了这部分增量的参赛者列表随之作废
+    invalidate_response_cache(*[instance_tag(Participant, participant_id) for participant_id in participant_ids])
+    return len(to_create) + len(to_delete)
@@ -0,0 +1,225 @@
+import logging
+import threading
+import time
+from collections import Counter
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.db import connections
+
+from utils.utils_cache import has_shared_cache, is_redis_cache
+
+logger = logging.getLogger(__name__)
+
+# 所有 worker 共享的指标哈希，field 为 "指标|视图名|附加标签"，值为累计量
+METRICS_KEY = "metrics:requests"
+# 请求耗时直方图的桶上界（秒）
+DURATION_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+# 未配置 METRICS_QUERY_LIMIT 时，单个请求的查询数超过此值即记录告警
+DEFAULT_QUERY_LIMIT = 50
+# 没有匹配到路由的请求（如 404）统一记在此视图名下
+UNMATCHED_VIEW = "unmatched"
+
+def metric_field(metric, view, extra=""):
+    return f"{metric}|{view}|{extra}"
+
+def parse_metric_field(field):
+    metric, view, extra = field.split("|", 2)
+    return metric, view, extra
+
+def get_duration_bucket(duration):
+    """
+    返回耗时所在的直方图桶下标，超过最大上界时为 len(DURATION_BUCKETS)
+    """
+    for index, bound in enumerate(DURATION_BUCKETS):
+        if duration <= bound:
+            return index
+    return len(DURATION_BUCKETS)
+
+class RedisMetricsStore:
+    """
+    基于 Redis 哈希的指标存储，各 uWSGI / ASGI worker 的数据累加到同一份
+    """
+    def __init__(self, client):
+        self.client = client
+
+    def add(self, increments):
+        pipe = self.client.pipeline(transaction=False)
+        for field, value in increments.items():
+            if isinstance(value, float):
+                pipe.hincrbyfloat(METRICS_KEY, field, value)
+            else:
+                pipe.hincrby(METRICS_KEY, field, value)
+        pipe.execute()
+
+    def snapshot(self):
+        return {field.decode(): float(value) for field, value in self.client.hgetall(METRICS_KEY).items()}
+
+    def clear(self):
+        self.client.delete(METRICS_KEY)
+
+class LocalMetricsStore:
+    """
+    进程内的指标存储，语义与 RedisMetricsStore 相同，仅用于测试与单进程开发环境
+    """
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.values = Counter()
+
+    def add(self, increments):
+        with self.lock:
+            self.values.update(increments)
+
+    def snapshot(self):
+        with self.lock:
+            return {field: float(value) for field, value in self.values.items()}
+
+    def clear(self):
+        with self.lock:
+            self.values.clear()
+
+_local_store = LocalMetricsStore()
+_redis_store = None
+
+def get_metrics_store():
+    """
+    缓存使用 django-redis 时返回共享的 Redis 存储；单进程运行时返回进程内存储。
+    多进程部署下各 worker 的进程内计数互不相通，/metrics/ 只能看到处理它的那个 worker，
+    此时返回 None，不再记录指标
+    """
+    global _redis_store
+    if not is_redis_cache():
+        return _local_store if has_shared_cache() else None
+    if _redis_store is None:
+        from django_redis import get_redis_connection
+        _redis_store = RedisMetricsStore(get_redis_connection("default"))
+    return _redis_store
+
+def get_query_limit():
+    return getattr(settings, "METRICS_QUERY_LIMIT", DEFAULT_QUERY_LIMIT)
+
+class QueryRecorder:
+    """
+    通过 connection.execute_wrapper 统计一个请求内所有数据库连接上执行的查询数与总耗时
+    """
+    def __init__(self):
+        self.count = 0
+        self.duration = 0.0
+        self.stack = ExitStack()
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.count += 1
+            self.duration += time.perf_counter() - start
+
+    def start(self):
+        """
+        在当前线程的各数据库连接上安装计数器；ASGI 下需在执行 ORM 调用的线程中调用
+        """
+        for alias in connections:
+            self.stack.enter_context(connections[alias].execute_wrapper(self))
+
+    def stop(self):
+        self.stack.close()
+
+def record_request(request, response, duration, recorder):
+    """
+    把一次请求的耗时、查询数、查询总耗时与响应大小累加到指标存储；
+    查询数超过 METRICS_QUERY_LIMIT 时记录告警并计数
+    """
+    store = get_metrics_store()
+    match = getattr(request, "resolver_match", None)
+    view = match.url_name if match is not None and match.url_name else UNMATCHED_VIEW
+    increments = {
+        metric_field("requests", view, str(response.status_code)): 1,
+        metric_field("duration_bucket", view, str(get_duration_bucket(duration))): 1,
+        metric_field("duration_sum", view): duration,
+        metric_field("queries", view): recorder.count,
+        metric_field("query_duration", view): recorder.duration,
+    }
+    if not response.streaming:
+        increments[metric_field("response_bytes", view)] = len(response.content)
+    limit = get_query_limit()
+    if recorder.count > limit:
+        increments[metric_field("query_limit_exceeded", view)] = 1
+        logger.warning(
+            "%s %s (%s) ran %d queries, more than the limit of %d",
+            request.method, request.path, view, recorder.count, limit,
+        )
+    if store is not None:
+        store.add(increments)
+
+def format_labels(**labels):
+    def escape(value):
+        return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+    return "{" + ",".join(f'{name}="{escape(value)}"' for name, value in labels.items()) + "}"
+
+def format_number(value):
+    return str(int(value)) if value == int(value) else repr(value)
+
+COUNTERS = (
+    ("queries", "tsingleap_db_queries_total", "Database queries executed, by view."),
+    ("query_duration", "tsingleap_db_query_duration_seconds_total", "Time spent in database queries, by view."),
+    ("response_bytes", "tsingleap_response_bytes_total", "Size of non-streaming response bodies, by view."),
+    ("query_limit_exceeded", "tsingleap_query_limit_exceeded_total", "Requests that ran more queries than METRICS_QUERY_LIMIT, by view."),
+)
+
+def render_metrics(store):
+    """
+    以 Prometheus 文本格式输出全部指标
+    """
+    values = {}
+    for field, value in store.snapshot().items():
+        metric, view, extra = parse_metric_field(field)
+        values.setdefault(metric, {}).setdefault(view, {})[extra] = value
+
+    lines = [
+        "# HELP tsingleap_requests_total Requests handled, by view and status code.",
+        "# TYPE tsingleap_requests_total counter",
+    ]
+    for view, statuses in sorted(values.get("requests", {}).items()):
+        for status, value in sorted(statuses.items()):
+            lines.append(f"tsingleap_requests_total{format_labels(view=view, status=status)} {format_number(value)}")
+
+    lines += [
+        "# HELP tsingleap_request_duration_seconds Request latency, by view.",
+        "# TYPE tsingleap_request_duration_seconds histogram",
+    ]
+    for view, buckets in sorted(values.get("duration_bucket", {}).items()):
+        total = 0
+        for index, bound in enumerate(DURATION_BUCKETS):
+            total += buckets.get(str(index), 0)
+            lines.append(f"tsingleap_request_duration_seconds_bucket{format_labels(view=view, le=bound)} {format_number(total)}")
+        total += buckets.get(str(len(DURATION_BUCKETS)), 0)
+        lines.append(f"tsingleap_request_duration_seconds_bucket{format_labels(view=view, le='+Inf')} {format_number(total)}")
+        duration_sum = values.get("duration_sum", {}).get(view, {}).get("", 0)
+        lines.append(f"tsingleap_request_duration_seconds_sum{format_labels(view=view)} {format_number(duration_sum)}")
+        lines.append(f"tsingleap_request_duration_seconds_count{format_labels(view=view)} {format_number(total)}")
+
+    for metric, name, description in COUNTERS:
+        lines += [f"# HELP {name} {description}", f"# TYPE {name} counter"]
+        for view, extras in sorted(values.get(metric, {}).items()):
+            lines.append(f"{name}{format_labels(view=view)} {format_number(extras.get('', 0))}")
+
+    lookups = sorted(values.get("response_cache", {}).items())
+    lines += [
+        "# HELP tsingleap_response_cache_lookups_total Response cache lookups, by view and result.",
+        "# TYPE tsingleap_response_cache_lookups_total counter",
+    ]
+    for view, results in lookups:
+        for result in ("hit", "miss"):
+            lines.append(
+                f"tsingleap_response_cache_lookups_total{format_labels(view=view, result=result)} {format_number(results.get(result, 0))}"
+            )
+    lines += [
+        "# HELP tsingleap_response_cache_hit_ratio Share of response cache lookups that hit, by view.",
+        "# TYPE tsingleap_response_cache_hit_ratio gauge",
+    ]
+    for view, results in lookups:
+        hits, misses = results.get("hit", 0), results.get("miss", 0)
+        ratio = hits / (hits + misses) if hits + misses else 0
+        lines.append(f"tsingleap_response_cache_hit_ratio{format_labels(view=view)} {format_number(ratio)}")
+    return "\n".join(lines) + "\n"
@@ -0,0 +1,78 @@
+import base64
+import datetime
+import json
+
+from django.db.models import Q
+
+from utils.utils_require import require
+
+CURSOR_PARAM = "cursor"
+
+class InvalidCursor(ValueError):
+    pass
+
+def encode_cursor(created_at, pk):
+    payload = json.dumps([created_at.isoformat(), pk], separators=(",", ":"))
+    return base64.urlsafe_b64encode(payload.encode("utf-8")).decode("ascii").rstrip("=")
+
+def decode_cursor(cursor):
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        created_at, pk = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")))
+        return datetime.datetime.fromisoformat(created_at), int(pk)
+    except (ValueError, TypeError, UnicodeError):
+        raise InvalidCursor(cursor)
+
+def get_cursor_info(body):
+    """
+    请求中带有 cursor 参数时启用游标分页，返回 (cursor, page_size, with_count)，否则返回 None。
+    cursor 为空串表示第一页。
+    """
+    if CURSOR_PARAM not in body.keys():
+        return None
+    cursor = require(body, CURSOR_PARAM, "string")
+    page_size = require(body, "page_size", "int")
+    with_count = require(body, "with_count", "bool") if "with_count" in body.keys() else False
+    return cursor, page_size, with_count
+
+def paginate_by_cursor(queryset, cursor, page_size, pk_field, with_count=False):
+    """
+    按 (created_at, pk) 倒序做游标分页，queryset 须已按 ('-created_at', '-pk') 排序。
+    返回 (本页对象列表, 下一页游标, 总数)；没有下一页时游标为 None，未要求计数时总数为 None。
+    """
+    if page_size <= 0:
+        raise InvalidCursor(cursor)
+    total = queryset.count() if with_count else None
+    items = list(filter_after_cursor(queryset, cursor, pk_field)[:page_size + 1])
+    return (*split_next_page(items, page_size, pk_field), total)
+
+async def apaginate_by_cursor(queryset, cursor, page_size, pk_field, with_count=False):
+    """
+    paginate_by_cursor 的异步版本，通过异步 ORM 计数与取出本页
+    """
+    if page_size <= 0:
+        raise InvalidCursor(cursor)
+    total = await queryset.acount() if with_count else None
+    items = [item async for item in filter_after_cursor(queryset, cursor, pk_field)[:page_size + 1]]
+    return (*split_next_page(items, page_size, pk_field), total)
+
+def filter_after_cursor(queryset, cursor, pk_field):
+    if not cursor:
+        return queryset
+    created_at, pk = decode_cursor(cursor)
+    # created_at__lte 给出索引扫描的上界，其余条件在索引范围内过滤
+    return queryset.filter(
+        Q(created_at__lt=created_at) | Q(created_at=created_at, **{f"{pk_field}__lt": pk}),
+        created_at__lte=created_at,
+    )
+
+def split_next_page(items, page_size, pk_field):
+    """
+    items 多取了一条用于判断是否还有下一页，返回 (本页对象列表, 下一页游标)
+    """
+    next_cursor = None
+    if len(items) > page_size:
+        items = items[:page_size]
+        last = items[-1]
+        next_cursor = encode_cursor(last.created_at, getattr(last, pk_field))
+    return items, next_cursor
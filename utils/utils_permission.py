@@ -1,4 +1,8 @@
 from functools import wraps
+from django.core.cache import cache
+from django.db import transaction
+from tsingleap_backend.routers import reading_from_primary
+from utils.utils_cache import bump_cache_version, get_cache_version, has_shared_cache
 from utils.utils_require import ErrorCode
 from settings.models import UserPermission
 from utils.utils_request import request_failed, request_success
@@ -14,13 +18,62 @@ PERMISSION_FORUM_POST_HIGHLIGHT = "forum.post_highlight"
 
 PERMISSION_TAG_MANAGE_TAG = "tag.manage_tag"
 
+# 跨请求权限缓存的过期时间（秒），版本号失效之外的兜底
+PERMISSION_CACHE_TIMEOUT = 300
+
+def permission_version_key(user_id):
+    return f"permission:version:{user_id}"
+
+def permission_cache_key(user_id, version):
+    return f"permission:{user_id}:{version}"
+
+def bump_permission_version(user_id):
+    bump_cache_version(permission_version_key(user_id))
+
+def invalidate_permission_cache(user_id):
+    """
+    使用户的跨请求权限缓存失效。事务提交后再失效一次，
+    避免其他请求在提交前读到的旧权限以新版本号写回缓存
+    """
+    bump_permission_version(user_id)
+    transaction.on_commit(lambda: bump_permission_version(user_id))
+
+def clear_permission_memo(user):
+    user.__dict__.pop("_permission_map", None)
+
+def load_permissions(user):
+    return list(UserPermission.objects.filter(user=user).values_list("permission", "permission_info"))
+
+def get_permission_map(user):
+    """
+    一次查询取出用户的全部权限，返回 {permission: {permission_info, ...}}。
+    结果缓存在 user 对象上供本次请求复用；有共享缓存时再按用户的版本号跨请求缓存，
+    进程内缓存无法把权限变更通知到其他 worker，此时只在本次请求内复用。
+    """
+    permission_map = user.__dict__.get("_permission_map")
+    if permission_map is not None:
+        return permission_map
+    if has_shared_cache():
+        key = permission_cache_key(user.id, get_cache_version(permission_version_key(user.id)))
+        permissions = cache.get(key)
+        if permissions is None:
+            # 要跨请求缓存的权限从主库读取，从库中尚未同步的撤销不会以当前版本号保存下来
+            with reading_from_primary():
+                permissions = load_permissions(user)
+            cache.set(key, permissions, PERMISSION_CACHE_TIMEOUT)
+    else:
+        permissions = load_permissions(user)
+    permission_map = {}
+    for permission, permission_info in permissions:
+        permission_map.setdefault(permission, set()).add(permission_info)
+    user._permission_map = permission_map
+    return permission_map
+
 def has_permission(user, permission_name, permission_info = "_Default"):
+    permission_map = get_permission_map(user)
     if permission_info == "_Default":
-        return UserPermission.objects.filter(user=user,
-                                             permission=permission_name).exists()
-    return UserPermission.objects.filter(user=user, 
-                                         permission=permission_name, 
-                                         permission_info=permission_info).exists()
+        return permission_name in permission_map
+    return permission_info in permission_map.get(permission_name, ())
     
 def require_permission(permission_name):
     def decorator(view_func):
@@ -40,9 +93,7 @@ def add_permission(operator, user, permission_name, permission_info = ""):
         operator_has_permission = operator_has_permission or has_permission(operator, PERMISSION_FORUM_MANAGE_FORUM)
     if not operator_has_permission:
         return ErrorCode.NO_PERMISSION
-    if not UserPermission.objects.filter(user=user, 
-                                         permission=permission_name, 
-                                         permission_info=permission_info).exists():
+    if not has_permission(user, permission_name, permission_info):
         UserPermission.objects.create(user=user, 
                                      permission=permission_name, 
                                      permission_info=permission_info)
@@ -57,13 +108,12 @@ def remove_permission(operator, user, permission_name, permission_info = ""):
         operator_has_permission = operator_has_permission or has_permission(operator, PERMISSION_FORUM_MANAGE_FORUM)
     if not operator_has_permission:
         return ErrorCode.NO_PERMISSION
-    if not UserPermission.objects.filter(user=user, 
-                                         permission=permission_name, 
-                                         permission_info=permission_info).exists():
+    if not has_permission(user, permission_name, permission_info):
         return {"code": 1021, 
                 "msg": "Permission not found"}
     UserPermission.objects.filter(user=user, 
                                  permission=permission_name, 
                                  permission_info=permission_info).delete()
+    clear_permission_memo(user)
     return {"code": 0, 
             "msg": "Permission removed successfully"}
\ No newline at end of file
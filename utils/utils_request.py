@@ -1,15 +1,31 @@
-from django.http import JsonResponse
+from django.http import HttpResponse
+
+from utils.utils_json import encode_json
+
+
+def json_response(data, status):
+    """
+    按 settings.JSON_ENCODER 编码的 JSON 响应，Content-Type 与 JsonResponse 相同
+    """
+    return HttpResponse(encode_json(data), content_type="application/json", status=status)
+
+
+def encoded_response(content, status=200):
+    """
+    已编码好的 JSON（如响应缓存中的 bytes）直接作为响应体，不再解码与重新编码
+    """
+    return HttpResponse(content, content_type="application/json", status=status)
 
 
 def request_failed(code, info, status_code=400):
-    return JsonResponse({
+    return json_response({
         "code": code,
         "msg": info
     }, status=status_code)
 
 
 def request_success(data={}):
-    return JsonResponse({
+    return json_response({
         "code": 0,
         **data
     }, status=200)
@@ -1,3 +1,4 @@
+import asyncio
 from functools import wraps
 
 from utils.utils_request import request_failed
@@ -9,24 +10,39 @@ class ErrorCode:
     USER_DOES_NOT_EXIST = {"code": 1021, "msg": "User does not exist"}
     PAGE_OUT_OF_RANGE = {"code": 1023, "msg": "Page out of range"}
     POST_DOES_NOT_EXIST = {"code": 1024, "msg": "Post does not exist"}
+    INVALID_CURSOR = {"code": 1025, "msg": "Invalid cursor"}
     INVALID_CONTENT_TYPE = {"code": 1031, "msg": "Invalid content type"}
     OBJECT_DOES_NOT_EXIST = {"code": 1032, "msg": "Object does not exist"}
     COMMENT_DOES_NOT_EXIST = {"code": 1035, "msg": "Comment does not exist"}
     REPORT_DOES_NOT_EXIST = {"code": 1036, "msg": "Report does not exist"}
+    REDIS_REQUIRED = {"code": 1128, "msg": "Redis required"}
 
 def missing_param_msg(param):
     return f"Missing or error type of [{param}]"
 
+def require_failed(e):
+    error_code = -2 if len(e.args) < 2 else e.args[1]
+    return request_failed(error_code, e.args[0], 400)  # Refer to below
+
 # A decorator function for processing `require` in view function.
+# Both sync and async (ASGI) view functions are supported.
 def check_require(check_fn):
+    if asyncio.iscoroutinefunction(check_fn):
+        @wraps(check_fn)
+        async def decorated_async(*args, **kwargs):
+            try:
+                return await check_fn(*args, **kwargs)
+            except Exception as e:
+                return require_failed(e)
+        return decorated_async
+
     @wraps(check_fn)
     def decorated(*args, **kwargs):
         try:
             return check_fn(*args, **kwargs)
         except Exception as e:
             # Handle exception e
-            error_code = -2 if len(e.args) < 2 else e.args[1]
-            return request_failed(error_code, e.args[0], 400)  # Refer to below
+            return require_failed(e)
     return decorated
 
 def convert_type(val, type):
@@ -0,0 +1,185 @@
+import hashlib
+import json
+import time
+
+from asgiref.sync import sync_to_async
+from django.core.cache import cache
+from django.db import transaction
+
+from tsingleap_backend.routers import get_sticky_seconds, has_read_replica
+from utils.utils_cache import has_shared_cache
+from utils.utils_metrics import get_metrics_store, metric_field
+from utils.utils_request import encoded_response
+
+# 响应缓存的过期时间（秒），标签失效之外的兜底
+RESPONSE_CACHE_TIMEOUT = 300
+# 全局的失效序号，每次失效加一；标签记录最后一次失效时的序号，缓存项记录开始查询时的序号
+INVALIDATION_SEQ_KEY = "response_cache:seq"
+# 标签记录的过期时间（秒），长于缓存项；写入缓存项时刷新其依赖标签的过期时间，
+# 因此标签记录不会早于依赖它的缓存项过期，不再被任何缓存项依赖的记录随后过期
+TAG_SEQ_TIMEOUT = 2 * RESPONSE_CACHE_TIMEOUT
+
+def model_tag(model):
+    """
+    依赖某类对象集合（如帖子列表）的缓存项使用的标签，该类对象增删改时失效
+    """
+    return model._meta.label_lower
+
+def instance_tag(model, pk):
+    """
+    依赖单个对象的缓存项使用的标签，该对象变化时失效
+    """
+    return f"{model._meta.label_lower}:{pk}"
+
+def tag_seq_key(tag):
+    return f"response_cache:tag:{tag}"
+
+def response_cache_key(view, params):
+    """
+    缓存键由视图名与规范化后的请求参数（已按类型解析）决定，参数顺序与写法不影响命中
+    """
+    digest = hashlib.sha1(json.dumps(params, sort_keys=True, separators=(",", ":")).encode()).hexdigest()
+    return f"response_cache:{view}:{digest}"
+
+def initial_seq():
+    # 序号丢失（被缓存淘汰）后从当前的微秒时间戳重新开始，仍大于此前分配过的序号
+    return time.time_ns() // 1000
+
+def get_current_seq():
+    seq = cache.get(INVALIDATION_SEQ_KEY)
+    if seq is None:
+        cache.add(INVALIDATION_SEQ_KEY, initial_seq(), None)
+        seq = cache.get(INVALIDATION_SEQ_KEY, initial_seq())
+    return seq
+
+async def aget_current_seq():
+    seq = await cache.aget(INVALIDATION_SEQ_KEY)
+    if seq is None:
+        await cache.aadd(INVALIDATION_SEQ_KEY, initial_seq(), None)
+        seq = await cache.aget(INVALIDATION_SEQ_KEY, initial_seq())
+    return seq
+
+def next_seq():
+    try:
+        return cache.incr(INVALIDATION_SEQ_KEY)
+    except ValueError:
+        cache.add(INVALIDATION_SEQ_KEY, initial_seq(), None)
+        return cache.incr(INVALIDATION_SEQ_KEY)
+
+def mark_tags_invalidated(tags):
+    seq = next_seq()
+    cache.set_many({tag_seq_key(tag): seq for tag in tags}, TAG_SEQ_TIMEOUT)
+
+def is_fresh(entry, seqs):
+    """
+    缓存项依赖的标签在其开始查询之后都没有失效过时有效。
+    标签的记录不存在（已被缓存淘汰）时无从判断，视为失效
+    """
+    return all(seqs.get(tag_seq_key(tag), entry["seq"] + 1) <= entry["seq"] for tag in entry["tags"])
+
+def invalidate_response_cache(*tags):
+    """
+    使依赖给定标签的缓存项失效。事务提交后再失效一次，
+    避免其他请求在提交前读到的旧数据以新版本号写回缓存
+    """
+    tags = list(tags)
+    if not tags or not has_shared_cache():
+        return
+    mark_tags_invalidated(tags)
+    transaction.on_commit(lambda: mark_tags_invalidated(tags))
+
+def record_lookup(view, hit):
+    store = get_metrics_store()
+    if store is not None:
+        store.add({metric_field("response_cache", view, "hit" if hit else "miss"): 1})
+
+def get_cached_response(view, params):
+    """
+    取出缓存的响应，返回 (响应, 序号)。缓存项不存在或其依赖的任一标签已失效时响应为 None，
+    调用方随后查询数据库，并把此时（查询之前）读到的序号交给 cache_response。
+    缓存的是编码好的响应体，命中时原样返回，不再重新编码。
+    没有共享缓存时其他 worker 的失效无法送达，不使用响应缓存，返回 (None, None)
+    """
+    if not has_shared_cache():
+        return None, None
+    entry = cache.get(response_cache_key(view, params))
+    hit = entry is not None and is_fresh(entry, cache.get_many([tag_seq_key(tag) for tag in entry["tags"]]))
+    record_lookup(view, hit)
+    if not hit:
+        return None, get_current_seq()
+    return encoded_response(entry["content"]), None
+
+async def aget_cached_response(view, params):
+    """
+    get_cached_response 的异步版本，供 ASGI 下的异步视图使用
+    """
+    if not has_shared_cache():
+        return None, None
+    entry = await cache.aget(response_cache_key(view, params))
+    hit = entry is not None and is_fresh(entry, await cache.aget_many([tag_seq_key(tag) for tag in entry["tags"]]))
+    await sync_to_async(record_lookup)(view, hit)
+    if not hit:
+        return None, await aget_current_seq()
+    return encoded_response(entry["content"]), None
+
+def build_entry(seq, response, tags, seqs, current):
+    """
+    构造缓存项；依赖的标签在开始查询之后已经失效时返回 None，不写入缓存。
+    从未失效的标签补记为当前序号：若查询期间有任何失效，该缓存项宁可作废，
+    以免标签的记录在失效后被淘汰时把旧数据当作有效
+    """
+    missing = {key: current for key in (tag_seq_key(tag) for tag in tags) if key not in seqs}
+    entry = {"tags": tags, "seq": seq, "content": response.content}
+    if not is_fresh(entry, {**seqs, **missing}):
+        return None, missing
+    return entry, missing
+
+def existing_tag_keys(tags, missing):
+    """
+    已有记录、写入缓存项时需要刷新过期时间的标签键（刚补记的标签已带过期时间）
+    """
+    return [key for key in (tag_seq_key(tag) for tag in tags) if key not in missing]
+
+def entry_timeout():
+    """
+    缓存项的过期时间。查询读过从库时，从库可能还没有应用查询之前已提交的写入，
+    读到的旧数据会带着新的序号写入缓存；此时过期时间不超过粘滞窗口（即允许的从库延迟），
+    旧数据至多保留这么久，未命中的查询仍可以走从库
+    """
+    if has_read_replica():
+        return min(RESPONSE_CACHE_TIMEOUT, get_sticky_seconds())
+    return RESPONSE_CACHE_TIMEOUT
+
+def cache_response(view, params, response, tags, seq):
+    """
+    以 tags 为依赖缓存成功的响应并原样返回。seq 为 get_cached_response 在查询之前返回的序号，
+    查询期间依赖的标签发生失效时不写入缓存，避免把查询时读到的旧数据保存下来
+    """
+    if seq is None or response.status_code != 200:
+        return response
+    tags = list(tags)
+    entry, missing = build_entry(seq, response, tags, cache.get_many([tag_seq_key(tag) for tag in tags]), get_current_seq())
+    for key, value in missing.items():
+        cache.add(key, value, TAG_SEQ_TIMEOUT)
+    if entry is not None:
+        for key in existing_tag_keys(tags, missing):
+            cache.touch(key, TAG_SEQ_TIMEOUT)
+        cache.set(response_cache_key(view, params), entry, entry_timeout())
+    return response
+
+async def acache_response(view, params, response, tags, seq):
+    """
+    cache_response 的异步版本
+    """
+    if seq is None or response.status_code != 200:
+        return response
+    tags = list(tags)
+    seqs = await cache.aget_many([tag_seq_key(tag) for tag in tags])
+    entry, missing = build_entry(seq, response, tags, seqs, await aget_current_seq())
+    for key, value in missing.items():
+        await cache.aadd(key, value, TAG_SEQ_TIMEOUT)
+    if entry is not None:
+        for key in existing_tag_keys(tags, missing):
+            await cache.atouch(key, TAG_SEQ_TIMEOUT)
+        await cache.aset(response_cache_key(view, params), entry, entry_timeout())
+    return response
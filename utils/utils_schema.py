@@ -0,0 +1,128 @@
+import asyncio
+import json
+from functools import wraps
+
+from utils.utils_request import BAD_METHOD, request_failed
+from utils.utils_require import missing_param_msg
+
+# 参数错误的状态码，与 require 相同
+SCHEMA_ERROR_CODE = -2
+# 多个字段出错时，各字段的错误信息以此连接成一条 msg
+SCHEMA_ERROR_SEPARATOR = "; "
+
+_REQUIRED = object()
+
+class Field:
+    """
+    声明一个请求参数；不给出 default 的字段为必填，err_msg 为缺失或类型错误时的提示
+    """
+    def __init__(self, type, default=_REQUIRED, err_msg=None):
+        self.type = type
+        self.default = default
+        self.err_msg = err_msg
+
+def convert_bool(val):
+    if isinstance(val, bool):
+        return val
+    if isinstance(val, str):
+        lowered = val.lower()
+        if lowered in ("true", "1"):
+            return True
+        if lowered in ("false", "0"):
+            return False
+    raise ValueError(val)
+
+def convert_list(val):
+    if not isinstance(val, list):
+        raise ValueError(val)
+    return val
+
+# 与 utils_require.convert_type 的转换规则相同
+CONVERTERS = {
+    "int": int,
+    "float": float,
+    "string": str,
+    "bool": convert_bool,
+    "list": convert_list,
+}
+
+def compile_schema(fields):
+    """
+    把 {键: 类型或 Field} 形式的声明编译为校验函数 validate(source) -> (params, errors)。
+    类型与错误信息在导入时一次确定，校验时只做字典查找与转换
+    """
+    compiled = []
+    for key, field in fields.items():
+        if not isinstance(field, Field):
+            field = Field(field)
+        if field.type not in CONVERTERS:
+            raise NotImplementedError(f"Type `{field.type}` not implemented.")
+        required = field.default is _REQUIRED
+        missing_msg = field.err_msg or f"Invalid parameters. Expected `{key}`, but not found."
+        invalid_msg = field.err_msg or missing_param_msg(key)
+        compiled.append((key, CONVERTERS[field.type], required, field.default, missing_msg, invalid_msg))
+
+    def validate(source):
+        params = {}
+        errors = []
+        for key, convert, required, default, missing_msg, invalid_msg in compiled:
+            if key not in source:
+                if required:
+                    errors.append(missing_msg)
+                else:
+                    params[key] = default
+                continue
+            try:
+                params[key] = convert(source[key])
+            except (ValueError, TypeError):
+                errors.append(invalid_msg)
+        return params, errors
+    return validate
+
+def parse_request(req, method, validate):
+    """
+    GET 请求校验查询字符串，其余请求解析一次 JSON 请求体后校验；
+    返回 (params, None)，或 (None, 错误响应)
+    """
+    if method == "GET":
+        source = req.GET
+    else:
+        try:
+            source = json.loads(req.body.decode("utf-8")) if req.body else {}
+        except ValueError as e:
+            return None, request_failed(SCHEMA_ERROR_CODE, str(e), 400)
+        if not isinstance(source, dict):
+            return None, request_failed(SCHEMA_ERROR_CODE, "Invalid parameters. Expected a JSON object.", 400)
+    params, errors = validate(source)
+    if errors:
+        return None, request_failed(SCHEMA_ERROR_CODE, SCHEMA_ERROR_SEPARATOR.join(errors), 400)
+    return params, None
+
+# A decorator that checks the method, parses the request once and validates it
+# against a compiled schema, then calls view(req, params).
+# Both sync and async (ASGI) view functions are supported.
+def validate_request(method, schema):
+    validate = schema if callable(schema) else compile_schema(schema)
+
+    def decorator(view):
+        if asyncio.iscoroutinefunction(view):
+            @wraps(view)
+            async def wrapped_async(req, *args, **kwargs):
+                if req.method != method:
+                    return BAD_METHOD
+                params, error = parse_request(req, method, validate)
+                if error is not None:
+                    return error
+                return await view(req, params, *args, **kwargs)
+            return wrapped_async
+
+        @wraps(view)
+        def wrapped(req, *args, **kwargs):
+            if req.method != method:
+                return BAD_METHOD
+            params, error = parse_request(req, method, validate)
+            if error is not None:
+                return error
+            return view(req, params, *args, **kwargs)
+        return wrapped
+    return decorator
@@ -0,0 +1,215 @@
+import asyncio
+import json
+import threading
+import time
+from collections import deque
+
+from django.conf import settings
+from django.db import transaction
+
+from utils.utils_cache import has_shared_cache, is_redis_cache
+
+# 每个赛事保留的最近事件数，断线重连时据此补发
+SCORE_FEED_HISTORY = 200
+# 赛事事件记录在 Redis 中的过期时间（秒），每次发布时刷新
+SCORE_FEED_TTL = 24 * 60 * 60
+# 单次推送连接的最长时间（秒），到期后断开，由客户端携带 Last-Event-ID 重连续传
+SCORE_FEED_STREAM_DURATION = 300
+# 没有新事件时发送心跳的间隔（秒），避免连接被代理判定为空闲而断开
+SCORE_FEED_HEARTBEAT = 15
+# 建议客户端断线后的重连等待时间（毫秒）
+SCORE_FEED_RETRY_MS = 3000
+
+def seq_key(competition_id):
+    return f"score_feed:{competition_id}:seq"
+
+def log_key(competition_id):
+    return f"score_feed:{competition_id}:log"
+
+def channel_name(competition_id):
+    return f"score_feed:{competition_id}"
+
+# 分配序号、追加到事件记录并通知订阅者，返回序号。记录中每项为 "序号 事件JSON"
+PUBLISH_SCRIPT = """
+local seq = redis.call('INCR', KEYS[1])
+redis.call('RPUSH', KEYS[2], seq .. ' ' .. ARGV[1])
+redis.call('LTRIM', KEYS[2], -tonumber(ARGV[2]), -1)
+redis.call('EXPIRE', KEYS[1], ARGV[3])
+redis.call('EXPIRE', KEYS[2], ARGV[3])
+redis.call('PUBLISH', KEYS[3], seq)
+return seq
+"""
+
+def select_events(latest, history, last_seq):
+    """
+    从 history（[(序号, 事件), ...]，按序号递增）中取出序号大于 last_seq 的 (序号, 事件)。
+    last_seq 之后的事件已不在记录中，或 last_seq 超过最新序号（记录已过期重建）时返回 None，
+    订阅者需重新拉取完整数据
+    """
+    if last_seq > latest:
+        return None
+    if last_seq < latest and (not history or history[0][0] > last_seq + 1):
+        return None
+    return [(seq, event) for seq, event in history if seq > last_seq]
+
+def parse_entry(entry):
+    seq, payload = entry.decode().split(" ", 1)
+    return int(seq), json.loads(payload)
+
+class RedisScoreFeed:
+    """
+    基于 Redis 的赛事事件流：事件记录保存在列表中，新事件通过 pub/sub 通知各 ASGI 进程
+    """
+    def __init__(self, client, url):
+        self.client = client
+        self.url = url
+        self.publish_script = client.register_script(PUBLISH_SCRIPT)
+
+    def publish(self, competition_id, event):
+        keys = [seq_key(competition_id), log_key(competition_id), channel_name(competition_id)]
+        args = [json.dumps(event, separators=(",", ":")), SCORE_FEED_HISTORY, SCORE_FEED_TTL]
+        return self.publish_script(keys=keys, args=args)
+
+    async def read_since(self, client, competition_id, last_seq):
+        async with client.pipeline(transaction=True) as pipe:
+            pipe.get(seq_key(competition_id))
+            pipe.lrange(log_key(competition_id), 0, -1)
+            latest, entries = await pipe.execute()
+        latest = int(latest or 0)
+        return latest, select_events(latest, [parse_entry(entry) for entry in entries], last_seq)
+
+    def subscribe(self, competition_id):
+        return RedisSubscription(self, competition_id)
+
+class RedisSubscription:
+    def __init__(self, feed, competition_id):
+        self.feed = feed
+        self.competition_id = competition_id
+
+    async def __aenter__(self):
+        from redis.asyncio import Redis
+        self.client = Redis.from_url(self.feed.url)
+        self.pubsub = self.client.pubsub()
+        # 先订阅再读取事件记录，读取期间发布的事件不会漏掉
+        await self.pubsub.subscribe(channel_name(self.competition_id))
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.pubsub.aclose()
+        await self.client.aclose()
+
+    async def read_since(self, last_seq):
+        return await self.feed.read_since(self.client, self.competition_id, last_seq)
+
+    async def wait(self, last_seq, timeout):
+        """
+        等待新事件的通知，超时返回 False
+        """
+        message = await self.pubsub.get_message(ignore_subscribe_messages=True, timeout=timeout)
+        return message is not None
+
+class LocalScoreFeed:
+    """
+    进程内的赛事事件流，语义与 RedisScoreFeed 相同，仅用于测试与单进程开发环境
+    """
+    # 进程内没有通知机制，订阅者按此间隔检查新事件
+    POLL_INTERVAL = 0.2
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.latest = {}
+        self.history = {}
+
+    def publish(self, competition_id, event):
+        with self.lock:
+            seq = self.latest.get(competition_id, 0) + 1
+            self.latest[competition_id] = seq
+            self.history.setdefault(competition_id, deque(maxlen=SCORE_FEED_HISTORY)).append((seq, event))
+            return seq
+
+    def read_since_sync(self, competition_id, last_seq):
+        with self.lock:
+            latest = self.latest.get(competition_id, 0)
+            history = list(self.history.get(competition_id, ()))
+        return latest, select_events(latest, history, last_seq)
+
+    def subscribe(self, competition_id):
+        return LocalSubscription(self, competition_id)
+
+class LocalSubscription:
+    def __init__(self, feed, competition_id):
+        self.feed = feed
+        self.competition_id = competition_id
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        pass
+
+    async def read_since(self, last_seq):
+        return self.feed.read_since_sync(self.competition_id, last_seq)
+
+    async def wait(self, last_seq, timeout):
+        deadline = time.monotonic() + timeout
+        while self.feed.latest.get(self.competition_id, 0) == last_seq:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return False
+            await asyncio.sleep(min(self.feed.POLL_INTERVAL, remaining))
+        return True
+
+_local_feed = LocalScoreFeed()
+_redis_feed = None
+
+def get_score_feed():
+    """
+    缓存使用 django-redis 时返回共享的 Redis 事件流；单进程运行时返回进程内事件流。
+    多进程部署下 uWSGI 中发布的事件到不了 uvicorn，此时返回 None，实时推送不可用
+    """
+    global _redis_feed
+    if not is_redis_cache():
+        return _local_feed if has_shared_cache() else None
+    if _redis_feed is None:
+        from django_redis import get_redis_connection
+        _redis_feed = RedisScoreFeed(get_redis_connection("default"), settings.CACHES["default"]["LOCATION"])
+    return _redis_feed
+
+def publish_competition_event(competition_id, event_type, data):
+    """
+    事务提交后向赛事的订阅者发布一条事件，回滚时不发布；实时推送不可用时不发布
+    """
+    feed = get_score_feed()
+    if feed is None:
+        return
+    event = {"type": event_type, **data}
+    transaction.on_commit(lambda: feed.publish(competition_id, event))
+
+def format_event(seq, event_type, data):
+    return f"id: {seq}\nevent: {event_type}\ndata: {json.dumps(data, separators=(',', ':'))}\n\n"
+
+async def stream_competition_events(feed, competition_id, last_seq=None):
+    """
+    以 SSE 格式逐条产出赛事事件，每条事件带递增的序号。last_seq 为 None 或其后的事件已无法补发时，
+    先发送 reset 事件告知最新序号，客户端应重新拉取赛事信息与选手列表，再从该序号继续接收增量
+    """
+    deadline = time.monotonic() + SCORE_FEED_STREAM_DURATION
+    yield f"retry: {SCORE_FEED_RETRY_MS}\n\n"
+    async with feed.subscribe(competition_id) as subscription:
+        latest, events = await subscription.read_since(last_seq or 0)
+        if last_seq is None:
+            events = None
+        while True:
+            if events is None:
+                last_seq = latest
+                yield format_event(latest, "reset", {"seq": latest})
+            else:
+                for seq, event in events:
+                    last_seq = seq
+                    yield format_event(seq, event["type"], {"seq": seq, **event})
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            if not await subscription.wait(last_seq, min(SCORE_FEED_HEARTBEAT, remaining)):
+                yield ": keep-alive\n\n"
+            latest, events = await subscription.read_since(last_seq)
@@ -0,0 +1,47 @@
+import re
+
+from django.contrib.postgres.search import SearchQuery, SearchRank
+from django.db.models import Case, F, FloatField, Q, Value, When
+
+from forum.models import POST_SEARCH_CONFIG
+
+# simple 配置不会切分中日韩文字，含这些字符的关键词回退到子串匹配（有 pg_trgm 时走三元组索引）
+CJK_PATTERN = re.compile(r"[぀-ヿ㐀-䶿一-鿿가-힯豈-﫿]")
+TERM_PATTERN = re.compile(r"[^\W_]+")
+
+def build_post_search_query(keyword):
+    """
+    把关键词转换成各词前缀匹配的 tsquery，不适合全文检索时返回 None
+    """
+    if CJK_PATTERN.search(keyword):
+        return None
+    terms = TERM_PATTERN.findall(keyword.lower())
+    if not terms:
+        return None
+    raw_query = " & ".join(f"{term}:*" for term in terms)
+    return SearchQuery(raw_query, search_type="raw", config=POST_SEARCH_CONFIG)
+
+def search_posts(posts, keyword, rank=False):
+    """
+    在 posts 中按关键词检索帖子。
+    rank 为 True 时按标题/正文加权相关度排序，相关度相同再按时间倒序；否则只按时间倒序。
+    """
+    keyword = keyword.strip()
+    if not keyword:
+        return posts.order_by('-created_at', '-post_id')
+
+    query = build_post_search_query(keyword)
+    if query is None:
+        posts = posts.filter(Q(title__icontains=keyword) | Q(content__icontains=keyword))
+        relevance = Case(
+            When(title__icontains=keyword, then=Value(1.0)),
+            default=Value(0.4),
+            output_field=FloatField(),
+        )
+    else:
+        posts = posts.filter(search_vector=query)
+        relevance = SearchRank(F("search_vector"), query)
+
+    if not rank:
+        return posts.order_by('-created_at', '-post_id')
+    return posts.annotate(rank=relevance).order_by('-rank', '-created_at', '-post_id')